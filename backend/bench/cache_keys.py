@@ -0,0 +1,90 @@
+"""Cache hit-rate uplift from query canonicalization.
+
+Replays the messages of a workload through three cache-key schemes and
+reports the hit rate each would get from an unbounded cache:
+
+- raw: the query string as-is, which was the old key
+- canonical: canonical_query
+- clustered: symptom_key with symptom clusters enabled
+
+    python -m bench.cache_keys
+    python -m bench.cache_keys --workload bench/workloads/sample.jsonl --variants 3
+
+--variants adds N re-typed copies of every message to simulate repeat
+traffic: random case, extra whitespace, trailing punctuation, a hyphenated
+part number, curly apostrophes.
+"""
+import random
+import argparse
+from collections import defaultdict
+
+from bench.run import DEFAULT_WORKLOAD, load_workload
+from src.services import canonical
+from src.services.canonical import PART_ID_PATTERN, canonical_query, symptom_cluster
+
+
+def retype(message: str, rng: random.Random) -> str:
+    """The same question as a different user might type it"""
+    text = message
+    if rng.random() < 0.5:
+        text = text.lower() if rng.random() < 0.5 else text.capitalize()
+    if rng.random() < 0.4:
+        text = PART_ID_PATTERN.sub(lambda m: f"{m.group(1)}-{m.group(2)}", text.lower())
+    if rng.random() < 0.4:
+        text = text.replace("'", "’")
+    if rng.random() < 0.5:
+        text = text.rstrip("?!.") + rng.choice(["", "?", "!", "!!", " ?"])
+    if rng.random() < 0.5:
+        text = rng.choice(["  ", " ", "\t"]) + text.replace(" ", rng.choice([" ", "  "])) + " "
+    return text
+
+
+def hit_rate(queries, key):
+    seen, hits = set(), 0
+    groups = defaultdict(set)
+    for query in queries:
+        cache_key = key(query)
+        hits += cache_key in seen
+        seen.add(cache_key)
+        groups[cache_key].add(query)
+    return hits / len(queries) if queries else 0.0, len(seen), groups
+
+
+def clustered_key(query):
+    cluster = symptom_cluster(query)
+    return f"cluster:{cluster}" if cluster else canonical_query(query)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache key canonicalization hit-rate report")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD)
+    parser.add_argument("--variants", type=int, default=2, help="Re-typed copies per message")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--examples", type=int, default=5, help="Merged key groups to print")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    messages = [turn["message"] for turn in load_workload(args.workload)]
+    queries = list(messages)
+    for _ in range(args.variants):
+        queries += [retype(message, rng) for message in messages]
+    rng.shuffle(queries)
+
+    print(f"{len(queries)} queries ({len(messages)} messages, {args.variants} variants each)")
+    baseline = None
+    for name, key in (("raw", lambda q: q), ("canonical", canonical_query), ("clustered", clustered_key)):
+        rate, distinct, groups = hit_rate(queries, key)
+        baseline = rate if baseline is None else baseline
+        print(f"  {name:<10} hit rate={rate:6.1%}  distinct keys={distinct:5d}  "
+              f"uplift={rate - baseline:+6.1%}")
+        if name == "clustered":
+            merged = [(k, g) for k, g in groups.items() if k.startswith("cluster:") and len(
+                {canonical_query(q) for q in g}) > 1]
+            for cache_key, group in merged[:args.examples]:
+                print(f"    {cache_key}: {sorted({canonical_query(q) for q in group})}")
+    if not canonical.CACHE_SYMPTOM_CLUSTERS:
+        print("(symptom clusters are off in the server; set CACHE_SYMPTOM_CLUSTERS=1 to use them)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""OpenAI-compatible chat completions server standing in for DeepSeek.
+
+Picks tools with simple keyword rules so the whole chat pipeline is
+exercised, and injects configurable latency and errors.
+
+    python -m bench.fake_llm --port 8900 --latency 0.4 --jitter 0.2 --error-rate 0.01
+"""
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+class FakeLLMConfig:
+    def __init__(self, latency=0.4, jitter=0.2, error_rate=0.0, token_delay=0.01):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.token_delay = token_delay
+        # (kind, seconds) for every completion served, read by the bench report
+        self.timings = []
+
+
+def choose_tool(text: str):
+    """Keyword rules roughly matching the guardrail prompt"""
+    lower = text.lower()
+    words = text.replace("?", " ").replace(",", " ").split()
+    part_ids = [w for w in words if w.upper().startswith(("PS", "WP", "W10")) and len(w) > 5]
+
+    if any(k in lower for k in ("not working", "broken", "troubleshoot", "not draining",
+                                "leak", "noise", "not cleaning", "not filling", "problem")):
+        return "troubleshoot_issue", {"troubleshootText": text}
+    if "compatib" in lower or "fit" in lower or "work with" in lower:
+        return "check_compatibility", {"modelList": text}
+    if "install" in lower and part_ids:
+        return "get_installation_steps", {"part_id": part_ids[0]}
+    if "my orders" in lower or "order history" in lower:
+        return "list_orders", {"user_id": "user123"}
+    if "cancel" in lower and "order" in lower:
+        return "cancel_order", {"order_id": words[-1]}
+    if "order" in lower and ("status" in lower or "where" in lower):
+        return "check_order_status", {"order_id": words[-1]}
+    if "buy" in lower or "place an order" in lower:
+        return "place_order", {"user_id": "user123", "items": [[part_ids[0] if part_ids else "PS100000", 1]],
+                               "total_amount": 42.5}
+    if "repair" in lower or "fix" in lower:
+        return "search_repairs", {"query": text}
+    if "article" in lower or "tips" in lower or "blog" in lower:
+        return "search_blogs", {"query": text}
+    if part_ids or "part" in lower or "filter" in lower or "seal" in lower:
+        return "search_parts", {"query": part_ids[0] if part_ids else text}
+    return None, None
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI()
+
+    async def _delay():
+        await asyncio.sleep(max(0.0, random.gauss(config.latency, config.jitter)))
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        started = time.monotonic()
+        await _delay()
+
+        if random.random() < config.error_rate:
+            config.timings.append(("error", time.monotonic() - started))
+            return JSONResponse({"error": {"message": "injected failure", "type": "server_error"}},
+                                status_code=503)
+
+        messages = body.get("messages", [])
+        system = " ".join((m.get("content") or "") for m in messages if m.get("role") == "system")
+        user_text = next(((m.get("content") or "") for m in reversed(messages) if m.get("role") == "user"), "")
+
+        # The critic prompt asks for formatting: answer with text, never a tool
+        if "Format responses" in system:
+            kind, tool, args = "critic", None, None
+            content = f"Happy to help! {user_text[:400]}\n\nNeed help with compatibility or ordering? Just ask!"
+        else:
+            tool, args = choose_tool(user_text)
+            kind = "tool_select" if tool else "answer"
+            content = None if tool else "I only help with refrigerator and dishwasher parts, repairs, and orders."
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        usage = {"prompt_tokens": sum(len(m.get("content") or "") for m in messages) // 4,
+                 "completion_tokens": len(content or "") // 4 + 10}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        tool_calls = [{
+            "id": f"call_{uuid.uuid4().hex[:8]}", "type": "function",
+            "function": {"name": tool, "arguments": json.dumps(args)}
+        }] if tool else None
+
+        if not body.get("stream"):
+            config.timings.append((kind, time.monotonic() - started))
+            return {
+                "id": completion_id, "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "deepseek-chat"),
+                "choices": [{"index": 0, "finish_reason": "tool_calls" if tool else "stop",
+                             "message": {"role": "assistant", "content": content, "tool_calls": tool_calls}}],
+                "usage": usage,
+            }
+
+        async def events():
+            def chunk(delta, finish=None, with_usage=False):
+                payload = {"id": completion_id, "object": "chat.completion.chunk",
+                           "created": int(time.time()), "model": body.get("model", "deepseek-chat"),
+                           "choices": [] if with_usage else [{"index": 0, "delta": delta, "finish_reason": finish}]}
+                if with_usage:
+                    payload["usage"] = usage
+                return f"data: {json.dumps(payload)}\n\n"
+
+            if tool_calls:
+                yield chunk({"role": "assistant", "tool_calls": [dict(tool_calls[0], index=0)]})
+            else:
+                for word in (content or "").split(" "):
+                    await asyncio.sleep(config.token_delay)
+                    yield chunk({"content": word + " "})
+            yield chunk({}, finish="tool_calls" if tool_calls else "stop")
+            yield chunk({}, with_usage=True)
+            yield "data: [DONE]\n\n"
+            config.timings.append((kind, time.monotonic() - started))
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake OpenAI-compatible LLM server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.4)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    config = FakeLLMConfig(args.latency, args.jitter, args.error_rate)
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""In-process stand-in for the Weaviate v4 client used by VectorDB.
+
+The v4 client runs queries over gRPC, so rather than a wire-compatible
+server this implements the subset of the client API that VectorDB calls
+(collections.get/exists/create, query.near_text/fetch_objects, iterator,
+data.insert, batch) over a synthetic catalog, with latency and error
+injection per call. near_text is a word-overlap ranking, which is enough to
+drive realistic result sizes through the agents.
+
+Because it replaces weaviate.connect_to_weaviate_cloud inside the benchmark
+process, it only serves the in-process app; a server benchmarked with --url
+needs a real Weaviate.
+"""
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+APPLIANCES = ["Dishwasher", "Refrigerator"]
+BRANDS = ["Whirlpool", "GE", "Frigidaire", "Kenmore", "Bosch", "LG", "Samsung", "Maytag"]
+PART_NAMES = [
+    "Door Gasket", "Drain Pump", "Water Inlet Valve", "Spray Arm", "Door Latch", "Ice Maker Assembly",
+    "Water Filter", "Defrost Timer", "Evaporator Fan Motor", "Door Shelf Bin", "Wash Pump Motor",
+    "Rack Roller", "Thermostat", "Control Board", "Heating Element", "Float Switch",
+]
+SYMPTOMS = [
+    "Not draining", "Not cleaning dishes properly", "Noisy", "Leaking", "Will not start", "Not filling with water",
+    "Ice maker not making ice", "Fridge too warm", "Freezer too cold", "Door won't close", "Not dispensing water",
+]
+BLOG_TOPICS = [
+    "How to clean a dishwasher filter", "Why is my refrigerator leaking", "Replacing a door gasket",
+    "Dishwasher maintenance tips", "How to fix a noisy refrigerator", "Ice maker troubleshooting guide",
+]
+
+
+def generate_catalog(parts=2000, models=400, seed=7):
+    """Synthetic Parts / Repairs / Blogs property dicts"""
+    rng = random.Random(seed)
+    model_pool = [f"{rng.choice('WKGFM')}{rng.choice('DRTF')}{rng.randint(100, 999)}"
+                  f"{rng.choice(['SAEM', 'PAFM', 'K900', 'ZW'])}{rng.randint(0, 9)}" for _ in range(models)]
+    catalog = {"Parts": [], "Repairs": [], "Blogs": []}
+    for i in range(parts):
+        name = rng.choice(PART_NAMES)
+        appliance = rng.choice(APPLIANCES)
+        catalog["Parts"].append({
+            "applianceType": appliance,
+            "partName": f"{appliance} {name}",
+            "partId": f"PS{11700000 + i}",
+            "brand": rng.choice(BRANDS),
+            "price": round(rng.uniform(5, 250), 2),
+            "availability": rng.choice(["In Stock", "In Stock", "Backorder"]),
+            "productDescription": f"Genuine OEM {name.lower()} for {appliance.lower()}s. " * 4,
+            "productUrl": f"https://example.com/parts/PS{11700000 + i}",
+            "youtubeVideoUrl": f"https://youtube.com/watch?v={i:08d}",
+            "compatibleModels": ", ".join(rng.sample(model_pool, rng.randint(3, 30))),
+            "sourcePage": "bench",
+        })
+    for appliance in APPLIANCES:
+        for symptom in SYMPTOMS:
+            catalog["Repairs"].append({
+                "product": appliance,
+                "symptom": symptom,
+                "description": f"{appliance} {symptom.lower()}: common causes and how to check them.",
+                "percentage": round(rng.uniform(5, 40), 1),
+                "parts": rng.sample(PART_NAMES, 3),
+                "difficulty": rng.choice(["Easy", "Moderate", "Difficult"]),
+                "repairVideoUrl": "https://youtube.com/watch?v=repair",
+            })
+    for i, title in enumerate(BLOG_TOPICS * 5):
+        catalog["Blogs"].append({
+            "title": f"{title} ({i})",
+            "url": f"https://example.com/blog/{i}",
+            "category": rng.choice(["repair", "maintenance"]),
+            "content_type": "article",
+        })
+    return catalog, model_pool
+
+
+class FakeWeaviateConfig:
+    def __init__(self, latency=0.05, jitter=0.02, error_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timings = []
+        self._lock = threading.Lock()
+
+    def call(self, name):
+        """Simulate one remote round trip"""
+        started = time.monotonic()
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self.timings.append((name, time.monotonic() - started))
+        if failed:
+            raise ConnectionError(f"injected Weaviate failure in {name}")
+
+    def get(self):
+        """collection.config.get(): collections index update timestamps"""
+        return SimpleNamespace(inverted_index_config=SimpleNamespace(index_timestamps=True))
+
+
+class _Metadata:
+    def __init__(self, score=None):
+        self.score = score
+        self.distance = None
+
+
+class _Object:
+    def __init__(self, properties, score=None):
+        self.properties = properties
+        self.metadata = _Metadata(score)
+        self.uuid = properties.get("partId") or properties.get("title") or properties.get("symptom")
+
+
+class _Result:
+    def __init__(self, objects):
+        self.objects = objects
+
+
+def _operator(filter_value):
+    operator = getattr(filter_value, "operator", "")
+    return str(getattr(operator, "value", operator)).lower()
+
+
+def _matches(filters, properties):
+    """Evaluate the Filter objects VectorDB builds (equal/like/contains_any/and/or)"""
+    if filters is None:
+        return True
+    nested = getattr(filters, "filters", None)
+    if nested is not None:
+        results = [_matches(f, properties) for f in nested]
+        return all(results) if "and" in type(filters).__name__.lower() else any(results)
+
+    target = getattr(filters, "target", None)
+    target = target if isinstance(target, str) else str(target)
+    if target.startswith("_"):
+        # Metadata filters (update time): the fake catalog never changes
+        return False
+    actual = properties.get(target)
+    expected = getattr(filters, "value", None)
+    operator = _operator(filters)
+    if operator == "like":
+        needle = str(expected).strip("*").lower()
+        return needle in str(actual or "").lower()
+    if operator == "containsany":
+        values = actual if isinstance(actual, list) else [actual]
+        return any(v in values for v in expected)
+    if operator == "notequal":
+        return actual != expected
+    return actual == expected
+
+
+def _project(properties, return_properties):
+    if not return_properties:
+        return dict(properties)
+    return {name: properties.get(name) for name in return_properties}
+
+
+class _Query:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def fetch_objects(self, filters=None, limit=None, offset=0, return_properties=None, **kwargs):
+        self.collection.config.call(f"{self.collection.name}.fetch_objects")
+        objects = [p for p in self.collection.objects if _matches(filters, p)]
+        end = offset + limit if limit else None
+        return _Result([_Object(_project(p, return_properties)) for p in objects[offset:end]])
+
+    def near_text(self, query, limit=10, filters=None, offset=0, return_properties=None, **kwargs):
+        self.collection.config.call(f"{self.collection.name}.near_text")
+        words = set(query.lower().split())
+        scored = []
+        for properties in self.collection.objects:
+            if not _matches(filters, properties):
+                continue
+            text = " ".join(str(v) for v in properties.values() if isinstance(v, str)).lower()
+            score = sum(1 for w in words if w in text)
+            if score:
+                scored.append((score, properties))
+        scored.sort(key=lambda item: -item[0])
+        window = scored[offset:offset + limit]
+        return _Result([_Object(_project(p, return_properties), score) for score, p in window])
+
+
+class _Data:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def insert(self, properties):
+        self.collection.config.call(f"{self.collection.name}.insert")
+        self.collection.objects.append(dict(properties))
+
+
+class _Batch:
+    def __init__(self, collection):
+        self.collection = collection
+        self.number_errors = 0
+        self.failed_objects = []
+
+    def dynamic(self):
+        return self
+
+    def fixed_size(self, batch_size=100, concurrent_requests=2):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add_object(self, properties, uuid=None, **kwargs):
+        self.collection.objects.append(dict(properties))
+        return uuid
+
+
+class FakeCollection:
+    def __init__(self, name, objects, config):
+        self.name = name
+        self.objects = objects
+        self.config = config
+        self.query = _Query(self)
+        self.data = _Data(self)
+        self.batch = _Batch(self)
+
+    def iterator(self, **kwargs):
+        for properties in list(self.objects):
+            yield _Object(dict(properties))
+
+
+class _Collections:
+    def __init__(self, catalog, config):
+        self._collections = {name: FakeCollection(name, objects, config)
+                             for name, objects in catalog.items()}
+        self.config = config
+
+    def exists(self, name):
+        return name in self._collections
+
+    def create(self, name, **kwargs):
+        self._collections.setdefault(name, FakeCollection(name, [], self.config))
+
+    def get(self, name):
+        return self._collections[name]
+
+
+class FakeWeaviateClient:
+    def __init__(self, catalog=None, config=None):
+        self.config = config or FakeWeaviateConfig()
+        catalog = catalog if catalog is not None else generate_catalog()[0]
+        self.collections = _Collections(catalog, self.config)
+
+    def is_ready(self):
+        return True
+
+    def close(self):
+        pass
@@ -0,0 +1,251 @@
+"""Replay a JSONL chat workload against /api/v1/chat at a target request rate.
+
+By default the FastAPI app runs in-process against the local stand-ins (a
+fake OpenAI-compatible server on a free port and a fake Weaviate client);
+--url targets an already running deployment instead (end-to-end numbers
+only). The fake Weaviate is an in-process client patch, not a server, so
+that deployment has to run against a real Weaviate.
+
+    python -m bench.run --rps 20 --duration 30
+    python -m bench.run --workload bench/workloads/sample.jsonl --llm-latency 0.8 --error-rate 0.02
+    python -m bench.run --url http://localhost:8000 --rps 5 --duration 60
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import asyncio
+import argparse
+import tempfile
+import threading
+from collections import defaultdict
+
+DEFAULT_WORKLOAD = os.path.join(os.path.dirname(__file__), "workloads", "sample.jsonl")
+
+
+def percentiles(samples):
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {"count": len(ordered), "p50_ms": pick(50) * 1000, "p95_ms": pick(95) * 1000,
+            "p99_ms": pick(99) * 1000, "max_ms": ordered[-1] * 1000}
+
+
+def load_workload(path):
+    """One conversation turn per line: {"message": ..., "conversation_history": [...], "user_id": ...}"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_llm(args):
+    """Serve the fake LLM from a background thread; returns its config"""
+    import uvicorn
+    from bench.fake_llm import FakeLLMConfig, create_app
+
+    config = FakeLLMConfig(args.llm_latency, args.llm_jitter, args.error_rate)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return config, port
+
+
+def build_local_app(args):
+    """Import the app wired to the stand-ins. Must run before any src import."""
+    llm_config, port = start_fake_llm(args)
+
+    os.environ.update({
+        "DEEPSEEK_API_KEY": "bench",
+        "LLM_BASE_URL": f"http://127.0.0.1:{port}/v1",
+        "WEAVIATE_URL": "http://fake-weaviate",
+        "WEAVIATE_API_KEY": "bench",
+        "ORDER_DB_URL": f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/bench_orders.db",
+    })
+    if not args.warm_l2:
+        os.environ["CACHE_L2_PATH"] = ""
+
+    import weaviate
+    from bench.fake_weaviate import FakeWeaviateClient, FakeWeaviateConfig, generate_catalog
+
+    weaviate_config = FakeWeaviateConfig(args.weaviate_latency, args.weaviate_jitter, args.error_rate)
+    catalog, _ = generate_catalog(parts=args.parts)
+    fake_client = FakeWeaviateClient(catalog, weaviate_config)
+    weaviate.connect_to_weaviate_cloud = lambda *a, **kw: fake_client
+
+    from main import app
+    return app, llm_config, weaviate_config
+
+
+async def wait_ready(client, url, timeout=60.0):
+    """Dependencies start in the background; wait for /ready before measuring"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get(url + "/ready")
+        if response.status_code == 200:
+            return
+        await asyncio.sleep(0.1)
+    sys.exit(f"App not ready after {timeout:.0f}s: {response.json()}")
+
+
+async def replay(client, url, turns, rps, duration, poisson, stream):
+    """Open-loop load: requests start on schedule regardless of completions"""
+    results = []
+    total = int(rps * duration)
+    started = time.monotonic()
+    path = "/api/v1/chat/stream" if stream else "/api/v1/chat"
+
+    async def one(turn):
+        payload = {"message": turn["message"],
+                   "conversation_history": turn.get("conversation_history", []),
+                   "user_id": turn.get("user_id", "user123")}
+        sent = time.monotonic()
+        record = {"message": turn["message"], "tools": [], "status": None}
+        try:
+            response = await client.post(url + path, json=payload, timeout=120)
+            record["status"] = response.status_code
+            if stream:
+                events = [line for line in response.text.split("\n") if line.startswith("data: ")]
+                done = [json.loads(e[6:]) for e in events if "tools_used" in e]
+                record["tools"] = done[-1]["tools_used"] if done else []
+            elif response.status_code == 200:
+                record["tools"] = response.json().get("tools_used", [])
+        except Exception as e:
+            record["status"] = f"exception: {type(e).__name__}"
+        record["latency"] = time.monotonic() - sent
+        results.append(record)
+
+    tasks = []
+    next_at = started
+    for i in range(total):
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.ensure_future(one(turns[i % len(turns)])))
+        next_at += random.expovariate(rps) if poisson else 1 / rps
+
+    await asyncio.gather(*tasks)
+    return results, time.monotonic() - started
+
+
+def build_report(results, elapsed, llm_config=None, weaviate_config=None):
+    ok = [r for r in results if r["status"] == 200]
+    per_tool = defaultdict(list)
+    for r in ok:
+        for tool in r["tools"] or ["(no tool)"]:
+            per_tool[tool].append(r["latency"])
+
+    report = {
+        "requests": len(results),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+        "error_rate": 1 - len(ok) / len(results) if results else 0.0,
+        "statuses": {str(k): sum(1 for r in results if r["status"] == k)
+                     for k in {r["status"] for r in results}},
+        "end_to_end": percentiles([r["latency"] for r in ok]),
+        "per_tool": {tool: percentiles(samples) for tool, samples in sorted(per_tool.items())},
+        "stages": {},
+    }
+
+    # Stage service times as observed by the stand-ins
+    stage_samples = defaultdict(list)
+    if llm_config:
+        for kind, seconds in llm_config.timings:
+            stage_samples[f"llm.{kind}"].append(seconds)
+    if weaviate_config:
+        for name, seconds in weaviate_config.timings:
+            stage_samples[f"weaviate.{name}"].append(seconds)
+    report["stages"] = {stage: percentiles(samples) for stage, samples in sorted(stage_samples.items())}
+    return report
+
+
+def print_report(report):
+    print(f"\n{report['requests']} requests in {report['elapsed_s']:.1f}s | "
+          f"{report['throughput_rps']:.1f} req/s ok | error rate {report['error_rate']:.1%}")
+    print(f"statuses: {report['statuses']}")
+
+    def row(name, stats):
+        if not stats.get("count"):
+            return
+        print(f"  {name:<36} n={stats['count']:<6} p50={stats['p50_ms']:8.1f}ms "
+              f"p95={stats['p95_ms']:8.1f}ms p99={stats['p99_ms']:8.1f}ms")
+
+    print("end to end:")
+    row("/api/v1/chat", report["end_to_end"])
+    print("per tool:")
+    for tool, stats in report["per_tool"].items():
+        row(tool, stats)
+    if report["stages"]:
+        print("per stage (stand-in service time):")
+        for stage, stats in report["stages"].items():
+            row(stage, stats)
+
+
+async def run(args):
+    turns = load_workload(args.workload)
+    if not turns:
+        sys.exit(f"Workload {args.workload} is empty")
+
+    import httpx
+
+    if args.url:
+        async with httpx.AsyncClient() as client:
+            results, elapsed = await replay(client, args.url.rstrip("/"), turns, args.rps,
+                                            args.duration, args.poisson, args.stream)
+        return build_report(results, elapsed)
+
+    app, llm_config, weaviate_config = build_local_app(args)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport) as client:
+            await wait_ready(client, "http://bench")
+            if args.warmup:
+                await replay(client, "http://bench", turns, args.rps, args.warmup, False, args.stream)
+                llm_config.timings.clear()
+                weaviate_config.timings.clear()
+            results, elapsed = await replay(client, "http://bench", turns, args.rps,
+                                            args.duration, args.poisson, args.stream)
+    return build_report(results, elapsed, llm_config, weaviate_config)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chat endpoint load benchmark")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD, help="JSONL conversation turns")
+    parser.add_argument("--rps", type=float, default=10.0, help="Target requests per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load")
+    parser.add_argument("--warmup", type=float, default=0.0, help="Seconds of unmeasured warm-up load")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a fixed interval")
+    parser.add_argument("--stream", action="store_true", help="Use /api/v1/chat/stream")
+    parser.add_argument("--url", default=None, help="Benchmark a running server instead of the local stand-ins")
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--llm-jitter", type=float, default=0.15)
+    parser.add_argument("--weaviate-latency", type=float, default=0.05)
+    parser.add_argument("--weaviate-jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Injected failure rate for both stand-ins")
+    parser.add_argument("--parts", type=int, default=2000, help="Synthetic catalog size")
+    parser.add_argument("--warm-l2", action="store_true", help="Keep the on-disk L2 cache enabled")
+    parser.add_argument("--report", default=None, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Recall@k and latency of the embedded vector engine.
+
+Synthetic mode (no services needed) builds clustered random vectors, writes
+a snapshot and compares the exact mmap scan and IVF at several nprobe values
+against brute-force ground truth:
+
+    python -m bench.vector_recall --rows 200000 --dims 384 --queries 200
+
+Remote mode compares the current snapshot (VECTOR_SNAPSHOT_DIR, local query
+embeddings) against Weaviate near_text, treating near_text as the reference:
+
+    python -m bench.vector_recall --remote --collection Parts --workload bench/workloads/sample.jsonl
+"""
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+
+from bench.run import DEFAULT_WORKLOAD, load_workload, percentiles
+from src.db.keywordIndex import document_key
+from src.db.vectorEngine import Snapshot, VectorEngine, write_snapshot
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - started
+
+
+def _row(name, recall, latencies):
+    stats = percentiles(latencies)
+    print(f"  {name:<24} recall@k={recall:6.3f}  p50={stats['p50_ms']:8.3f}ms  p95={stats['p95_ms']:8.3f}ms")
+
+
+def synthetic(args):
+    rng = np.random.default_rng(args.seed)
+    centers = rng.normal(size=(max(1, args.rows // 500), args.dims)).astype(np.float32)
+    vectors = centers[rng.integers(len(centers), size=args.rows)] + \
+        0.35 * rng.normal(size=(args.rows, args.dims)).astype(np.float32)
+    rows = [{"partId": f"PS{i}"} for i in range(args.rows)]
+    root = tempfile.mkdtemp()
+    print(f"Writing snapshot: {args.rows} x {args.dims} (IVF from {args.ivf_min_rows} rows)")
+    _, build_seconds = _timed(lambda: write_snapshot(root, {"Parts": (vectors, rows)},
+                                                     ivf_min_rows=args.ivf_min_rows))
+    print(f"  built in {build_seconds:.1f}s")
+    with open(f"{root}/CURRENT") as f:
+        collection = Snapshot(f"{root}/{f.read().strip()}").collections["Parts"]
+
+    queries = vectors[rng.integers(args.rows, size=args.queries)] + \
+        0.2 * rng.normal(size=(args.queries, args.dims)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    truth = [set(np.argsort(-(normalized @ q))[:args.k]) for q in queries]
+
+    def evaluate(nprobe):
+        hits, latencies = 0, []
+        for query, expected in zip(queries, truth):
+            results, seconds = _timed(lambda: collection.search(query, args.k, nprobe=nprobe))
+            latencies.append(seconds)
+            hits += len(expected & {int(props["partId"][2:]) for _, props in results})
+        return hits / (len(queries) * args.k), latencies
+
+    print(f"{args.queries} queries, k={args.k}:")
+    if collection.lists is None:
+        _row("exact scan", *evaluate(None))
+        return
+    for nprobe in args.nprobe:
+        _row(f"ivf nprobe={nprobe}", *evaluate(nprobe))
+    _row("ivf all lists", *evaluate(len(collection.lists) - 1))
+
+
+def remote(args):
+    from src.db.vectorDB import VectorDB
+
+    vectordb = VectorDB()
+    if not vectordb.connect():
+        sys.exit("Weaviate is not reachable")
+    engine = VectorEngine()
+    if not engine.reload() or not engine.ready:
+        sys.exit("No usable snapshot (run python -m src.db.export_vectors) or local embedder")
+
+    queries = [turn["message"] for turn in load_workload(args.workload)][:args.queries]
+    collection = vectordb.client.collections.get(args.collection)
+    for query in queries:
+        engine.embedder.embed_query(query)  # measure search, not first-time model calls
+
+    hits, local_latencies, remote_latencies = 0, [], []
+    for query in queries:
+        local, seconds = _timed(lambda: engine.search(args.collection, query, args.k))
+        local_latencies.append(seconds)
+        response, seconds = _timed(lambda: collection.query.near_text(query=query, limit=args.k))
+        remote_latencies.append(seconds)
+        expected = {document_key(args.collection, obj.properties) for obj in response.objects}
+        hits += len(expected & {document_key(args.collection, props) for _, props in local or []})
+
+    print(f"{len(queries)} queries against {args.collection}, k={args.k} (reference: near_text):")
+    _row("embedded", hits / (len(queries) * args.k), local_latencies)
+    _row("weaviate near_text", 1.0, remote_latencies)
+    vectordb.client.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Embedded vector engine recall/latency benchmark")
+    parser.add_argument("--remote", action="store_true", help="Compare against Weaviate near_text")
+    parser.add_argument("--collection", default="Parts")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD, help="Queries for --remote (JSONL turns)")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dims", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ivf-min-rows", type=int, default=50000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+    if args.remote:
+        remote(args)
+    else:
+        synthetic(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,67 @@
 import json
+import asyncio
+from typing import Optional
+from contextlib import asynccontextmanager
 from pydantic import BaseModel
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 
-from src.services.agent_runner import handle_tool_call
-from src.services.llm import LLM
+from src.services.agent_runner import handle_tool_calls, run_tool_call, scope_to_user, order_agent, trouble_agent
+from src.services.llm import get_llm
 from src.agents.criticAgent import CriticAgent
+from src.services.cache import cache_store
+from src.services.breaker import breaker_stats
+from src.services.router import default_router
+from src.services.speculation import Speculator
+from src.services.admission import AdmissionController, AdmissionRejected, client_key, request_class
+from src.services.metrics import STAGE_SECONDS, register_collectors, registry, sample_lines, start_trace, timed
+from src.services.startup import Startup
+from src.db.db_init import orderdb, vectordb
+from src.db.orderDB import decode_cursor
 
-app = FastAPI()
+startup = Startup()
+
+
+async def init_llm():
+    get_llm()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Bring dependencies up in the background; the worker serves right away"""
+    loop = asyncio.get_running_loop()
+
+    # Periodic TTL expiry for the shared cache
+    cache_store.start_sweeper()
+
+    def start_local_indexes():
+        # Parts catalog and BM25 indexes load from Weaviate, then stay fresh
+        startup.track(loop.create_task(vectordb.catalog.keep_fresh(vectordb.client)))
+        startup.track(loop.create_task(vectordb.keywords.keep_fresh(vectordb.client)))
+
+    startup.start("llm", init_llm, retry=False)
+    startup.start("orderdb", orderdb.init)
+    startup.start("weaviate", vectordb.connect, then=start_local_indexes)
+
+    # Precomputed troubleshooting answers: served at once, rebuilt by the writer worker once search is up
+    startup.track(loop.create_task(trouble_agent.keep_precomputed(
+        can_refresh=lambda: vectordb.client is not None or vectordb._engine_ready())))
+
+    # Embedded vector search: map the latest snapshot and watch for new ones
+    if vectordb.engine:
+        startup.track(loop.create_task(vectordb.engine.keep_fresh()))
+
+    yield
+
+    await startup.shutdown()
+    cache_store.stop_sweeper()
+    await orderdb.close()
+    vectordb.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS setup
 app.add_middleware(
@@ -18,20 +72,148 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-llm = LLM()
+# Initialize services (clients connect lazily, see lifespan)
 critic = CriticAgent()
+fast_router = default_router()
+# Predicted retrieval started alongside LLM tool selection (SPECULATIVE_RETRIEVAL=1)
+speculator = Speculator(run_tool_call)
+# Per-class bounded queues in front of the chat pipeline (orders first)
+admission = AdmissionController()
 
 
 class ChatRequest(BaseModel):
     message: str
     user_id: str = "user123"
     conversation_history: list = []
+    # Return per-stage timings with the response
+    trace: bool = False
 
 
 class ChatResponse(BaseModel):
     response: str
     tools_used: list = []
+    trace: Optional[list] = None
+
+
+def cache_metrics():
+    namespaces = cache_store.get_stats()["namespaces"]
+    lines = []
+    for stat in ("hits", "misses", "l2_hits", "stale_hits", "evictions", "expirations"):
+        lines += sample_lines(f"cache_{stat}_total", f"Cache {stat} per namespace",
+                              [({"namespace": ns}, stats[stat]) for ns, stats in namespaces.items()],
+                              kind="counter")
+    lines += sample_lines("cache_bytes", "Approximate bytes held per namespace",
+                          [({"namespace": ns}, stats["bytes"]) for ns, stats in namespaces.items()])
+    return lines
+
+
+def llm_metrics():
+    stats = get_llm().metrics.get_stats()
+    lines = []
+    for stat in ("calls", "errors", "prompt_tokens", "completion_tokens",
+                 "cached_prompt_tokens", "tokens_saved"):
+        lines += sample_lines(f"llm_{stat}_total", f"LLM {stat.replace('_', ' ')}",
+                              [({}, stats[stat])], kind="counter")
+    lines += sample_lines("llm_in_flight", "LLM calls in flight", [({}, stats["in_flight"])])
+    return lines
+
+
+def router_metrics():
+    stats = fast_router.get_stats()
+    return sample_lines("fast_router_hits_total", "Requests answered by a fast-path rule",
+                        [({"rule": rule}, hits) for rule, hits in stats["rules"].items()],
+                        kind="counter") + \
+        sample_lines("fast_router_misses_total", "Requests sent to LLM tool selection",
+                     [({}, stats["misses"])], kind="counter")
+
+
+def breaker_metrics():
+    breakers = breaker_stats()
+    states = ("closed", "half_open", "open")
+    return sample_lines("circuit_breaker_state", "Breaker state (0 closed, 1 half-open, 2 open)",
+                        [({"dependency": name}, states.index(stats["state"]))
+                         for name, stats in breakers.items()]) + \
+        sample_lines("circuit_breaker_rejected_total", "Calls failed fast by an open breaker",
+                     [({"dependency": name}, stats["rejected"]) for name, stats in breakers.items()],
+                     kind="counter")
+
+
+def speculation_metrics():
+    tools = speculator.get_stats()["tools"]
+    return sample_lines("speculation_total", "Speculative retrievals by outcome",
+                        [({"tool": tool, "outcome": outcome}, count)
+                         for tool, counts in tools.items() for outcome, count in counts.items()],
+                        kind="counter")
+
+
+def admission_metrics():
+    classes = admission.get_stats()["classes"]
+    lines = sample_lines("admission_queue_depth", "Chat requests waiting per class",
+                         [({"class": name}, stats["queued_now"]) for name, stats in classes.items()])
+    lines += sample_lines("admission_in_flight", "Chat requests being processed",
+                          [({}, admission.in_flight)])
+    for reason in ("queue_full", "over_budget", "user_limit", "expired"):
+        lines += sample_lines(f"admission_rejected_{reason}_total", f"Chat requests shed ({reason})",
+                              [({"class": name}, stats[reason]) for name, stats in classes.items()],
+                              kind="counter")
+    return lines
+
+
+register_collectors(cache_metrics, llm_metrics, router_metrics, breaker_metrics,
+                    speculation_metrics, admission_metrics)
+
+
+def build_conversation(request: ChatRequest) -> list:
+    """Full history plus the new turn; the LLM client fits it to its token budget"""
+    history = request.conversation_history or []
+    return history + [{"role": "user", "content": request.message}]
+
+
+def tool_result_text(tool_result) -> str:
+    """Text handed to the CriticAgent for a successful tool result"""
+    # For structured responses (like troubleshooting), pass the message directly
+    if isinstance(tool_result, dict) and "message" in tool_result:
+        return tool_result["message"]
+    return str(tool_result)
+
+
+NO_RESULTS_MESSAGE = "No results found. Please try a different search."
+
+
+def merge_tool_results(results: list):
+    """Combine (tool_name, result) pairs for a single critic pass.
+
+    Returns (text, ok): ok is False when no tool succeeded, in which case
+    text is the message to show as-is.
+    """
+    succeeded = [(name, result) for name, result in results
+                 if result and not result.get('error')]
+    failed = [(name, result) for name, result in results
+              if not result or result.get('error')]
+
+    if not succeeded:
+        result = failed[0][1] if failed else None
+        return (result or {}).get('message', NO_RESULTS_MESSAGE), False
+
+    if len(results) == 1:
+        return tool_result_text(succeeded[0][1]), True
+
+    sections = [f"RESULT FOR {name}:\n{tool_result_text(result)}"
+                for name, result in succeeded]
+    sections += [f"RESULT FOR {name}: {(result or {}).get('message', 'not available right now')}"
+                 for name, result in failed]
+    return "\n\n".join(sections), True
+
+
+def parse_tool_calls(message) -> list:
+    """(name, arguments) for every tool call in an LLM message"""
+    return [(tool_call.function.name, json.loads(tool_call.function.arguments))
+            for tool_call in message.tool_calls]
+
+
+def sse_event(event: str, data) -> str:
+    """Encode a single Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 
 @app.get("/")
@@ -39,46 +221,157 @@ def read_root():
     return {"status": "running"}
 
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 503 until the required dependencies are up, with per-component timing"""
+    stats = startup.get_stats()
+    stats["indexes"] = {
+        "catalog": vectordb.catalog.ready,
+        "keywords": vectordb.keywords.ready,
+        "vectors": vectordb.engine.ready if vectordb.engine else None,
+    }
+    # Open breakers degrade answers (stale cache, BM25 only) but don't make the worker unready
+    stats["breakers"] = breaker_stats()
+    return JSONResponse(stats, status_code=200 if stats["ready"] else 503)
+
+
+@app.get("/api/v1/cache/stats")
+def cache_stats():
+    """Shared cache usage, broken down per namespace"""
+    return cache_store.get_stats()
+
+
+@app.get("/api/v1/llm/stats")
+def llm_stats():
+    """Shared LLM client metrics (queue wait, latency, tokens, prompt budget)"""
+    llm = get_llm()
+    return {**llm.metrics.get_stats(), "prompt_budget": llm.budget.get_stats()}
+
+
+@app.get("/api/v1/breakers/stats")
+def breakers_stats():
+    """Circuit breaker state per dependency (weaviate, llm)"""
+    return breaker_stats()
+
+
+@app.get("/api/v1/router/stats")
+def router_stats():
+    """Fast-path router hit rate (requests answered without LLM tool selection)"""
+    return fast_router.get_stats()
+
+
+@app.get("/api/v1/admission/stats")
+def admission_stats():
+    """Chat admission control: in-flight requests, queues and shed requests per class"""
+    return admission.get_stats()
+
+
+@app.get("/api/v1/speculation/stats")
+def speculation_stats():
+    """Speculative retrieval accuracy and latency saved"""
+    return speculator.get_stats()
+
+
+@app.get("/api/v1/catalog/stats")
+def catalog_stats():
+    """Local parts catalog index status"""
+    return vectordb.catalog.get_stats()
+
+
+@app.get("/api/v1/keywords/stats")
+def keyword_stats():
+    """Local BM25 keyword index status and how often it answered on its own"""
+    return vectordb.keywords.get_stats()
+
+
+@app.get("/api/v1/answers/stats")
+def answer_store_stats():
+    """Precomputed troubleshooting answers and how often they were served"""
+    return trouble_agent.answers.get_stats()
+
+
+@app.get("/api/v1/vectors/stats")
+def vector_engine_stats():
+    """Embedded vector snapshot status (VECTOR_ENGINE=embedded)"""
+    return vectordb.engine.get_stats() if vectordb.engine else {"ready": False, "engine": "remote"}
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition: stage/DB latency histograms plus cache, LLM and router counters"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+async def admit(request: ChatRequest, http_request: Request):
+    """Admission ticket for a chat request; sheds it with 429 + Retry-After under overload"""
+    # Not user_id: it is client-supplied (the UI sends one fixed value)
+    peer = http_request.client.host if http_request.client else "unknown"
+    client = client_key(peer, http_request.headers.get("x-forwarded-for"))
+    try:
+        return await admission.acquire(request_class(request.message), client)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=f"Server busy: {e.reason}",
+                            headers={"Retry-After": str(e.retry_after)})
+
+
 @app.post("/api/v1/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Main chat endpoint"""
+    ticket = await admit(request, http_request)
     try:
-        # Prepare conversation with recent context
-        recent_history = request.conversation_history[-2:
-                                                      ] if request.conversation_history else []
-        conversation = recent_history + \
-            [{"role": "user", "content": request.message}]
-
-        # Get LLM response
-        response = await llm.ask_llm(conversation)
+        return await answer_chat(request)
+    finally:
+        admission.release(ticket)
+
+
+async def answer_chat(request: ChatRequest) -> ChatResponse:
+    """Fast path or LLM tool selection, tool calls, then rendering"""
+    speculation = None
+    try:
+        spans = start_trace() if request.trace else None
+        conversation = build_conversation(request)
         tools_used = []
         final_response = ""
 
-        # Handle tool calls
-        if response.choices and response.choices[0].message.tool_calls:
-            tool_call = response.choices[0].message.tool_calls[0]
-            tool_name = tool_call.function.name
-            tool_args = json.loads(tool_call.function.arguments)
-            tools_used.append(tool_name)
+        # Obvious intents skip the LLM tool-selection round trip
+        with timed(STAGE_SECONDS, stage="fast_router"):
+            calls = fast_router.route(request.message)
+        if calls is None:
+            speculation = speculator.start(request.message)
+            # Get LLM response
+            with timed(STAGE_SECONDS, stage="llm_tool_selection"):
+                response = await get_llm().ask_llm(conversation)
+            if response.choices and response.choices[0].message.tool_calls:
+                calls = parse_tool_calls(response.choices[0].message)
+            else:
+                final_response = response.choices[0].message.content if response.choices else "I couldn't understand your request."
+                if speculation:
+                    speculation.claim([])
+
+        # Handle tool calls - every call selected, concurrently
+        if calls:
+            tools_used = [tool_name for tool_name, _ in calls]
+            scope_to_user(calls, request.user_id)
 
-            # Execute tool
-            tool_result = await handle_tool_call(tool_name, tool_args)
+            results = await handle_tool_calls(calls, speculation=speculation)
 
-            if tool_result and not tool_result.get('error'):
-                # For structured responses (like troubleshooting), pass the message directly
-                if isinstance(tool_result, dict) and "message" in tool_result:
-                    final_response = await critic.run(tool_result["message"])
+            merged_text, ok = merge_tool_results(results)
+            if ok:
+                # Templates first; the LLM critic only when needed or opted in
+                with timed(STAGE_SECONDS, stage="render"):
+                    rendered, needs_llm = critic.render(results)
+                if needs_llm:
+                    with timed(STAGE_SECONDS, stage="critic"):
+                        final_response = await critic.run(rendered or merged_text)
                 else:
-                    final_response = await critic.run(str(tool_result))
+                    final_response = rendered
             else:
-                final_response = tool_result.get(
-                    'message', "No results found. Please try a different search.")
-        else:
-            final_response = response.choices[0].message.content if response.choices else "I couldn't understand your request."
+                final_response = merged_text
 
         return ChatResponse(
             response=final_response or "Please try rephrasing your request.",
-            tools_used=tools_used
+            tools_used=tools_used,
+            trace=spans
         )
 
     except json.JSONDecodeError:
@@ -87,3 +380,130 @@ async def chat(request: ChatRequest):
         print(f"Chat error: {e}")
         raise HTTPException(
             status_code=500, detail="Service temporarily unavailable")
+    finally:
+        if speculation:
+            speculation.discard()
+
+
+async def chat_events(request: ChatRequest):
+    """Event stream for /api/v1/chat/stream.
+
+    Emits: tool_selected, tool_result, token (critic output or direct LLM
+    reply), then done. Failures are reported as an error event because the
+    HTTP status has already been sent.
+    """
+    speculation = None
+    try:
+        spans = start_trace() if request.trace else None
+        conversation = build_conversation(request)
+        tools_used = []
+        tool_calls = []
+
+        with timed(STAGE_SECONDS, stage="fast_router"):
+            routed = fast_router.route(request.message)
+        if routed:
+            tool_calls = [{"name": name, "arguments": arguments}
+                          for name, arguments in routed]
+        else:
+            speculation = speculator.start(request.message)
+            # Includes time spent forwarding plain-answer tokens to the client
+            with timed(STAGE_SECONDS, stage="llm_tool_selection"):
+                async for event in get_llm().stream_llm(conversation):
+                    if event["type"] == "token":
+                        # Plain answer (no tool) - forward as it arrives
+                        yield sse_event("token", {"content": event["content"]})
+                    elif event["type"] == "tool_calls":
+                        tool_calls = event["tool_calls"]
+
+        claimed = speculation.claim([(call["name"], call["arguments"]) for call in tool_calls]) \
+            if speculation else None
+        if tool_calls:
+            scope_to_user([(call["name"], call["arguments"]) for call in tool_calls], request.user_id)
+            tasks = {}
+            for index, tool_call in enumerate(tool_calls):
+                tools_used.append(tool_call["name"])
+                yield sse_event("tool_selected", {"tool": tool_call["name"], "arguments": tool_call["arguments"]})
+                if index == claimed:
+                    task = asyncio.ensure_future(speculation.result())
+                else:
+                    task = asyncio.ensure_future(
+                        run_tool_call(tool_call["name"], tool_call["arguments"]))
+                tasks[task] = index
+
+            # Report each tool as soon as it returns
+            results = [None] * len(tool_calls)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = tasks[task]
+                    tool_result = task.result()
+                    results[index] = (tool_calls[index]["name"], tool_result)
+                    failed = not tool_result or tool_result.get('error')
+                    yield sse_event("tool_result", {"tool": tool_calls[index]["name"], "ok": not failed})
+
+            merged_text, ok = merge_tool_results(results)
+            with timed(STAGE_SECONDS, stage="render"):
+                rendered, needs_llm = critic.render(results) if ok else (None, False)
+            if ok and not needs_llm:
+                yield sse_event("token", {"content": rendered})
+            elif ok:
+                with timed(STAGE_SECONDS, stage="critic"):
+                    async for token in critic.stream(rendered or merged_text):
+                        yield sse_event("token", {"content": token})
+            else:
+                yield sse_event("token", {"content": merged_text})
+
+        done = {"tools_used": tools_used}
+        if spans is not None:
+            done["trace"] = spans
+        yield sse_event("done", done)
+
+    except json.JSONDecodeError:
+        yield sse_event("error", {"detail": "Invalid tool arguments"})
+    except Exception as e:
+        print(f"Chat stream error: {e}")
+        yield sse_event("error", {"detail": "Service temporarily unavailable"})
+    finally:
+        if speculation:
+            speculation.discard()
+
+
+async def admitted_events(request: ChatRequest, ticket):
+    """chat_events holding its admission slot until the stream ends (or fails)"""
+    try:
+        async for event in chat_events(request):
+            yield event
+    finally:
+        admission.release(ticket)
+
+
+@app.post("/api/v1/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """Streaming chat endpoint (Server-Sent Events)"""
+    # Admitted before the response starts so overload can still answer 429
+    ticket = await admit(request, http_request)
+    return StreamingResponse(
+        admitted_events(request, ticket),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also runs when the stream was never iterated (client gone before the first chunk)
+        background=BackgroundTask(admission.release, ticket)
+    )
+
+
+@app.get("/api/v1/orders")
+async def list_orders(user_id: str, limit: int = Query(10, ge=1, le=50),
+                      cursor: str = None, status: str = None):
+    """Paginated order history for a user (pass next_cursor to get older orders)"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    try:
+        async with orderdb.session_scope():
+            return await order_agent.order_history(user_id, limit, cursor, status)
+    except Exception as e:
+        print(f"Order history error: {e}")
+        raise HTTPException(status_code=503, detail="Order history temporarily unavailable")
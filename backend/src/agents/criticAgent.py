@@ -1,27 +1,120 @@
-from src.services.llm import LLM
+import os
+import asyncio
+from src.services.llm import ERROR_MESSAGE, get_llm
 from src.services.cache import SimpleCache
+from src.services.canonical import normalize_text
+from src.services.singleflight import SingleFlight
+from src.services.renderer import render_troubleshooting_text, render_tool_results
+
+# Send template-rendered results through the LLM for a friendlier rewrite
+CRITIC_LLM_POLISH = os.getenv("CRITIC_LLM_POLISH", "0") == "1"
 
 
 class CriticAgent:
     def __init__(self):
-        self.llm = LLM()
-        self.cache = SimpleCache()
+        self.cache = SimpleCache(namespace="critic", persistent=True)
+        self.flights = SingleFlight()
+        self.polish = CRITIC_LLM_POLISH
+        self._refreshes = set()
+
+    @property
+    def llm(self):
+        # Resolved per use so constructing the agent never builds the client
+        return get_llm()
+
+    def render(self, results: list):
+        """Template rendering of (tool_name, result) pairs.
+
+        Returns (text, needs_llm): needs_llm is True when a result has no
+        template or LLM polish is enabled, in which case text is None or the
+        rendered draft to polish.
+        """
+        rendered = render_tool_results(results)
+        return rendered, rendered is None or self.polish
 
     async def run(self, response_text: str, instructions: str = "") -> str:
         """Format responses to be friendly and helpful with caching"""
 
-        cache_key = self.cache._generate_key(response_text, instructions)
+        cache_key = self.cache._generate_key(normalize_text(response_text), normalize_text(instructions))
 
-        cached_response = self.cache.get(cache_key)
+        cached_response = await self.cache.get_async(cache_key) or self._get_stale(response_text, cache_key)
         if cached_response:
             return cached_response
 
         # Check if response is a troubleshooting response that needs special formatting
         if self._is_troubleshooting_response(response_text):
             formatted_response = await self._format_troubleshooting_response(response_text)
-            self.cache.set(cache_key, formatted_response)
+            await self.cache.set_async(cache_key, formatted_response)
             return formatted_response
 
+        # Identical in-flight formatting requests share one LLM call
+        return await self.flights.do(cache_key, lambda: self._format_with_llm(response_text, cache_key))
+
+    def _get_stale(self, response_text: str, cache_key: str):
+        """Expired formatting while the LLM breaker is open, refreshed in the background"""
+        if self.llm.breaker.closed:
+            return None
+        stale = self.cache.get_stale(cache_key)
+        if stale:
+            task = asyncio.get_running_loop().create_task(
+                self.flights.do(cache_key, lambda: self._format_with_llm(response_text, cache_key)))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+        return stale
+
+    async def _format_with_llm(self, response_text: str, cache_key: str) -> str:
+        messages = self._build_messages(response_text)
+
+        try:
+            result = await self.llm.ask_llm(messages)
+            if hasattr(result, 'choices') and result.choices:
+                formatted_response = result.choices[0].message.content
+                if formatted_response != ERROR_MESSAGE:
+                    await self.cache.set_async(cache_key, formatted_response)
+                    return formatted_response
+        except Exception as e:
+            print(f"Critic Agent Error: {e}")
+
+        return response_text
+
+    async def stream(self, response_text: str, instructions: str = ""):
+        """Stream the formatted response token by token (same caching as run)"""
+
+        cache_key = self.cache._generate_key(normalize_text(response_text), normalize_text(instructions))
+
+        cached_response = await self.cache.get_async(cache_key) or self._get_stale(response_text, cache_key)
+        if cached_response:
+            yield cached_response
+            return
+
+        if self._is_troubleshooting_response(response_text):
+            formatted_response = await self._format_troubleshooting_response(response_text)
+            await self.cache.set_async(cache_key, formatted_response)
+            yield formatted_response
+            return
+
+        tokens, failed = [], False
+        try:
+            async for event in self.llm.stream_llm(self._build_messages(response_text)):
+                if event["type"] != "token":
+                    continue
+                if event["content"] == ERROR_MESSAGE:
+                    # Never cache an outage; show the unpolished text instead
+                    failed = True
+                    break
+                tokens.append(event["content"])
+                yield event["content"]
+        except Exception as e:
+            print(f"Critic Agent Stream Error: {e}")
+            failed = True
+
+        if not tokens:
+            yield response_text
+        elif not failed:
+            await self.cache.set_async(cache_key, "".join(tokens))
+
+    def _build_messages(self, response_text: str) -> list:
+        """Build the formatting prompt for a raw tool result"""
         prompt = {
             "role": "system",
             "content": (
@@ -56,19 +149,7 @@ class CriticAgent:
             )
         }
 
-        messages = [prompt, {"role": "user",
-                             "content": f"{response_text}"}]
-
-        try:
-            result = await self.llm.ask_llm(messages)
-            if hasattr(result, 'choices') and result.choices:
-                formatted_response = result.choices[0].message.content
-                self.cache.set(cache_key, formatted_response)
-                return formatted_response
-        except Exception as e:
-            print(f"Critic Agent Error: {e}")
-
-        return response_text
+        return [prompt, {"role": "user", "content": f"{response_text}"}]
 
     def _is_troubleshooting_response(self, response_text: str) -> bool:
         """Check if response is a troubleshooting response from TroubleAgent"""
@@ -131,48 +212,4 @@ class CriticAgent:
 
     def _fallback_format_troubleshooting(self, response_text: str) -> str:
         """Fallback formatting if LLM fails"""
-        lines = response_text.split('\n')
-        formatted_lines = []
-
-        current_section = ""
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            if line.startswith("TROUBLESHOOTING_ISSUE:"):
-                issue = line.replace("TROUBLESHOOTING_ISSUE:", "").strip()
-                formatted_lines.append(
-                    f"I can help you troubleshoot: **{issue}**\n")
-
-            elif line.startswith("POTENTIAL_STEPS:"):
-                formatted_lines.append(
-                    "## 🔧 Let's try these troubleshooting steps:")
-                current_section = "steps"
-
-            elif line.startswith("REPAIR_GUIDES:"):
-                formatted_lines.append("\n## 📋 Repair Guides:")
-                current_section = "guides"
-
-            elif line.startswith("RECOMMENDED_PARTS:"):
-                formatted_lines.append("\n## 🔧 Parts You Might Need:")
-                current_section = "parts"
-
-            elif line.startswith("HELPFUL_RESOURCES:"):
-                formatted_lines.append("\n## 📚 Helpful Resources:")
-                current_section = "resources"
-
-            else:
-                # Format content based on current section
-                if current_section == "steps" and line.startswith(("1.", "2.", "3.", "4.", "5.")):
-                    formatted_lines.append(f"**{line}**")
-                elif line.startswith("-"):
-                    formatted_lines.append(line)
-                else:
-                    formatted_lines.append(line)
-
-        formatted_lines.append(
-            "\n💡 **Need more help?** Feel free to ask about specific parts or if you need clarification on any of these steps!")
-
-        return "\n".join(formatted_lines)
+        return render_troubleshooting_text(response_text)
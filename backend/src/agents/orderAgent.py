@@ -1,6 +1,8 @@
 import uuid
 from datetime import datetime
 
+MAX_ORDERS_PAGE = 50
+
 
 class OrderAgent:
     def __init__(self, orderdb):
@@ -12,19 +14,22 @@ class OrderAgent:
         handlers = {
             "place_order": self._place_order,
             "check_order_status": self._check_status,
-            "cancel_order": self._cancel_order
+            "cancel_order": self._cancel_order,
+            "list_orders": self._list_orders
         }
 
         handler = handlers.get(function_name)
         if not handler:
             return {"message": "Unknown order function"}
 
-        return handler(data)
+        # One pooled session for the whole operation (e.g. lookup + update)
+        async with self.orderdb.session_scope():
+            return await handler(data)
 
-    def _place_order(self, data):
+    async def _place_order(self, data):
         """Create a new order"""
         try:
-            order = self.orderdb.create_order(
+            order = await self.orderdb.create_order(
                 user_id=data["user_id"],
                 items=data["items"],
                 total_amount=data["total_amount"],
@@ -40,34 +45,63 @@ class OrderAgent:
         except Exception as e:
             return {"message": f"Order failed: {str(e)}"}
 
-    def _check_status(self, data):
+    async def _check_status(self, data):
         """Check order status"""
         try:
-            order = self.orderdb.get_order_by_id(data["order_id"])
+            order = await self.orderdb.get_order_by_id(data["order_id"])
             if not order:
                 return {"message": "Order not found"}
 
-            return {
-                "order_id": order.order_id,
-                "status": order.status,
-                "total": order.total_amount,
-                "items": order.items,
-                "created": order.order_date.isoformat() if order.order_date else None
-            }
+            return self._order_summary(order)
         except Exception as e:
             return {"message": f"Status check failed: {str(e)}"}
 
-    def _cancel_order(self, data):
+    async def _list_orders(self, data):
+        """List a user's orders, one page at a time"""
+        try:
+            page = await self.order_history(
+                data["user_id"], data.get("limit"), data.get("cursor"), data.get("status"))
+            if not page["orders"]:
+                return {"message": "No orders found"}
+            return page
+        except Exception as e:
+            return {"message": f"Order history failed: {str(e)}"}
+
+    async def order_history(self, user_id: str, limit=None, cursor: str = None, status: str = None):
+        """One page of a user's order history; raises ValueError for a bad cursor"""
+        limit = min(int(limit or 10), MAX_ORDERS_PAGE)
+        orders, next_cursor = await self.orderdb.get_orders_by_user(
+            user_id,
+            limit=limit,
+            cursor=cursor,
+            status=status
+        )
+        return {
+            "user_id": user_id,
+            "orders": [self._order_summary(order) for order in orders],
+            "next_cursor": next_cursor
+        }
+
+    def _order_summary(self, order):
+        return {
+            "order_id": order.order_id,
+            "status": order.status,
+            "total": order.total_amount,
+            "items": order.items,
+            "created": order.order_date.isoformat() if order.order_date else None
+        }
+
+    async def _cancel_order(self, data):
         """Cancel an order"""
         try:
-            order = self.orderdb.get_order_by_id(data["order_id"])
+            order = await self.orderdb.get_order_by_id(data["order_id"])
             if not order:
                 return {"message": "Order not found"}
 
             if order.status == "shipped":
                 return {"message": "Cannot cancel shipped orders"}
 
-            self.orderdb.update_order_status(data["order_id"], "cancelled")
+            await self.orderdb.update_order_status(data["order_id"], "cancelled")
             return {"message": f"Order {data['order_id']} cancelled successfully"}
         except Exception as e:
             return {"message": f"Cancellation failed: {str(e)}"}
@@ -82,7 +116,7 @@ class OrderAgent:
         return self.orderdb.cancel_order(order_id)
 
     async def create_order(self, data):
-        return self.orderdb.create_order(
+        return await self.orderdb.create_order(
             user_id=data["user_id"],
             items=data["items"],
             total_amount=data["total_amount"]
@@ -1,6 +1,3 @@
-from src.services.llm import LLM
-
-
 class PartAgent:
     def __init__(self, vectordb):
         self.vectordb = vectordb
@@ -16,9 +13,9 @@ class PartAgent:
         }
         return {"message": messages.get(tool_name, "No results found.")}
 
-    def search_parts(self, query):
+    async def search_parts(self, query):
         """Search for parts with fallback to related parts"""
-        result = self.vectordb.search_parts(query)
+        result = await self.vectordb.search_parts(query)
         parts = result.get('data', {}).get(
             'Get', {}).get('Part', []) if result else []
 
@@ -33,8 +30,11 @@ class PartAgent:
 
         return {"message": f"No parts found for '{query}'. Try a different search term."}
 
-    def check_compatibility(self, model_list):
-        """Check compatibility between part ID and model number"""
+    async def check_compatibility(self, model_list, cursor=None):
+        """Check compatibility between part ID and model number.
+
+        A cursor asks for the next page of parts compatible with the model.
+        """
         words = model_list.split()
         part_id = None
         model_number = None
@@ -49,14 +49,14 @@ class PartAgent:
                 model_number = clean_word
 
         # If we have both part ID and model number, do specific compatibility check
-        if part_id and model_number:
-            result = self.vectordb.check_part_compatibility(
+        if part_id and model_number and not cursor:
+            result = await self.vectordb.check_part_compatibility(
                 part_id, model_number)
             if result:
                 return result
 
         # Fall back to finding parts for this model
-        return self.vectordb.find_compatible_parts(model_list)
+        return await self.vectordb.find_compatible_parts(model_list, cursor=cursor)
 
     async def run(self, function_name: str, data: dict):
         """Handle all part-related operations"""
@@ -64,7 +64,7 @@ class PartAgent:
             "search_parts": lambda: self.search_parts(data["query"]),
             "search_repairs": lambda: self.vectordb.search_repairs(data["query"], data.get("product")),
             "search_blogs": lambda: self.vectordb.search_blogs(data["query"]),
-            "check_compatibility": lambda: self.check_compatibility(data["modelList"]),
+            "check_compatibility": lambda: self.check_compatibility(data["modelList"], data.get("cursor")),
             "get_installation_steps": lambda: self.vectordb.get_part_by_id(data["part_id"])
         }
 
@@ -72,7 +72,7 @@ class PartAgent:
         if not handler:
             return {"message": "Unknown function"}
 
-        result = handler()
+        result = await handler()
 
         # Special handling for compatibility checks that return structured results
         if function_name == "check_compatibility" and isinstance(result, dict):
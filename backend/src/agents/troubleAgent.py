@@ -1,12 +1,40 @@
-from src.services.llm import LLM
+import os
+import asyncio
+from src.services.llm import get_llm
 from src.services.cache import SimpleCache
+from src.services.canonical import symptom_key
+from src.db.answerStore import AnswerStore
+
+# Shared deadline (seconds) for the parallel repairs/parts/blogs retrieval
+TROUBLESHOOT_DEADLINE = float(os.getenv("TROUBLESHOOT_DEADLINE", "6"))
+# Symptom x appliance queries whose answers are precomputed into the answer store
+PRECOMPUTE_SYMPTOMS = [s.strip() for s in os.getenv(
+    "PRECOMPUTE_SYMPTOMS", "not draining,not cleaning,noise,not filling").split(",") if s.strip()]
+PRECOMPUTE_APPLIANCES = [a.strip() for a in os.getenv(
+    "PRECOMPUTE_APPLIANCES", "dishwasher").split(",") if a.strip()]
+# Seconds before a precomputed answer is rebuilt by the writer worker (0: only the batch job writes it)
+PRECOMPUTE_REFRESH_INTERVAL = float(os.getenv("PRECOMPUTE_REFRESH_INTERVAL", "21600"))
+# Set on exactly one worker: it rebuilds stale answers, every other worker only reads the file
+ANSWER_STORE_WRITER = os.getenv("ANSWER_STORE_WRITER", "0") == "1"
+# How often workers check the store file for answers written elsewhere
+ANSWER_STORE_RELOAD_INTERVAL = float(os.getenv("ANSWER_STORE_RELOAD_INTERVAL", "60"))
+
+
+def precompute_queries(symptoms=None, appliances=None) -> list:
+    return [f"{appliance} {symptom}"
+            for appliance in appliances or PRECOMPUTE_APPLIANCES
+            for symptom in symptoms or PRECOMPUTE_SYMPTOMS]
 
 
 class TroubleAgent:
     def __init__(self, vectordb):
         self.vectordb = vectordb
-        self.llm = LLM()
-        self.cache = SimpleCache()
+        self.cache = SimpleCache(namespace="troubleshoot", persistent=True)
+        self.answers = AnswerStore()
+
+    @property
+    def llm(self):
+        return get_llm()
 
     async def run(self, function_name: str, data: dict):
         """Handle troubleshooting requests by providing steps and resources"""
@@ -16,35 +44,22 @@ class TroubleAgent:
             if not query:
                 return {"message": "No troubleshooting text provided"}
 
-            # Check cache first
-            cache_key = self.cache._generate_key("troubleshoot", query)
-        cached_response = self.cache.get(cache_key)
-        if cached_response:
-            return cached_response
-
-            # Search across all data sources
-            repairs_data = self.vectordb.search_repairs(query, limit=3)
-            parts_data = self.vectordb.search_parts(query, limit=5)
-            blogs_data = self.vectordb.search_blogs(query, limit=3)
-
-            # Extract relevant information
-            repairs = repairs_data.get('data', {}).get(
-                'Get', {}).get('Repair', []) if repairs_data else []
-            parts = parts_data.get('data', {}).get(
-                'Get', {}).get('Part', []) if parts_data else []
-            blogs = blogs_data.get('data', {}).get(
-                'Get', {}).get('Blog', []) if blogs_data else []
+            # Common symptoms are answered from the precomputed store
+            precomputed = self.answers.get(query)
+            if precomputed:
+                return self._with_issue(precomputed, query)
 
-            # If no data found, return helpful message
-            if not repairs and not parts and not blogs:
-                return {"message": f"No troubleshooting information found for: {query}. Try describing the problem differently or be more specific about the symptoms."}
+            # Check cache first; rephrasings of the same query share an entry
+            cache_key = self.cache._generate_key("troubleshoot", symptom_key(query))
+            cached_response = await self.cache.get_async(cache_key)
+            if cached_response:
+                return self._with_issue(cached_response, query)
 
-            # Generate troubleshooting guidance
-            troubleshooting_info = self._generate_troubleshooting_guidance(
-                query, repairs, parts, blogs)
+            troubleshooting_info, timed_out = await self.build(query)
 
-            # Cache the result
-            self.cache.set(cache_key, troubleshooting_info)
+            # Cache the result (partial results are not cached)
+            if not timed_out and "troubleshooting_data" in troubleshooting_info:
+                await self.cache.set_async(cache_key, troubleshooting_info)
 
             return troubleshooting_info
 
@@ -52,6 +67,112 @@ class TroubleAgent:
             print(f"Trouble Agent Error: {e}")
             return {"message": "Error processing troubleshooting request"}
 
+    async def build(self, query: str):
+        """Run the full pipeline (three searches + guidance) for a query.
+
+        Returns (answer, timed_out_sources); bypasses the store and cache.
+        """
+        # Search across all data sources concurrently
+        sources, timed_out = await self._search_sources(query)
+        repairs_data = sources.get("repairs")
+        parts_data = sources.get("parts")
+        blogs_data = sources.get("blogs")
+
+        # Extract relevant information
+        repairs = repairs_data.get('data', {}).get(
+            'Get', {}).get('Repair', []) if repairs_data else []
+        parts = parts_data.get('data', {}).get(
+            'Get', {}).get('Part', []) if parts_data else []
+        blogs = blogs_data.get('data', {}).get(
+            'Get', {}).get('Blog', []) if blogs_data else []
+
+        # If no data found, return helpful message
+        if not repairs and not parts and not blogs:
+            if timed_out:
+                return {"message": "Our troubleshooting sources are responding slowly right now. Please try again in a moment.", "timed_out_sources": timed_out}, timed_out
+            return {"message": f"No troubleshooting information found for: {query}. Try describing the problem differently or be more specific about the symptoms."}, timed_out
+
+        # Generate troubleshooting guidance
+        troubleshooting_info = self._generate_troubleshooting_guidance(
+            query, repairs, parts, blogs)
+        troubleshooting_info["troubleshooting_data"]["timed_out_sources"] = timed_out
+        return troubleshooting_info, timed_out
+
+    async def precompute(self, queries=None, max_age: float = 0) -> dict:
+        """Build and store answers for the symptom x appliance queries.
+
+        Entries refreshed less than max_age seconds ago are skipped; partial
+        or empty answers never replace a stored one.
+        """
+        stats = {"built": 0, "skipped": 0, "failed": 0}
+        for query in queries or precompute_queries():
+            if max_age and self.answers.is_fresh(query, max_age):
+                stats["skipped"] += 1
+                continue
+            answer, timed_out = await self.build(query)
+            if timed_out or "troubleshooting_data" not in answer:
+                print(f"Precompute failed for '{query}': {answer.get('message')}")
+                stats["failed"] += 1
+                continue
+            self.answers.put(query, answer)
+            stats["built"] += 1
+        if stats["built"]:
+            await asyncio.to_thread(self.answers.save)
+        return stats
+
+    async def keep_precomputed(self, can_refresh=lambda: True, refresh_interval=PRECOMPUTE_REFRESH_INTERVAL,
+                               reload_interval=ANSWER_STORE_RELOAD_INTERVAL, writer=ANSWER_STORE_WRITER):
+        """Pick up store files written elsewhere; on the writer, rebuild stale answers on schedule.
+
+        Stored answers are served from the start; rebuilding waits until
+        can_refresh() says the search backends are up.
+        """
+        while True:
+            try:
+                await asyncio.to_thread(self.answers.load)
+                if writer and refresh_interval and can_refresh():
+                    stats = await self.precompute(max_age=refresh_interval)
+                    if stats["built"] or stats["failed"]:
+                        print(f"Precomputed answers refreshed: {stats}")
+            except Exception as e:
+                print(f"Answer store refresh error: {e}")
+            await asyncio.sleep(reload_interval)
+
+    def _with_issue(self, cached_response: dict, query: str) -> dict:
+        """A cached answer restated for this user's own wording of the issue"""
+        data = dict(cached_response["troubleshooting_data"], troubleshooting_issue=query)
+        return {"message": self._format_for_critic_agent(data), "troubleshooting_data": data}
+
+    async def _search_sources(self, query, deadline=TROUBLESHOOT_DEADLINE):
+        """Query repairs, parts and blogs in parallel under one deadline.
+
+        Returns the results of the sources that answered in time plus the
+        names of the ones that did not.
+        """
+        tasks = {
+            "repairs": asyncio.ensure_future(self.vectordb.search_repairs(query, limit=3)),
+            "parts": asyncio.ensure_future(self.vectordb.search_parts(query, limit=5)),
+            "blogs": asyncio.ensure_future(self.vectordb.search_blogs(query, limit=3)),
+        }
+
+        done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        sources = {}
+        timed_out = []
+        for name, task in tasks.items():
+            if task in pending:
+                timed_out.append(name)
+            elif not task.exception():
+                sources[name] = task.result()
+            else:
+                print(f"Trouble Agent {name} search failed: {task.exception()}")
+
+        if timed_out:
+            print(f"Trouble Agent sources timed out after {deadline}s: {timed_out}")
+        return sources, timed_out
+
     def _generate_troubleshooting_guidance(self, query, repairs, parts, blogs):
         """Generate structured troubleshooting guidance with steps and resources"""
 
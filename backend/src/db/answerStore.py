@@ -0,0 +1,84 @@
+import os
+import json
+import time
+import threading
+from src.services.canonical import symptom_key
+
+ANSWER_STORE_PATH = os.getenv("ANSWER_STORE_PATH", "./src/db/troubleshoot_answers.json")
+
+
+def answer_key(query: str) -> str:
+    """Same key as the response caches: the symptom cluster only with CACHE_SYMPTOM_CLUSTERS=1"""
+    return symptom_key(query)
+
+
+class AnswerStore:
+    """Precomputed troubleshooting answers in a local JSON file.
+
+    Written by the precompute job (python -m src.db.precompute_answers) or
+    the one worker with ANSWER_STORE_WRITER=1, and reloaded by every worker
+    when the file changes. Queries match an entry by canonical text or,
+    with CACHE_SYMPTOM_CLUSTERS=1, by symptom cluster ("my dishwasher won't
+    drain" finds "dishwasher not draining").
+    """
+
+    def __init__(self, path=ANSWER_STORE_PATH):
+        self.path = path
+        self.entries = {}
+        self.mtime = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "refreshed": 0}
+
+    def load(self) -> bool:
+        """(Re)read the file if it changed; returns whether anything was loaded"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self.mtime:
+            return False
+        with open(self.path, encoding="utf-8") as f:
+            entries = json.load(f).get("entries", {})
+        with self._lock:
+            self.entries, self.mtime = entries, mtime
+        print(f"Answer store loaded: {len(entries)} precomputed answers")
+        return True
+
+    def save(self):
+        """Atomic write so readers never see a partial file"""
+        with self._lock:
+            payload = {"saved_at": time.time(), "entries": dict(self.entries)}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self.path)
+        self.mtime = os.path.getmtime(self.path)
+
+    def get(self, query: str):
+        entry = self.entries.get(answer_key(query))
+        self.stats["hits" if entry else "misses"] += 1
+        return entry
+
+    def put(self, query: str, answer: dict):
+        """Store an answer ({"message", "troubleshooting_data"}) under the query's key"""
+        with self._lock:
+            self.entries[answer_key(query)] = {
+                "query": query,
+                "message": answer["message"],
+                "troubleshooting_data": answer["troubleshooting_data"],
+                "refreshed_at": time.time(),
+            }
+        self.stats["refreshed"] += 1
+
+    def is_fresh(self, query: str, max_age: float) -> bool:
+        entry = self.entries.get(answer_key(query))
+        return bool(entry) and time.time() - entry["refreshed_at"] < max_age
+
+    def get_stats(self):
+        oldest = min((entry["refreshed_at"] for entry in self.entries.values()), default=None)
+        return {
+            "path": self.path,
+            "entries": len(self.entries),
+            "oldest_age_s": round(time.time() - oldest, 1) if oldest else None,
+            **self.stats,
+        }
@@ -0,0 +1,62 @@
+"""Bulk loader for the Parts, Repairs and Blogs collections.
+
+Usage (from backend/):
+    python -m src.db.bulk_load parts data/parts.csv --checkpoint parts.ckpt
+    python -m src.db.bulk_load repairs data/repairs.jsonl --batch-size 500 --concurrency 4
+"""
+import csv
+import json
+import argparse
+
+from src.db.vectorDB import VectorDB, BULK_KINDS
+
+
+def iter_rows(path: str):
+    """Lazily yield dict rows from a .csv or .jsonl file"""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk load scraped data into Weaviate")
+    parser.add_argument("kind", choices=list(BULK_KINDS))
+    parser.add_argument("path", help="CSV or JSONL file")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="Fixed batch size (default: Weaviate dynamic batching)")
+    parser.add_argument("--concurrency", type=int, default=2,
+                        help="Concurrent batch requests (fixed-size batching only)")
+    parser.add_argument("--checkpoint", default=None,
+                        help="Checkpoint file; rerunning with it resumes the load")
+    parser.add_argument("--failed-out", default=None,
+                        help="Write failed rows to this JSONL file")
+    args = parser.parse_args(argv)
+
+    vectordb = VectorDB()
+    if not vectordb.connect():
+        raise SystemExit("Weaviate is not reachable")
+    stats = vectordb.bulk_load(
+        iter_rows(args.path),
+        args.kind,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint
+    )
+
+    if args.failed_out and stats["failed_rows"]:
+        with open(args.failed_out, "w", encoding="utf-8") as f:
+            for row in stats["failed_rows"]:
+                f.write(json.dumps(row, default=str) + "\n")
+        print(f"Wrote {len(stats['failed_rows'])} failed rows to {args.failed_out}")
+
+    vectordb.client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import re
+import asyncio
+import threading
+from datetime import datetime, timezone
+from weaviate.classes.query import Filter
+
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "300"))
+CATALOG_PAGE_SIZE = 1000
+
+# compatibleModels is free text; split on common list separators
+_MODEL_SPLIT = re.compile(r"[\s,;|/]+")
+
+
+def timestamps_indexed(client, name: str) -> bool:
+    """Whether a collection indexes update timestamps, which incremental refreshes filter on.
+
+    Only set at collection creation; collections created before it was
+    enabled can't filter by update time.
+    """
+    try:
+        return bool(client.collections.get(name).config.get().inverted_index_config.index_timestamps)
+    except Exception as e:
+        print(f"Could not read the {name} schema ({e}), assuming timestamps are not indexed")
+        return False
+
+
+def model_tokens(text: str) -> set:
+    """Model numbers mentioned in a string (upper-cased, alphanumeric with a digit)"""
+    tokens = set()
+    for token in _MODEL_SPLIT.split((text or "").upper()):
+        token = token.strip(".,!?;:()[]'\"")
+        if len(token) >= 4 and any(char.isdigit() for char in token):
+            tokens.add(token)
+    return tokens
+
+
+class CatalogIndex:
+    """Locally held copy of the Parts collection for exact lookups.
+
+    Keeps partId -> properties and model number -> partIds so exact part and
+    compatibility lookups never leave the process. Loaded in full once, then
+    refreshed incrementally from Weaviate update timestamps.
+    """
+
+    def __init__(self):
+        self._parts = {}
+        self._by_model = {}
+        self._lock = threading.Lock()
+        self.ready = False
+        self.last_refresh = None
+        # Whether Parts supports update-time filters; checked once, on first load
+        self.incremental = None
+
+    def _add(self, parts, by_model, properties):
+        part_id = (properties.get("partId") or "").upper()
+        if not part_id:
+            return
+        previous = parts.get(part_id)
+        if previous:
+            for model in model_tokens(previous.get("compatibleModels")):
+                by_model.get(model, set()).discard(part_id)
+        parts[part_id] = properties
+        for model in model_tokens(properties.get("compatibleModels")):
+            by_model.setdefault(model, set()).add(part_id)
+
+    def load(self, client):
+        """Full (re)load of the Parts collection; swaps the index atomically"""
+        started = datetime.now(timezone.utc)
+        parts, by_model = {}, {}
+        for obj in client.collections.get("Parts").iterator():
+            self._add(parts, by_model, obj.properties)
+
+        with self._lock:
+            self._parts, self._by_model = parts, by_model
+            self.last_refresh = started
+            self.ready = True
+        print(f"Catalog index loaded: {len(parts)} parts, {len(by_model)} models")
+        if self.incremental is None:
+            self.incremental = timestamps_indexed(client, "Parts")
+            if not self.incremental:
+                print("Parts does not index update timestamps: incremental catalog refresh disabled, "
+                      "only writes through this process are picked up until restart")
+
+    def refresh(self, client):
+        """Apply parts created/updated since the last refresh"""
+        if not self.ready:
+            return self.load(client)
+        if not self.incremental:
+            return
+
+        started = datetime.now(timezone.utc)
+        collection = client.collections.get("Parts")
+        updated = 0
+        try:
+            offset = 0
+            while True:
+                page = collection.query.fetch_objects(
+                    filters=Filter.by_update_time().greater_than(self.last_refresh),
+                    limit=CATALOG_PAGE_SIZE,
+                    offset=offset
+                )
+                with self._lock:
+                    for obj in page.objects:
+                        self._add(self._parts, self._by_model, obj.properties)
+                updated += len(page.objects)
+                if len(page.objects) < CATALOG_PAGE_SIZE:
+                    break
+                offset += CATALOG_PAGE_SIZE
+        except Exception as e:
+            print(f"Incremental catalog refresh failed ({e}), reloading")
+            return self.load(client)
+
+        self.last_refresh = started
+        if updated:
+            print(f"Catalog index refreshed: {updated} parts updated")
+
+    async def keep_fresh(self, client, interval=CATALOG_REFRESH_INTERVAL):
+        """Initial load plus periodic incremental refresh, off the event loop"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh, client)
+            except Exception as e:
+                print(f"Catalog index refresh error: {e}")
+            await asyncio.sleep(interval)
+
+    def upsert(self, properties: dict):
+        """Write-through for parts added by this process"""
+        with self._lock:
+            self._add(self._parts, self._by_model, properties)
+
+    def get(self, part_id: str):
+        return self._parts.get((part_id or "").upper())
+
+    def parts_for_models(self, text: str) -> list:
+        """Parts compatible with any model number mentioned in text"""
+        part_ids = set()
+        for model in model_tokens(text):
+            part_ids.update(self._by_model.get(model, ()))
+        return [self._parts[part_id] for part_id in sorted(part_ids) if part_id in self._parts]
+
+    def get_stats(self):
+        return {
+            "ready": self.ready,
+            "parts": len(self._parts),
+            "models": len(self._by_model),
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "incremental": self.incremental,
+        }
@@ -1,6 +1,9 @@
 from src.db.orderDB import OrderDB
-from src.db.vectorDB import VectorDB
+from src.db.vectorDB import VectorDB, AsyncVectorDB
 
 # Initialize database instances
 orderdb = OrderDB()
-vectordb = VectorDB() 
\ No newline at end of file
+vectordb = VectorDB()
+
+# Non-blocking query path used by the async agents
+async_vectordb = AsyncVectorDB(vectordb)
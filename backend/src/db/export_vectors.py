@@ -0,0 +1,35 @@
+"""Export Weaviate collections into a local vector snapshot for VECTOR_ENGINE=embedded.
+
+Usage (from backend/):
+    python -m src.db.export_vectors
+    python -m src.db.export_vectors --out /srv/snapshots --reembed
+
+Running servers pick up the new snapshot on their next reload poll.
+"""
+import argparse
+
+from src.db.vectorDB import VectorDB
+from src.db.keywordIndex import FIELDS
+from src.db.vectorEngine import VECTOR_SNAPSHOT_DIR, LocalEmbedder, export_snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export Weaviate vectors to an mmap snapshot")
+    parser.add_argument("--out", default=VECTOR_SNAPSHOT_DIR, help="Snapshot root directory")
+    parser.add_argument("--reembed", action="store_true",
+                        help="Embed objects locally instead of exporting the Weaviate vectors")
+    args = parser.parse_args(argv)
+
+    vectordb = VectorDB()
+    if not vectordb.connect():
+        raise SystemExit("Weaviate is not reachable")
+
+    embedder = LocalEmbedder() if args.reembed else None
+    path = export_snapshot(vectordb.client, args.out, embedder,
+                           {name: list(fields) for name, fields in FIELDS.items()})
+    print(f"Snapshot written to {path}")
+    vectordb.client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import os
+import re
+import math
+import bisect
+import asyncio
+import threading
+from array import array
+from datetime import datetime, timezone
+from weaviate.classes.query import Filter
+from src.db.catalogIndex import timestamps_indexed
+
+KEYWORD_REFRESH_INTERVAL = float(os.getenv("KEYWORD_REFRESH_INTERVAL", "300"))
+KEYWORD_PAGE_SIZE = 1000
+# Reciprocal-rank-fusion constant (the usual 60 from the RRF paper)
+RRF_K = 60
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do does for from how i if in is it its my of on or "
+    "so that the this to was what when where which why will with you your".split())
+
+# Weighted text fields per collection: a field of weight w counts each token w times
+FIELDS = {
+    "Parts": {"partId": 3, "partName": 3, "brand": 2, "applianceType": 1,
+              "compatibleModels": 1, "productDescription": 1},
+    "Repairs": {"symptom": 3, "product": 2, "parts": 2, "description": 1},
+    "Blogs": {"title": 3, "category": 1, "content_type": 1},
+}
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased alphanumeric tokens without stopwords"""
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def is_identifier(token: str) -> bool:
+    """Part/model-number-like token: letters and digits ("wdt780saem1", "ps11752778") or a long number"""
+    if token.isdigit():
+        return len(token) >= 5
+    return any(char.isdigit() for char in token) and any(char.isalpha() for char in token)
+
+
+def document_key(collection: str, properties: dict) -> str:
+    """Identity of an object across refreshes"""
+    if collection == "Parts":
+        return (properties.get("partId") or "").upper()
+    if collection == "Repairs":
+        return f"{properties.get('product')}|{properties.get('symptom')}"
+    return properties.get("url") or properties.get("title") or ""
+
+
+def rrf_fuse(result_lists: list, key, limit: int, k: int = RRF_K) -> list:
+    """Merge ranked lists with reciprocal rank fusion; first list wins ties"""
+    scores, items = {}, {}
+    for results in result_lists:
+        for rank, item in enumerate(results):
+            item_key = key(item)
+            scores[item_key] = scores.get(item_key, 0.0) + 1.0 / (k + rank + 1)
+            items.setdefault(item_key, item)
+    ordered = sorted(scores, key=lambda item_key: -scores[item_key])
+    return [items[item_key] for item_key in ordered[:limit]]
+
+
+class BM25Index:
+    """Append-only BM25 inverted index over one collection.
+
+    Postings are array('I') doc ids plus array('H') weighted term
+    frequencies, appended in doc id order. Updating a document tombstones
+    its old doc id; compact() rebuilds once too many ids are dead. Not
+    thread-safe on its own: KeywordIndex writes to a copy() and publishes
+    it, so a published index is only ever read.
+    """
+
+    def __init__(self, fields: dict):
+        self.fields = fields
+        self.docs = []
+        self.doc_len = array("I")
+        self.live = bytearray()
+        self.postings = {}
+        self.ids = {}
+        self.total_len = 0
+        self.dead = 0
+        self._terms = None
+
+    def add(self, key: str, properties: dict):
+        previous = self.ids.get(key)
+        if previous is not None and self.live[previous]:
+            self.live[previous] = 0
+            self.total_len -= self.doc_len[previous]
+            self.dead += 1
+
+        tf = {}
+        for field, weight in self.fields.items():
+            value = properties.get(field)
+            text = " ".join(map(str, value)) if isinstance(value, list) else str(value or "")
+            for token in tokenize(text):
+                tf[token] = tf.get(token, 0) + weight
+
+        doc_id = len(self.docs)
+        length = sum(tf.values())
+        self.docs.append(properties)
+        self.doc_len.append(length)
+        self.live.append(1)
+        self.ids[key] = doc_id
+        self.total_len += length
+        for token, count in tf.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = (array("I"), array("H"))
+                self._terms = None
+            posting[0].append(doc_id)
+            posting[1].append(min(count, 0xFFFF))
+
+    @property
+    def size(self):
+        return len(self.docs) - self.dead
+
+    def copy(self) -> "BM25Index":
+        """Writable copy; documents are shared, postings and bookkeeping copied"""
+        clone = BM25Index(self.fields)
+        clone.docs = list(self.docs)
+        clone.doc_len = array("I", self.doc_len)
+        clone.live = bytearray(self.live)
+        clone.postings = {term: (array("I", doc_ids), array("H", freqs))
+                          for term, (doc_ids, freqs) in self.postings.items()}
+        clone.ids = dict(self.ids)
+        clone.total_len = self.total_len
+        clone.dead = self.dead
+        return clone
+
+    def needs_compaction(self) -> bool:
+        return self.dead > 1000 and self.dead > len(self.docs) // 4
+
+    def compact(self) -> "BM25Index":
+        rebuilt = BM25Index(self.fields)
+        for key, doc_id in self.ids.items():
+            if self.live[doc_id]:
+                rebuilt.add(key, self.docs[doc_id])
+        return rebuilt
+
+    def _expand(self, token: str) -> list:
+        """Vocabulary terms for a query token; identifier fragments match by prefix"""
+        if token in self.postings:
+            return [token]
+        if len(token) < 4 or not any(char.isdigit() for char in token):
+            return []
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        terms = self._terms
+        start = bisect.bisect_left(terms, token)
+        matches = []
+        for term in terms[start:start + 50]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, limit: int = 5, where: dict = None):
+        """Returns (ranked (score, properties) pairs, fraction of query terms matched)"""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        live_docs = self.size
+        if not tokens or not live_docs:
+            return [], 0.0
+
+        avg_len = self.total_len / live_docs
+        scores = {}
+        matched = 0
+        for token in tokens:
+            terms = self._expand(token)
+            matched += 1 if terms else 0
+            for term in terms:
+                doc_ids, freqs = self.postings[term]
+                idf = math.log(1 + (live_docs - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5))
+                for doc_id, freq in zip(doc_ids, freqs):
+                    if not self.live[doc_id]:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+
+        ranked = []
+        for doc_id in sorted(scores, key=lambda d: -scores[d]):
+            properties = self.docs[doc_id]
+            if where and any(properties.get(name) != value for name, value in where.items()
+                             if value is not None):
+                continue
+            ranked.append((scores[doc_id], properties))
+            if len(ranked) >= limit:
+                break
+        return ranked, matched / len(tokens)
+
+
+class KeywordIndex:
+    """In-process BM25 indexes over Parts, Repairs and Blogs.
+
+    Loaded from the same Weaviate collections at startup and refreshed
+    incrementally from update timestamps (like CatalogIndex). VectorDB fuses
+    its hits with near_text results, and answers keyword-heavy queries on
+    its own.
+    """
+
+    def __init__(self):
+        self._indexes = {name: BM25Index(fields) for name, fields in FIELDS.items()}
+        # _lock guards the published index references; writers copy, modify and
+        # swap under _write_lock, so searches score without holding either
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.ready = False
+        self.last_refresh = None
+        # Collections that support update-time filters; checked once, on first load
+        self.incremental = None
+        self.stats = {"searches": 0, "local_answers": 0, "fused": 0}
+
+    def load(self, client):
+        """Full (re)load of every collection; swaps the indexes atomically"""
+        started = datetime.now(timezone.utc)
+        indexes = {}
+        for name, fields in FIELDS.items():
+            index = BM25Index(fields)
+            for obj in client.collections.get(name).iterator():
+                index.add(document_key(name, obj.properties), obj.properties)
+            indexes[name] = index
+
+        with self._write_lock, self._lock:
+            self._indexes = indexes
+            self.last_refresh = started
+            self.ready = True
+        print("Keyword index loaded: " + ", ".join(
+            f"{len(index.postings)} terms/{index.size} {name.lower()}" for name, index in indexes.items()))
+        if self.incremental is None:
+            self.incremental = [name for name in FIELDS if timestamps_indexed(client, name)]
+            skipped = [name for name in FIELDS if name not in self.incremental]
+            if skipped:
+                print(f"No update timestamps on {', '.join(skipped)}: incremental keyword refresh disabled "
+                      "for them, only writes through this process are picked up until restart")
+
+    def refresh(self, client):
+        """Apply objects created/updated since the last refresh"""
+        if not self.ready:
+            return self.load(client)
+
+        started = datetime.now(timezone.utc)
+        updated = 0
+        try:
+            for name in self.incremental:
+                collection = client.collections.get(name)
+                offset = 0
+                while True:
+                    page = collection.query.fetch_objects(
+                        filters=Filter.by_update_time().greater_than(self.last_refresh),
+                        limit=KEYWORD_PAGE_SIZE,
+                        offset=offset
+                    )
+                    self.upsert_many(name, [obj.properties for obj in page.objects])
+                    updated += len(page.objects)
+                    if len(page.objects) < KEYWORD_PAGE_SIZE:
+                        break
+                    offset += KEYWORD_PAGE_SIZE
+        except Exception as e:
+            print(f"Incremental keyword refresh failed ({e}), reloading")
+            return self.load(client)
+
+        self.last_refresh = started
+        if updated:
+            print(f"Keyword index refreshed: {updated} objects updated")
+
+    async def keep_fresh(self, client, interval=KEYWORD_REFRESH_INTERVAL):
+        """Initial load plus periodic incremental refresh, off the event loop"""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh, client)
+            except Exception as e:
+                print(f"Keyword index refresh error: {e}")
+            await asyncio.sleep(interval)
+
+    def upsert(self, collection: str, properties: dict):
+        """Index (or re-index) one object; write-through for local inserts"""
+        self.upsert_many(collection, [properties])
+
+    def upsert_many(self, collection: str, objects: list):
+        """Index a batch on a copy of the collection's index, then publish it"""
+        if not objects:
+            return
+        with self._write_lock:
+            index = self._indexes[collection].copy()
+            for properties in objects:
+                index.add(document_key(collection, properties), properties)
+            if index.needs_compaction():
+                index = index.compact()
+            with self._lock:
+                self._indexes[collection] = index
+
+    def count(self, name: str):
+        """Bump one of the stats counters (searches run on many threads)"""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def search(self, collection: str, query: str, limit: int = 5, where: dict = None):
+        """(score, properties) pairs and the fraction of query terms found"""
+        self.count("searches")
+        with self._lock:
+            index = self._indexes[collection]
+        return index.search(query, limit, where)
+
+    def get_stats(self):
+        with self._lock:
+            indexes = dict(self._indexes)
+        collections = {name: {"documents": index.size, "terms": len(index.postings)}
+                       for name, index in indexes.items()}
+        with self._stats_lock:
+            stats = dict(self.stats)
+        return {
+            "ready": self.ready,
+            "collections": collections,
+            "last_refresh": self.last_refresh.isoformat() if self.last_refresh else None,
+            "incremental": self.incremental,
+            **stats,
+        }
@@ -1,54 +1,162 @@
+import os
 import uuid
+import base64
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import List, Tuple
-from sqlalchemy import create_engine, Column, String, Float, DateTime
+from typing import List, Optional, Tuple
+from sqlalchemy import Column, String, Float, DateTime, Index, event, select, and_, or_
 from sqlalchemy.dialects.sqlite import JSON
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base
+from src.services.metrics import ORDERDB_SECONDS, instrument
+
+ORDER_DB_URL = os.getenv("ORDER_DB_URL", "sqlite+aiosqlite:///./src/db/orders.db")
+ORDER_DB_POOL_SIZE = int(os.getenv("ORDER_DB_POOL_SIZE", "5"))
+ORDER_DB_BUSY_TIMEOUT_MS = int(os.getenv("ORDER_DB_BUSY_TIMEOUT_MS", "5000"))
 
 Base = declarative_base()
 
+# Session shared by every OrderDB call inside one session_scope()
+_current_session = ContextVar("order_db_session", default=None)
+
 class Order(Base):
     __tablename__ = "orders"
     order_id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, nullable=False)
     order_date = Column(DateTime, default=datetime.utcnow)
     total_amount = Column(Float, nullable=False)
-    items = Column(JSON, nullable=False) 
+    items = Column(JSON, nullable=False)
     status = Column(String, default="pending")
 
+    __table_args__ = (
+        # Per-user history, newest first (keyset pagination)
+        Index("ix_orders_user_date", "user_id", "order_date"),
+        Index("ix_orders_status", "status"),
+    )
+
+
+def encode_cursor(order: Order) -> str:
+    """Opaque keyset cursor: position just after this order"""
+    raw = f"{order.order_date.isoformat()}|{order.order_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """(order_date, order_id) of a cursor; ValueError if it isn't one of ours"""
+    try:
+        order_date, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(order_date), order_id
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
 class OrderDB:
-    def __init__(self, db_path="sqlite:///./src/db/orders.db"):
-        self.engine = create_engine(db_path, connect_args={"check_same_thread": False})
-        self.Session = sessionmaker(bind=self.engine, autocommit=False, autoflush=False)
-        Base.metadata.create_all(bind=self.engine)
-
-    def create_order(self, user_id: str, items: List[Tuple[str, int]], total_amount: float, status="pending") -> Order:
-        session = self.Session()
-        order = Order(user_id=user_id, items=items, total_amount=total_amount, status=status)
-        session.add(order)
-        session.commit()
-        session.refresh(order)
-        session.close()
-        return order
-
-    def get_orders_by_user(self, user_id: str) -> List[Order]:
-        session = self.Session()
-        orders = session.query(Order).filter(Order.user_id == user_id).all()
-        session.close()
-        return orders
-
-    def get_order_by_id(self, order_id: str) -> Order:
-        session = self.Session()
-        order = session.query(Order).filter(Order.order_id == order_id).first()
-        session.close()
-        return order
-
-    def update_order_status(self, order_id: str, new_status: str) -> Order:
-        session = self.Session()
-        order = session.query(Order).filter(Order.order_id == order_id).first()
-        if order:
-            order.status = new_status
-            session.commit()
-            session.refresh(order)
-        session.close()
-        return order
+    def __init__(self, db_path=ORDER_DB_URL):
+        self.engine = create_async_engine(
+            db_path,
+            pool_size=ORDER_DB_POOL_SIZE,
+            max_overflow=ORDER_DB_POOL_SIZE,
+            pool_pre_ping=True
+        )
+        event.listen(self.engine.sync_engine, "connect", self._configure_connection)
+        self.Session = async_sessionmaker(
+            bind=self.engine, autoflush=False, expire_on_commit=False)
+        self._ready = False
+        self._init_lock = asyncio.Lock()
+
+    @staticmethod
+    def _configure_connection(dbapi_connection, connection_record):
+        # WAL lets readers run alongside the writer; busy_timeout makes a
+        # writer wait for the lock instead of failing with "database is locked"
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA busy_timeout={ORDER_DB_BUSY_TIMEOUT_MS}")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    async def init(self):
+        """Create tables once, on first use"""
+        if self._ready:
+            return
+        async with self._init_lock:
+            if not self._ready:
+                async with self.engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                    # create_all skips indexes on tables that already exist
+                    await conn.run_sync(self._create_indexes)
+                self._ready = True
+
+    @staticmethod
+    def _create_indexes(conn):
+        for index in Order.__table__.indexes:
+            index.create(conn, checkfirst=True)
+
+    @asynccontextmanager
+    async def session_scope(self):
+        """Session for a unit of work; nested scopes reuse the outer session"""
+        session = _current_session.get()
+        if session is not None:
+            yield session
+            return
+
+        await self.init()
+        async with self.Session() as session:
+            token = _current_session.set(session)
+            try:
+                yield session
+            finally:
+                _current_session.reset(token)
+
+    @instrument(ORDERDB_SECONDS, method="create_order")
+    async def create_order(self, user_id: str, items: List[Tuple[str, int]], total_amount: float, status="pending") -> Order:
+        async with self.session_scope() as session:
+            order = Order(user_id=user_id, items=items, total_amount=total_amount, status=status)
+            session.add(order)
+            await session.commit()
+            return order
+
+    @instrument(ORDERDB_SECONDS, method="get_orders_by_user")
+    async def get_orders_by_user(self, user_id: str, limit: int = 20, cursor: str = None,
+                                 status=None) -> Tuple[List[Order], Optional[str]]:
+        """One page of a user's orders, newest first.
+
+        Returns (orders, next_cursor); next_cursor is None on the last page.
+        status may be a single status or a list of statuses.
+        """
+        query = select(Order).where(Order.user_id == user_id)
+        if status:
+            statuses = [status] if isinstance(status, str) else list(status)
+            query = query.where(Order.status.in_(statuses))
+        if cursor:
+            order_date, order_id = decode_cursor(cursor)
+            query = query.where(or_(
+                Order.order_date < order_date,
+                and_(Order.order_date == order_date, Order.order_id < order_id)
+            ))
+        # Fetch one extra row to know whether another page exists
+        query = query.order_by(Order.order_date.desc(), Order.order_id.desc()).limit(limit + 1)
+
+        async with self.session_scope() as session:
+            orders = list((await session.execute(query)).scalars().all())
+
+        next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+        return orders[:limit], next_cursor
+
+    @instrument(ORDERDB_SECONDS, method="get_order_by_id")
+    async def get_order_by_id(self, order_id: str) -> Order:
+        async with self.session_scope() as session:
+            return await session.get(Order, order_id)
+
+    @instrument(ORDERDB_SECONDS, method="update_order_status")
+    async def update_order_status(self, order_id: str, new_status: str) -> Order:
+        async with self.session_scope() as session:
+            order = await session.get(Order, order_id)
+            if order:
+                order.status = new_status
+                await session.commit()
+            return order
+
+    async def close(self):
+        await self.engine.dispose()
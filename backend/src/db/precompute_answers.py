@@ -0,0 +1,39 @@
+"""Precompute troubleshooting answers for common symptoms into the answer store.
+
+Usage (from backend/):
+    python -m src.db.precompute_answers
+    python -m src.db.precompute_answers --appliances dishwasher refrigerator --symptoms "not draining" noise
+    python -m src.db.precompute_answers --max-age 3600   # only rebuild entries older than an hour
+
+Defaults come from PRECOMPUTE_SYMPTOMS / PRECOMPUTE_APPLIANCES. Running
+servers pick up the rewritten store file on their next reload poll.
+"""
+import asyncio
+import argparse
+
+from src.db.vectorDB import VectorDB, AsyncVectorDB
+from src.agents.troubleAgent import TroubleAgent, precompute_queries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Materialize troubleshooting answers")
+    parser.add_argument("--symptoms", nargs="+", default=None)
+    parser.add_argument("--appliances", nargs="+", default=None)
+    parser.add_argument("--max-age", type=float, default=0,
+                        help="Skip entries refreshed less than this many seconds ago")
+    args = parser.parse_args(argv)
+
+    vectordb = VectorDB()
+    if not vectordb.connect():
+        raise SystemExit("Weaviate is not reachable")
+
+    agent = TroubleAgent(AsyncVectorDB(vectordb))
+    agent.answers.load()
+    queries = precompute_queries(args.symptoms, args.appliances)
+    stats = asyncio.run(agent.precompute(queries, max_age=args.max_age))
+    print(f"Precomputed {len(queries)} queries into {agent.answers.path}: {stats}")
+    vectordb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,147 @@
 import os
+import json
+import time
+import base64
+import asyncio
+import functools
+import itertools
+import threading
+import contextvars
 import weaviate
+from concurrent.futures import ThreadPoolExecutor
 from weaviate.classes.init import Auth, AdditionalConfig, Timeout
 from weaviate.classes.config import Configure, DataType, Property
 from weaviate.classes.query import Filter, MetadataQuery
+from weaviate.util import generate_uuid5
 from dotenv import load_dotenv
 from src.services.cache import SimpleCache
+from src.services.singleflight import SingleFlight
+from src.services.breaker import get_breaker
+from src.services.canonical import canonical_query
+from src.db.catalogIndex import CatalogIndex
+from src.db.keywordIndex import KeywordIndex, document_key, is_identifier, rrf_fuse, tokenize
+from src.db.vectorEngine import VectorEngine
+from src.services.metrics import VECTORDB_SECONDS, instrument
 
 load_dotenv()
 
-# Best practice: store your credentials in environment variables
-WEAVIATE_URL = os.getenv("WEAVIATE_URL")
-WEAVIATE_API_KEY = os.getenv("WEAVIATE_API_KEY")
+# Async query path: bounded worker pool and per-call deadline (seconds)
+VECTORDB_MAX_WORKERS = int(os.getenv("VECTORDB_MAX_WORKERS", "8"))
+VECTORDB_CALL_TIMEOUT = float(os.getenv("VECTORDB_CALL_TIMEOUT", "10"))
+# Fuse local BM25 hits with near_text; queries naming a part or model number
+# whose terms are all indexed are answered from BM25 alone
+HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "1") == "1"
+# "embedded" answers near_text searches from the local mmap snapshot (see vectorEngine.py)
+VECTOR_ENGINE = os.getenv("VECTOR_ENGINE", "remote")
+# Hard cap on objects returned by any single query
+VECTORDB_MAX_LIMIT = int(os.getenv("VECTORDB_MAX_LIMIT", "50"))
+# Client-side Weaviate timeouts (seconds); queries fail well before the old 60s
+WEAVIATE_INIT_TIMEOUT = int(os.getenv("WEAVIATE_INIT_TIMEOUT", "30"))
+WEAVIATE_QUERY_TIMEOUT = int(os.getenv("WEAVIATE_QUERY_TIMEOUT", "15"))
+WEAVIATE_INSERT_TIMEOUT = int(os.getenv("WEAVIATE_INSERT_TIMEOUT", "120"))
+
+# return_properties per query path: only what the agents/renderer read
+PART_CARD_PROPERTIES = ["partId", "partName", "applianceType", "brand", "price", "availability",
+                        "productDescription", "productUrl", "youtubeVideoUrl"]
+# Compatibility listings skip the long description
+PART_LIST_PROPERTIES = ["partId", "partName", "applianceType", "brand", "price", "availability",
+                        "productUrl", "youtubeVideoUrl"]
+PART_COMPATIBILITY_PROPERTIES = PART_CARD_PROPERTIES + ["compatibleModels"]
+BLOG_PROPERTIES = ["title", "url", "category", "content_type"]
+# Repairs are small and every field is rendered (including ones added by auto-schema)
+REPAIR_PROPERTIES = None
+
+
+def clamp_limit(limit) -> int:
+    return max(1, min(int(limit or 1), VECTORDB_MAX_LIMIT))
+
+
+def encode_offset_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode()
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Offset from an opaque cursor (0 when missing or malformed)"""
+    if not cursor:
+        return 0
+    try:
+        kind, value = base64.urlsafe_b64decode(cursor.encode()).decode().split(":", 1)
+        return max(0, int(value)) if kind == "o" else 0
+    except (ValueError, UnicodeDecodeError):
+        return 0
+
+
+def transform_part(part_data: dict) -> dict:
+    """Transform CSV column names to camelCase for Weaviate"""
+    return {
+        "applianceType": part_data.get("appliance_type"),
+        "partName": part_data.get("part_name"),
+        "partId": part_data.get("part_id"),
+        "brand": part_data.get("brand"),
+        "price": float(str(part_data.get("price") or "0").replace("$", "").replace(",", "").strip() or 0),
+        "availability": part_data.get("availability"),
+        "productDescription": part_data.get("product_description"),
+        "productUrl": part_data.get("product_url"),
+        "youtubeVideoUrl": part_data.get("youtube_video_url"),
+        "compatibleModels": part_data.get("compatible_models"),
+        "sourcePage": part_data.get("source_page")
+    }
+
+
+def transform_repair(repair_data: dict) -> dict:
+    """Normalize a repair row (parts as a list, percentage as a float)"""
+    repair_data = dict(repair_data)
+
+    # Ensure parts is a list
+    if isinstance(repair_data.get("parts"), str):
+        repair_data["parts"] = [repair_data["parts"]]
+    elif not isinstance(repair_data.get("parts"), list):
+        repair_data["parts"] = []
+
+    # Convert percentage to float if it exists
+    if "percentage" in repair_data:
+        try:
+            repair_data["percentage"] = float(repair_data["percentage"])
+        except (ValueError, TypeError):
+            repair_data["percentage"] = 0.0
+
+    return repair_data
+
+
+def transform_blog(blog_data: dict) -> dict:
+    return dict(blog_data)
+
+
+# bulk_load kind -> (collection, row transform)
+BULK_KINDS = {
+    "parts": ("Parts", transform_part),
+    "repairs": ("Repairs", transform_repair),
+    "blogs": ("Blogs", transform_blog),
+}
+
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(json.load(f).get("rows_done", 0))
+
+
+def _object_uuid(collection: str, properties: dict) -> str:
+    """Deterministic object UUID: the document's identity, or its content when it has none"""
+    key = document_key(collection, properties)
+    if key:
+        return generate_uuid5(key)
+    return generate_uuid5(f"{collection}|{json.dumps(properties, sort_keys=True, default=str)}")
+
 
-if not WEAVIATE_URL or not WEAVIATE_API_KEY:
-    raise ValueError(
-        "WEAVIATE_URL and WEAVIATE_API_KEY environment variables must be set")
+def _write_checkpoint(path, rows_done):
+    if not path:
+        return
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"rows_done": rows_done}, f)
+    os.replace(tmp_path, path)
 
 
 class VectorDB:
@@ -22,19 +149,47 @@ class VectorDB:
         self.weaviate_url = os.getenv("WEAVIATE_URL")
         self.weaviate_api_key = os.getenv("WEAVIATE_API_KEY")
         self.client = None
-        self.cache = SimpleCache(ttl=300)
+        self.cache = SimpleCache(ttl=300, namespace="vectordb", persistent=True)
+        self.flights = SingleFlight()
+        # Local partId / model index, loaded in the background at startup
+        self.catalog = CatalogIndex()
+        # Local BM25 indexes over Parts/Repairs/Blogs, also loaded in the background
+        self.keywords = KeywordIndex()
+        self.engine = VectorEngine() if VECTOR_ENGINE == "embedded" else None
+        self._collections = {}
+        # Fail fast while Weaviate is down; cached searches are then served stale
+        self.breaker = get_breaker("weaviate")
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="vectordb-refresh")
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+
+    def connect(self) -> bool:
+        """Open the Weaviate connection (creating missing collections).
+
+        Not done in __init__ so importing the app never blocks on Weaviate;
+        the server connects in the background at startup, scripts call this
+        directly. Queries return None until it succeeds.
+        """
+        if not self.weaviate_url or not self.weaviate_api_key:
+            raise ValueError(
+                "WEAVIATE_URL and WEAVIATE_API_KEY environment variables must be set")
+        if not self.client:
+            self._connect()
+        return self.client is not None
 
-        self._connect()
+    def close(self):
         if self.client:
-            self._ensure_schema_exists()
+            self.client.close()
+            self.client = None
+            self._collections = {}
 
     def _connect(self):
         try:
             print(f"Connecting to Weaviate at {self.weaviate_url}")
             # Connect to Weaviate using v4 client with better timeout settings
             additional_config = AdditionalConfig(
-                # Increased timeouts
-                timeout=Timeout(init=30, query=60, insert=120)
+                timeout=Timeout(init=WEAVIATE_INIT_TIMEOUT, query=WEAVIATE_QUERY_TIMEOUT,
+                                insert=WEAVIATE_INSERT_TIMEOUT)
             )
 
             try:
@@ -89,6 +244,9 @@ class VectorDB:
                 self.client.collections.create(
                     name="Parts",
                     vectorizer_config=Configure.Vectorizer.text2vec_weaviate(),
+                    # Update timestamps drive the incremental catalog refresh
+                    inverted_index_config=Configure.inverted_index(
+                        index_timestamps=True),
                     properties=[
                         Property(name="applianceType",
                                  data_type=DataType.TEXT),
@@ -110,6 +268,8 @@ class VectorDB:
                 print("Parts collection created successfully")
             else:
                 print("Parts collection already exists")
+                # index_timestamps can only be set at creation; the indexes check it and skip
+                # incremental refreshes on older collections
 
             # Check if Repairs collection exists (real data)
             if not self.client.collections.exists("Repairs"):
@@ -117,6 +277,9 @@ class VectorDB:
                 self.client.collections.create(
                     name="Repairs",
                     vectorizer_config=Configure.Vectorizer.text2vec_weaviate(),
+                    # For the incremental keyword index refresh
+                    inverted_index_config=Configure.inverted_index(
+                        index_timestamps=True),
                     properties=[
                         Property(name="product", data_type=DataType.TEXT),
                         Property(name="symptom", data_type=DataType.TEXT),
@@ -135,30 +298,65 @@ class VectorDB:
         except Exception as e:
             print(f"Error in schema setup: {str(e)}")
 
+    def _collection(self, name: str):
+        """Collection handles are cheap but not free; fetch each one once"""
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self.client.collections.get(name)
+            self._collections[name] = collection
+        return collection
+
+    def _query(self, fn):
+        """Run one Weaviate query through the circuit breaker"""
+        return self.breaker.call(fn)
+
+    def _cached(self, cache_key: str, compute):
+        """Cached result, else compute() once for all concurrent callers.
+
+        While the Weaviate breaker is open (or probing), an expired entry is
+        served as-is and refreshed in the background instead of waiting on a
+        dependency that is known to be failing.
+        """
+        cached_result = self.cache.get(cache_key)
+        if cached_result:
+            return cached_result
+        if not self.breaker.closed:
+            stale = self.cache.get_stale(cache_key)
+            if stale:
+                self._revalidate(cache_key, compute)
+                return stale
+        # Concurrent identical queries share one Weaviate round trip
+        return self.flights.do_sync(cache_key, compute)
+
+    def _revalidate(self, cache_key: str, compute):
+        """Refresh a stale entry off the request path, one refresh per key"""
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+
+        def refresh():
+            try:
+                self.flights.do_sync(cache_key, compute)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(cache_key)
+
+        self._refresher.submit(refresh)
+
     def add_part(self, part_data: dict):
         """Add a part to the vector database"""
         if not self.client:
             return False
 
         try:
-            # Transform CSV column names to camelCase for Weaviate
-            transformed_data = {
-                "applianceType": part_data.get("appliance_type"),
-                "partName": part_data.get("part_name"),
-                "partId": part_data.get("part_id"),
-                "brand": part_data.get("brand"),
-                "price": float(part_data.get("price", "0").replace("$", "").strip() or 0),
-                "availability": part_data.get("availability"),
-                "productDescription": part_data.get("product_description"),
-                "productUrl": part_data.get("product_url"),
-                "youtubeVideoUrl": part_data.get("youtube_video_url"),
-                "compatibleModels": part_data.get("compatible_models"),
-                "sourcePage": part_data.get("source_page")
-            }
+            transformed_data = transform_part(part_data)
 
             # Create object using v4 API
-            part_collection = self.client.collections.get("Parts")
+            part_collection = self._collection("Parts")
             part_collection.data.insert(transformed_data)
+            self.catalog.upsert(transformed_data)
+            self.keywords.upsert("Parts", transformed_data)
             return True
         except Exception as e:
             print(f"Error adding part: {e}")
@@ -170,22 +368,10 @@ class VectorDB:
             return False
 
         try:
-            # Ensure parts is a list
-            if isinstance(repair_data.get("parts"), str):
-                repair_data["parts"] = [repair_data["parts"]]
-            elif not isinstance(repair_data.get("parts"), list):
-                repair_data["parts"] = []
-
-            # Convert percentage to float if it exists
-            if "percentage" in repair_data:
-                try:
-                    repair_data["percentage"] = float(
-                        repair_data["percentage"])
-                except (ValueError, TypeError):
-                    repair_data["percentage"] = 0.0
-
-            repair_collection = self.client.collections.get("Repairs")
-            repair_collection.data.insert(repair_data)
+            repair_collection = self._collection("Repairs")
+            transformed_data = transform_repair(repair_data)
+            repair_collection.data.insert(transformed_data)
+            self.keywords.upsert("Repairs", transformed_data)
             return True
         except Exception as e:
             print(f"Error adding repair: {e}")
@@ -197,35 +383,178 @@ class VectorDB:
             return False
 
         try:
-            blog_collection = self.client.collections.get("Blogs")
-            blog_collection.data.insert(blog_data)
+            blog_collection = self._collection("Blogs")
+            transformed_data = transform_blog(blog_data)
+            blog_collection.data.insert(transformed_data)
+            self.keywords.upsert("Blogs", transformed_data)
             return True
         except Exception as e:
             print(f"Error adding blog: {e}")
             return False
 
+    def bulk_load(self, rows, kind: str, batch_size: int = None, concurrency: int = 2,
+                  checkpoint_path: str = None, flush_every: int = 1000):
+        """Stream rows (dicts) into a collection using Weaviate batching.
+
+        kind is one of "parts", "repairs", "blogs". With batch_size=None the
+        client's dynamic batching sizes requests itself; otherwise fixed-size
+        batches are sent with `concurrency` requests in flight. Every
+        flush_every rows the batcher is flushed; when a checkpoint_path is
+        given, the rows Weaviate acknowledged up to the first one it rejected
+        are saved there, and a rerun resumes after them. Object UUIDs derive
+        from each document's identity (or its content, for rows without one),
+        so rows sent again are overwritten, not duplicated. The local catalog
+        and keyword indexes only take rows Weaviate acknowledged.
+        """
+        if not self.client:
+            raise RuntimeError("Weaviate client is not connected")
+        if kind not in BULK_KINDS:
+            raise ValueError(f"Unknown kind '{kind}', expected one of {list(BULK_KINDS)}")
+
+        collection_name, transform = BULK_KINDS[kind]
+        collection = self._collection(collection_name)
+        start_row = _read_checkpoint(checkpoint_path)
+        if start_row:
+            print(f"Resuming {kind} load after row {start_row}")
+
+        stats = {"rows": start_row, "inserted": 0, "failed": 0, "failed_rows": []}
+        started = time.monotonic()
+        # First row Weaviate rejected; the checkpoint never moves past it
+        first_rejected = None
+
+        remaining = itertools.islice(enumerate(rows, 1), start_row, None)
+        while True:
+            chunk = list(itertools.islice(remaining, max(1, flush_every)))
+            if not chunk:
+                break
+
+            sent = {}  # object uuid -> (row number, properties)
+            if batch_size:
+                batcher = collection.batch.fixed_size(
+                    batch_size=batch_size, concurrent_requests=concurrency)
+            else:
+                batcher = collection.batch.dynamic()
+            with batcher as batch:
+                for row_number, row in chunk:
+                    stats["rows"] = row_number
+                    try:
+                        properties = transform(row)
+                    except Exception as e:
+                        stats["failed"] += 1
+                        stats["failed_rows"].append({"row": row_number, "error": str(e)})
+                        continue
+
+                    object_id = batch.add_object(
+                        properties=properties, uuid=_object_uuid(collection_name, properties))
+                    sent[str(object_id)] = (row_number, properties)
+
+            # Leaving the context flushed the chunk; these rows Weaviate rejected
+            failed_objects = collection.batch.failed_objects
+            rejected_ids = set()
+            for failed in failed_objects:
+                object_id = str(failed.object_.uuid)
+                rejected_ids.add(object_id)
+                row_number = sent.get(object_id, (None, None))[0]
+                stats["failed"] += 1
+                stats["failed_rows"].append({
+                    "row": row_number,
+                    "properties": getattr(failed.object_, "properties", None),
+                    "error": failed.message
+                })
+                # Unmatched rejections hold the checkpoint at the start of the chunk
+                rejected = row_number or chunk[0][0]
+                if first_rejected is None or rejected < first_rejected:
+                    first_rejected = rejected
+            stats["inserted"] += len(sent) - len(failed_objects)
+
+            # Acknowledged rows only; one copy-and-publish of the keyword index per chunk
+            acknowledged = [properties for object_id, (_, properties) in sent.items()
+                            if object_id not in rejected_ids]
+            if kind == "parts":
+                for properties in acknowledged:
+                    self.catalog.upsert(properties)
+            self.keywords.upsert_many(collection_name, acknowledged)
+
+            _write_checkpoint(checkpoint_path, first_rejected - 1 if first_rejected else chunk[-1][0])
+            elapsed = time.monotonic() - started
+            print(f"{kind}: {stats['rows']} rows, {stats['inserted'] / elapsed:.0f} rows/s, "
+                  f"{stats['failed']} failed")
+
+        if first_rejected:
+            print(f"{kind}: checkpoint held at row {first_rejected - 1}; a rerun resends the rejected rows")
+        stats["seconds"] = time.monotonic() - started
+        stats["rows_per_second"] = stats["inserted"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(f"{kind}: loaded {stats['inserted']} objects in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_second']:.0f} rows/s), {stats['failed']} failed")
+        return stats
+
+    @staticmethod
+    def is_part_id(query: str) -> bool:
+        """Common part ID patterns (PS..., WP..., W10...)"""
+        return len(query) > 5 and query.upper().startswith(('PS', 'WP', 'W10'))
+
+    def _keyword_search(self, collection: str, query: str, limit: int, where: dict = None):
+        """BM25 (score, properties) hits, and whether they answer the query on their own"""
+        if not (HYBRID_SEARCH_ENABLED and self.keywords.ready):
+            return [], False
+        ranked, coverage = self.keywords.search(collection, query, limit, where)
+        # Natural-language queries ("dishwasher not draining") always get near_text too
+        local = bool(ranked) and coverage == 1.0 and any(map(is_identifier, tokenize(query)))
+        if local:
+            self.keywords.count("local_answers")
+        return ranked, local
+
+    def _engine_ready(self) -> bool:
+        return self.engine is not None and self.engine.ready
+
+    def _embedded_search(self, collection: str, query: str, limit: int, where: dict = None):
+        """(score, properties) pairs from the local vector snapshot, or None to ask Weaviate"""
+        if self.engine is None:
+            return None
+        return self.engine.search(collection, query, limit, where)
+
+    def _fuse(self, collection: str, vector_hits: list, keyword_hits: list, limit: int) -> list:
+        """Reciprocal rank fusion of near_text and BM25 results"""
+        if not keyword_hits:
+            return vector_hits[:limit]
+        self.keywords.count("fused")
+        return rrf_fuse([vector_hits, keyword_hits], lambda props: document_key(collection, props), limit)
+
+    @instrument(VECTORDB_SECONDS, method="search_parts")
     def search_parts(self, query: str, limit: int = 5):
         """Search for parts using semantic search - optimized with caching"""
-        if not self.client:
+        limit = clamp_limit(limit)
+        # "ps-11752778" and "PS11752778" are the same part, and the same cache key
+        canonical = canonical_query(query)
+        # Exact part numbers are answered from the local catalog index
+        if self.catalog.ready and self.is_part_id(canonical):
+            part = self.catalog.get(canonical)
+            return {"data": {"Get": {"Part": [part] if part else []}}}
+
+        keyword_hits, local = ([], False) if self.is_part_id(canonical) else \
+            self._keyword_search("Parts", query, min(limit, 3))
+        keyword_hits = [properties for _, properties in keyword_hits]
+        if local:
+            return {"data": {"Get": {"Part": keyword_hits}}}
+
+        if not self.client and not self._engine_ready():
             return None
 
-        # Check cache first using SimpleCache
-        cache_key = self.cache._generate_key("search_parts", query, limit)
-        cached_result = self.cache.get(cache_key)
-        if cached_result:
-            return cached_result
+        cache_key = self.cache._generate_key("search_parts", canonical, limit)
+        return self._cached(cache_key, lambda: self._search_parts(query, limit, cache_key, keyword_hits))
 
+    def _search_parts(self, query: str, limit: int, cache_key: str, keyword_hits=()):
         try:
-            part_collection = self.client.collections.get("Parts")
-
             # First try exact match by partId (fastest query) - case insensitive
-            if len(query) > 5 and query.upper().startswith(('PS', 'WP', 'W10')):  # Common part ID patterns
-                # Convert query to uppercase for case-insensitive matching
-                upper_query = query.upper()
-                exact_matches = part_collection.query.fetch_objects(
-                    filters=Filter.by_property("partId").equal(upper_query),
-                    limit=1
-                )
+            part_id = canonical_query(query)
+            if self.is_part_id(part_id):
+                part_collection = self._collection("Parts")
+                # Filter on the canonical ID the cache key is built from, not the raw spelling
+                exact_matches = self._query(lambda: part_collection.query.fetch_objects(
+                    filters=Filter.by_property("partId").equal(part_id),
+                    limit=1,
+                    return_properties=PART_CARD_PROPERTIES
+                ))
                 if exact_matches.objects:
                     result = {
                         "data": {"Get": {"Part": [obj.properties for obj in exact_matches.objects]}}}
@@ -239,168 +568,301 @@ class VectorDB:
                 return result
 
             # For non-part-number queries, do semantic search
-            results = part_collection.query.near_text(
-                query=query,
-                limit=min(limit, 3)  # Cap at 3 results for faster response
-            )
-            result = {
-                "data": {"Get": {"Part": [obj.properties for obj in results.objects]}}}
+            hits = self._embedded_search("Parts", query, min(limit, 3))
+            if hits is None:
+                results = self._query(lambda: self._collection("Parts").query.near_text(
+                    query=query,
+                    limit=min(limit, 3),  # Cap at 3 results for faster response
+                    return_properties=PART_CARD_PROPERTIES
+                ))
+                hits = [(None, obj.properties) for obj in results.objects]
+            parts = self._fuse("Parts", [properties for _, properties in hits],
+                               list(keyword_hits), min(limit, 3))
+            result = {"data": {"Get": {"Part": parts}}}
             self.cache.set(cache_key, result)
             return result
         except Exception as e:
             print(f"Error searching parts: {e}")
-            return None
+            stale = self.cache.get_stale(cache_key)
+            if stale:
+                return stale
+            # BM25 hits still answer when Weaviate is unavailable
+            return {"data": {"Get": {"Part": list(keyword_hits)}}} if keyword_hits else None
 
+    @instrument(VECTORDB_SECONDS, method="search_repairs")
     def search_repairs(self, query: str, product: str = None, limit: int = 5):
         """Search repair data by symptom or description"""
-        if not self.client:
+        limit = clamp_limit(limit)
+        keyword_hits, local = self._keyword_search("Repairs", query, limit, {"product": product})
+        keyword_hits = [properties for _, properties in keyword_hits]
+        if local:
+            return {"data": {"Get": {"Repair": keyword_hits}}}
+
+        if not self.client and not self._engine_ready():
             return None
 
+        cache_key = self.cache._generate_key(
+            "search_repairs", canonical_query(query), product, limit)
+        return self._cached(
+            cache_key, lambda: self._search_repairs(query, product, limit, cache_key, keyword_hits))
+
+    def _search_repairs(self, query: str, product: str, limit: int, cache_key: str, keyword_hits=()):
         try:
-            repair_collection = self.client.collections.get("Repairs")
+            hits = self._embedded_search("Repairs", query, limit, {"product": product})
+            if hits is None:
+                repair_collection = self._collection("Repairs")
 
-            if product:
-                results = repair_collection.query.near_text(
+                results = self._query(lambda: repair_collection.query.near_text(
                     query=query,
-                    filters=Filter.by_property("product").equal(product),
-                    limit=limit
-                )
-            else:
-                results = repair_collection.query.near_text(
-                    query=query,
-                    limit=limit
-                )
-
-            return {"data": {"Get": {"Repair": [obj.properties for obj in results.objects]}}}
+                    filters=Filter.by_property("product").equal(product) if product else None,
+                    limit=limit,
+                    return_properties=REPAIR_PROPERTIES
+                ))
+                hits = [(None, obj.properties) for obj in results.objects]
+
+            repairs = self._fuse("Repairs", [properties for _, properties in hits],
+                                 list(keyword_hits), limit)
+            result = {"data": {"Get": {"Repair": repairs}}}
+            self.cache.set(cache_key, result)
+            return result
         except Exception as e:
             print(f"Error searching repairs: {e}")
-            return None
+            stale = self.cache.get_stale(cache_key)
+            if stale:
+                return stale
+            return {"data": {"Get": {"Repair": list(keyword_hits)}}} if keyword_hits else None
 
+    @instrument(VECTORDB_SECONDS, method="search_blogs")
     def search_blogs(self, query: str, category: str = None, content_type: str = None, limit: int = 5):
         """Search blog data by title or content - optimized"""
-        if not self.client:
+        limit = clamp_limit(limit)
+        keyword_hits, local = self._keyword_search(
+            "Blogs", query, limit, {"category": category, "content_type": content_type})
+        keyword_hits = [self._blog_result(properties, score) for score, properties in keyword_hits]
+        if local:
+            return {"data": {"Get": {"Blog": keyword_hits}}}
+
+        if not self.client and not self._engine_ready():
             return None
 
         try:
-            blog_collection = self.client.collections.get("Blogs")
-
-            # Optimized: Start with smaller result set for faster processing
-            response = blog_collection.query.near_text(
+            # The local snapshot filters exactly, no over-fetch needed
+            hits = self._embedded_search(
+                "Blogs", query, limit, {"category": category, "content_type": content_type})
+            if hits is not None:
+                results = [self._blog_result(properties, score) for score, properties in hits]
+                return {"data": {"Get": {"Blog": self._fuse("Blogs", results, keyword_hits, limit)}}}
+
+            blog_collection = self._collection("Blogs")
+
+            # Filters run in Weaviate, so exactly `limit` objects come back
+            conditions = [Filter.by_property(name).equal(value)
+                          for name, value in (("category", category), ("content_type", content_type))
+                          if value]
+            response = self._query(lambda: blog_collection.query.near_text(
                 query=query,
-                limit=min(limit * 2, 20),  # Reduced from 100
+                limit=limit,
+                filters=Filter.all_of(conditions) if conditions else None,
+                return_properties=BLOG_PROPERTIES,
                 return_metadata=MetadataQuery(score=True)
-            )
+            ))
 
-            results = []
-            for obj in response.objects:
-                # Fast filtering - break early when we have enough results
-                if len(results) >= limit:
-                    break
-
-                # Apply filters if specified (simplified logic)
-                if category and obj.properties.get("category") != category:
-                    continue
-                if content_type and obj.properties.get("content_type") != content_type:
-                    continue
-
-                results.append({
-                    "title": obj.properties.get("title"),
-                    "url": obj.properties.get("url"),
-                    "category": obj.properties.get("category"),
-                    "content_type": obj.properties.get("content_type"),
-                    "score": obj.metadata.score if obj.metadata else None
-                })
+            results = [self._blog_result(obj.properties, obj.metadata.score if obj.metadata else None)
+                       for obj in response.objects]
 
-            return {"data": {"Get": {"Blog": results}}}
+            return {"data": {"Get": {"Blog": self._fuse("Blogs", results, keyword_hits, limit)}}}
         except Exception as e:
             print(f"Error searching blogs: {e}")
-            return None
-
+            return {"data": {"Get": {"Blog": keyword_hits}}} if keyword_hits else None
+
+    @staticmethod
+    def _blog_result(properties: dict, score=None) -> dict:
+        return {
+            "title": properties.get("title"),
+            "url": properties.get("url"),
+            "category": properties.get("category"),
+            "content_type": properties.get("content_type"),
+            "score": score
+        }
+
+    @instrument(VECTORDB_SECONDS, method="get_part_by_id")
     def get_part_by_id(self, part_id: str):
         """Get a specific part by its ID"""
+        if self.catalog.ready:
+            part = self.catalog.get(part_id)
+            return {"data": {"Get": {"Part": [part] if part else []}}}
+
         if not self.client:
             return None
 
         try:
-            part_collection = self.client.collections.get("Parts")
+            part_collection = self._collection("Parts")
             # Convert part_id to uppercase for case-insensitive matching
             upper_part_id = part_id.upper()
-            results = part_collection.query.fetch_objects(
+            results = self._query(lambda: part_collection.query.fetch_objects(
                 filters=Filter.by_property("partId").equal(upper_part_id),
-                limit=1
-            )
+                limit=1,
+                return_properties=PART_CARD_PROPERTIES
+            ))
             return {"data": {"Get": {"Part": [obj.properties for obj in results.objects]}}}
         except Exception as e:
             print(f"Error getting part: {e}")
             return None
 
-    def find_compatible_parts(self, model_number: str):
-        """Find parts compatible with a specific model number"""
-        if not self.client:
-            return None
-
-        try:
-            part_collection = self.client.collections.get("Parts")
-            results = part_collection.query.fetch_objects(
-                filters=Filter.by_property(
-                    "compatibleModels").like(f"*{model_number}*")
-            )
-            return {"data": {"Get": {"Part": [obj.properties for obj in results.objects]}}}
-        except Exception as e:
-            print(f"Error finding compatible parts: {e}")
-            return None
+    @instrument(VECTORDB_SECONDS, method="find_compatible_parts")
+    def find_compatible_parts(self, model_number: str, limit: int = 20, cursor: str = None):
+        """Find parts compatible with a specific model number.
+
+        Returns one page of at most `limit` parts; pass the returned
+        next_cursor (None on the last page) to get the next one.
+        """
+        limit = clamp_limit(limit)
+        offset = decode_offset_cursor(cursor)
+
+        # Inverted model -> partIds index instead of a wildcard scan. It only
+        # knows whole model numbers, so partial ones ("WDT780") still get the
+        # substring match below
+        indexed = self.catalog.parts_for_models(model_number) if self.catalog.ready else []
+        if indexed:
+            parts = indexed[offset:offset + limit + 1]
+        else:
+            if not self.client:
+                return {"data": {"Get": {"Part": []}}, "next_cursor": None} if self.catalog.ready else None
 
+            try:
+                part_collection = self._collection("Parts")
+                # One extra object tells whether another page exists
+                results = self._query(lambda: part_collection.query.fetch_objects(
+                    filters=Filter.by_property(
+                        "compatibleModels").like(f"*{model_number}*"),
+                    limit=limit + 1,
+                    offset=offset,
+                    return_properties=PART_LIST_PROPERTIES
+                ))
+                parts = [obj.properties for obj in results.objects]
+            except Exception as e:
+                print(f"Error finding compatible parts: {e}")
+                return None
+
+        next_cursor = encode_offset_cursor(offset + limit) if len(parts) > limit else None
+        return {"data": {"Get": {"Part": parts[:limit]}}, "next_cursor": next_cursor}
+
+    @instrument(VECTORDB_SECONDS, method="check_part_compatibility")
     def check_part_compatibility(self, part_id: str, model_number: str):
         """Check if a specific part is compatible with a specific model number"""
+        if self.catalog.ready:
+            return self._compatibility_verdict(self.catalog.get(part_id), part_id, model_number)
+
         if not self.client:
             return None
 
         try:
-            part_collection = self.client.collections.get("Parts")
+            part_collection = self._collection("Parts")
 
             # Get the specific part first - case insensitive
             upper_part_id = part_id.upper()
-            part_results = part_collection.query.fetch_objects(
+            part_results = self._query(lambda: part_collection.query.fetch_objects(
                 filters=Filter.by_property("partId").equal(upper_part_id),
-                limit=1
-            )
+                limit=1,
+                return_properties=PART_COMPATIBILITY_PROPERTIES
+            ))
 
-            if not part_results.objects:
-                return {
-                    "compatible": False,
-                    "reason": f"Part {part_id} not found in our database",
-                    "part": None
-                }
-
-            part = part_results.objects[0].properties
-            compatible_models = part.get("compatibleModels", "")
-
-            # Check if Weaviate filtered the content
-            if "[FILTERED:" in compatible_models or "unsafe content" in compatible_models.lower():
-                return {
-                    "compatible": "unknown",
-                    "reason": f"I found part {part_id} ({part.get('partName', 'Unknown Part')}), but I can't check model compatibility right now due to a technical issue. Please contact our support team or check the manufacturer's website to verify if this part works with model {model_number}.",
-                    "part": part,
-                    "part_name": part.get('partName', 'Unknown Part'),
-                    "part_description": part.get('productDescription', ''),
-                    "support_needed": True
-                }
-
-            # Check if the model number is in the compatible models
-            if model_number.upper() in compatible_models.upper():
-                return {
-                    "compatible": True,
-                    "reason": f"Yes! Part {part_id} ({part.get('partName', 'Unknown Part')}) is compatible with model {model_number}",
-                    "part": part
-                }
-            else:
-                return {
-                    "compatible": False,
-                    "reason": f"No, part {part_id} ({part.get('partName', 'Unknown Part')}) is not compatible with model {model_number}",
-                    "part": part,
-                    "supported_models": compatible_models
-                }
+            part = part_results.objects[0].properties if part_results.objects else None
+            return self._compatibility_verdict(part, part_id, model_number)
 
         except Exception as e:
             print(f"Error checking part compatibility: {e}")
             return None
+
+    def _compatibility_verdict(self, part, part_id: str, model_number: str):
+        """Compatibility result for a looked-up part (or None if not found)"""
+        if not part:
+            return {
+                "compatible": False,
+                "reason": f"Part {part_id} not found in our database",
+                "part": None
+            }
+
+        compatible_models = part.get("compatibleModels", "")
+
+        # Check if Weaviate filtered the content
+        if "[FILTERED:" in compatible_models or "unsafe content" in compatible_models.lower():
+            return {
+                "compatible": "unknown",
+                "reason": f"I found part {part_id} ({part.get('partName', 'Unknown Part')}), but I can't check model compatibility right now due to a technical issue. Please contact our support team or check the manufacturer's website to verify if this part works with model {model_number}.",
+                "part": part,
+                "part_name": part.get('partName', 'Unknown Part'),
+                "part_description": part.get('productDescription', ''),
+                "support_needed": True
+            }
+
+        # Check if the model number is in the compatible models
+        if model_number.upper() in compatible_models.upper():
+            return {
+                "compatible": True,
+                "reason": f"Yes! Part {part_id} ({part.get('partName', 'Unknown Part')}) is compatible with model {model_number}",
+                "part": part
+            }
+        else:
+            return {
+                "compatible": False,
+                "reason": f"No, part {part_id} ({part.get('partName', 'Unknown Part')}) is not compatible with model {model_number}",
+                "part": part,
+                "supported_models": compatible_models
+            }
+
+
+class AsyncVectorDB:
+    """Non-blocking facade over VectorDB for use from async agents.
+
+    The Weaviate v4 client is synchronous, so each query runs on a bounded
+    thread pool and is awaited with a deadline. A query that misses its
+    deadline returns None (same as a failed query) while the event loop keeps
+    serving other chats.
+    """
+
+    def __init__(self, vectordb, max_workers=VECTORDB_MAX_WORKERS, timeout=VECTORDB_CALL_TIMEOUT):
+        self.vectordb = vectordb
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="vectordb")
+
+    async def _call(self, method, *args, timeout=None, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Carry the request context (trace spans) into the worker thread
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(
+            self.executor, functools.partial(context.run, method, *args, **kwargs))
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            print(f"VectorDB {method.__name__} timed out after {timeout or self.timeout}s")
+            return None
+
+    async def search_parts(self, query: str, limit: int = 5, timeout=None):
+        if self.vectordb.catalog.ready and self.vectordb.is_part_id(query):
+            # Local catalog lookup: no need for a worker thread
+            return self.vectordb.search_parts(query, limit)
+        return await self._call(self.vectordb.search_parts, query, limit, timeout=timeout)
+
+    async def search_repairs(self, query: str, product: str = None, limit: int = 5, timeout=None):
+        return await self._call(self.vectordb.search_repairs, query, product, limit, timeout=timeout)
+
+    async def search_blogs(self, query: str, category: str = None, content_type: str = None, limit: int = 5, timeout=None):
+        return await self._call(self.vectordb.search_blogs, query, category, content_type, limit, timeout=timeout)
+
+    async def get_part_by_id(self, part_id: str, timeout=None):
+        if self.vectordb.catalog.ready:
+            return self.vectordb.get_part_by_id(part_id)
+        return await self._call(self.vectordb.get_part_by_id, part_id, timeout=timeout)
+
+    async def find_compatible_parts(self, model_number: str, limit: int = 20, cursor: str = None, timeout=None):
+        # Inline only when the index answers; a miss falls back to a Weaviate substring scan
+        if self.vectordb.catalog.ready and self.vectordb.catalog.parts_for_models(model_number):
+            return self.vectordb.find_compatible_parts(model_number, limit, cursor)
+        return await self._call(self.vectordb.find_compatible_parts, model_number, limit, cursor, timeout=timeout)
+
+    async def check_part_compatibility(self, part_id: str, model_number: str, timeout=None):
+        if self.vectordb.catalog.ready:
+            return self.vectordb.check_part_compatibility(part_id, model_number)
+        return await self._call(self.vectordb.check_part_compatibility, part_id, model_number, timeout=timeout)
@@ -0,0 +1,326 @@
+import os
+import json
+import time
+import shutil
+import asyncio
+import threading
+from functools import lru_cache
+from datetime import datetime, timezone
+import numpy as np
+
+VECTOR_SNAPSHOT_DIR = os.getenv("VECTOR_SNAPSHOT_DIR", "./src/db/vector_snapshot")
+VECTOR_SNAPSHOT_KEEP = int(os.getenv("VECTOR_SNAPSHOT_KEEP", "3"))
+VECTOR_RELOAD_INTERVAL = float(os.getenv("VECTOR_RELOAD_INTERVAL", "30"))
+# Collections at least this large get an IVF (inverted file) index; smaller ones are scanned
+VECTOR_IVF_MIN_ROWS = int(os.getenv("VECTOR_IVF_MIN_ROWS", "50000"))
+VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+# Must be the model the collections are vectorized with (text2vec-weaviate default)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "Snowflake/snowflake-arctic-embed-l-v2.0")
+EMBEDDING_QUERY_PREFIX = os.getenv("EMBEDDING_QUERY_PREFIX", "query: ")
+
+COLLECTIONS = ("Parts", "Repairs", "Blogs")
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class LocalEmbedder:
+    """Query embeddings computed in-process (sentence-transformers, optional)"""
+
+    def __init__(self, model_name=EMBEDDING_MODEL, query_prefix=EMBEDDING_QUERY_PREFIX):
+        self.model_name = model_name
+        self.query_prefix = query_prefix
+        self._model = None
+        self._lock = threading.Lock()
+        self.available = True
+        self.embed_query = lru_cache(maxsize=4096)(self._embed_query)
+
+    def _load(self):
+        with self._lock:
+            if self._model is None and self.available:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name)
+                except Exception as e:
+                    print(f"Local embeddings unavailable ({e}), using Weaviate near_text")
+                    self.available = False
+        return self._model
+
+    def embed(self, texts: list, prefix: str = ""):
+        model = self._load()
+        if model is None:
+            return None
+        vectors = model.encode([prefix + text for text in texts], normalize_embeddings=True)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _embed_query(self, text: str):
+        vectors = self.embed([text], self.query_prefix)
+        return None if vectors is None else vectors[0]
+
+
+class CollectionSnapshot:
+    """One collection of a snapshot: mmap'd vectors plus a columnar property store.
+
+    Vectors are an N x D float32 matrix (unit length, so dot product is
+    cosine). Each property is a column of JSON-encoded cells: a blob of bytes
+    plus int64 offsets, both mmap'd, so a worker only decodes the rows it
+    returns. With IVF the rows are stored grouped by list and `lists` holds
+    each list's row range.
+    """
+
+    def __init__(self, path: str, name: str, meta: dict):
+        self.name = name
+        self.rows = meta["rows"]
+        self.dimensions = meta["dimensions"]
+        self.properties = meta["properties"]
+        self.vectors = np.memmap(os.path.join(path, f"{name}.f32"), dtype=np.float32, mode="r",
+                                 shape=(self.rows, self.dimensions))
+        self.columns = {}
+        for prop in self.properties:
+            blob_path = os.path.join(path, f"{name}.{prop}.bin")
+            blob = np.memmap(blob_path, dtype=np.uint8, mode="r") if os.path.getsize(blob_path) else b""
+            offsets = np.memmap(os.path.join(path, f"{name}.{prop}.idx"), dtype=np.int64, mode="r")
+            self.columns[prop] = (blob, offsets)
+        self.centroids = self.lists = None
+        if meta.get("ivf"):
+            self.centroids = np.load(os.path.join(path, f"{name}.centroids.npy"))
+            self.lists = np.load(os.path.join(path, f"{name}.lists.npy"))
+        self._decoded = {}
+
+    def cell(self, prop: str, row: int):
+        blob, offsets = self.columns[prop]
+        return json.loads(bytes(blob[offsets[row]:offsets[row + 1]]))
+
+    def row(self, row: int) -> dict:
+        return {prop: self.cell(prop, row) for prop in self.properties}
+
+    def column(self, prop: str) -> list:
+        """Whole column decoded once (used for filters on small categorical fields)"""
+        values = self._decoded.get(prop)
+        if values is None:
+            values = self._decoded[prop] = [self.cell(prop, row) for row in range(self.rows)]
+        return values
+
+    def _candidates(self, vector, nprobe):
+        """(row ids or None for all rows, scores)"""
+        if self.lists is None:
+            return None, self.vectors @ vector
+        probe = np.argsort(-(self.centroids @ vector))[:nprobe]
+        ranges = [(self.lists[i], self.lists[i + 1]) for i in probe]
+        row_ids = np.concatenate([np.arange(start, end) for start, end in ranges])
+        scores = np.concatenate([self.vectors[start:end] @ vector for start, end in ranges])
+        return row_ids, scores
+
+    def search(self, vector, limit: int, where: dict = None, nprobe: int = VECTOR_IVF_NPROBE):
+        """Top-k (score, properties) by dot product"""
+        row_ids, scores = self._candidates(vector, nprobe)
+        for prop, value in (where or {}).items():
+            if value is None:
+                continue
+            column = self.column(prop)
+            ids = row_ids if row_ids is not None else range(self.rows)
+            keep = np.fromiter((column[i] == value for i in ids), dtype=bool, count=len(scores))
+            scores = np.where(keep, scores, -np.inf)
+
+        k = min(limit, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        results = []
+        for index in top:
+            if scores[index] == -np.inf:
+                break
+            row = int(row_ids[index]) if row_ids is not None else int(index)
+            results.append((float(scores[index]), self.row(row)))
+        return results
+
+
+class Snapshot:
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest["version"]
+        self.collections = {name: CollectionSnapshot(path, name, meta)
+                            for name, meta in self.manifest["collections"].items()}
+
+
+def _kmeans(vectors, lists: int, iterations: int = 10, seed: int = 7, chunk: int = 65536):
+    """Spherical k-means; returns (centroids, list assignment per row)"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), lists, replace=False)].copy()
+    assignment = np.zeros(len(vectors), dtype=np.int32)
+    for _ in range(iterations):
+        for start in range(0, len(vectors), chunk):
+            assignment[start:start + chunk] = np.argmax(vectors[start:start + chunk] @ centroids.T, axis=1)
+        for i in range(lists):
+            members = vectors[assignment == i]
+            if len(members):
+                centroids[i] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32), assignment
+
+
+def write_snapshot(root: str, data: dict, model: str = EMBEDDING_MODEL,
+                   ivf_min_rows: int = VECTOR_IVF_MIN_ROWS, keep: int = VECTOR_SNAPSHOT_KEEP) -> str:
+    """Write {collection: (vectors, [properties])} as a new snapshot version.
+
+    The version directory is complete before CURRENT is switched to it
+    (atomic rename), so readers never see a partial snapshot.
+    """
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    path = os.path.join(root, version)
+    os.makedirs(path)
+    manifest = {"version": version, "model": model, "collections": {}}
+
+    for name, (vectors, rows) in data.items():
+        if not rows:
+            # Not in the snapshot: searches on it go to Weaviate
+            continue
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(rows), -1))
+        order = np.arange(len(rows))
+        meta = {"rows": len(rows), "dimensions": int(vectors.shape[1]), "ivf": None}
+        if len(rows) >= ivf_min_rows:
+            lists = max(1, int(np.sqrt(len(rows))))
+            centroids, assignment = _kmeans(vectors, lists)
+            order = np.argsort(assignment, kind="stable")
+            bounds = np.searchsorted(assignment[order], np.arange(lists + 1))
+            np.save(os.path.join(path, f"{name}.centroids.npy"), centroids)
+            np.save(os.path.join(path, f"{name}.lists.npy"), bounds.astype(np.int64))
+            meta["ivf"] = {"lists": lists}
+
+        vectors[order].tofile(os.path.join(path, f"{name}.f32"))
+        properties = sorted({prop for row in rows for prop in row})
+        for prop in properties:
+            offsets, blob = [0], bytearray()
+            for index in order:
+                blob += json.dumps(rows[index].get(prop), default=str).encode("utf-8")
+                offsets.append(len(blob))
+            with open(os.path.join(path, f"{name}.{prop}.bin"), "wb") as f:
+                f.write(blob)
+            np.asarray(offsets, dtype=np.int64).tofile(os.path.join(path, f"{name}.{prop}.idx"))
+        meta["properties"] = properties
+        manifest["collections"][name] = meta
+
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f)
+    pointer = os.path.join(root, "CURRENT.tmp")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(root, "CURRENT"))
+
+    # Older versions stay on disk briefly for workers that still map them
+    versions = sorted(d for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+    for old in versions[:-keep]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return path
+
+
+def export_snapshot(client, root: str = VECTOR_SNAPSHOT_DIR, embedder: LocalEmbedder = None,
+                    text_fields: dict = None) -> str:
+    """Export every collection's vectors and properties from Weaviate.
+
+    Uses the stored Weaviate vectors, or re-embeds the text_fields of each
+    object locally when an embedder is given.
+    """
+    data = {}
+    for name in COLLECTIONS:
+        if not client.collections.exists(name):
+            continue
+        rows, vectors = [], []
+        for obj in client.collections.get(name).iterator(include_vector=embedder is None):
+            rows.append(obj.properties)
+            if embedder is None:
+                vector = obj.vector.get("default") if isinstance(obj.vector, dict) else obj.vector
+                vectors.append(vector)
+        if embedder is not None and rows:
+            fields = (text_fields or {}).get(name) or sorted(rows[0])
+            texts = [" ".join(str(row.get(field) or "") for field in fields) for row in rows]
+            vectors = embedder.embed(texts)
+        data[name] = (vectors, rows)
+        print(f"Exported {len(rows)} {name.lower()}")
+    return write_snapshot(root, data, embedder.model_name if embedder else EMBEDDING_MODEL)
+
+
+class VectorEngine:
+    """Embedded vector search over the latest on-disk snapshot.
+
+    Every uvicorn worker maps the same snapshot files, so the OS page cache
+    holds one copy of the vectors. A new snapshot is picked up by reload()
+    (polled by keep_fresh) and swapped in atomically; in-flight searches
+    finish on the snapshot they started with.
+    """
+
+    def __init__(self, root=VECTOR_SNAPSHOT_DIR, embedder=None):
+        self.root = root
+        self.embedder = embedder or LocalEmbedder()
+        self.snapshot = None
+        self.stats = {"searches": 0, "fallbacks": 0, "reloads": 0, "search_seconds": 0.0}
+
+    @property
+    def ready(self) -> bool:
+        return self.snapshot is not None and self.embedder.available
+
+    def reload(self) -> bool:
+        """Map the CURRENT snapshot if it changed; returns True when swapped"""
+        try:
+            with open(os.path.join(self.root, "CURRENT")) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return False
+        if self.snapshot and self.snapshot.version == version:
+            return False
+
+        snapshot = Snapshot(os.path.join(self.root, version))
+        if snapshot.manifest.get("model") != self.embedder.model_name:
+            print(f"Vector snapshot {version} was built with {snapshot.manifest.get('model')}, "
+                  f"not {self.embedder.model_name}; ignoring it")
+            return False
+        self.snapshot = snapshot
+        self.stats["reloads"] += 1
+        print(f"Vector snapshot {version} loaded: " + ", ".join(
+            f"{c.rows} {name.lower()}" for name, c in snapshot.collections.items()))
+        return True
+
+    async def keep_fresh(self, interval=VECTOR_RELOAD_INTERVAL):
+        """Initial load (and embedding model warm-up), then poll for new snapshots"""
+        await asyncio.to_thread(self.embedder.embed_query, "warm up")
+        while True:
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                print(f"Vector snapshot reload error: {e}")
+            await asyncio.sleep(interval)
+
+    def search(self, collection: str, query: str, limit: int = 5, where: dict = None):
+        """(score, properties) pairs, or None when Weaviate has to answer"""
+        snapshot = self.snapshot
+        if snapshot is None or collection not in snapshot.collections or not self.embedder.available:
+            self.stats["fallbacks"] += 1
+            return None
+
+        started = time.perf_counter()
+        vector = self.embedder.embed_query(query)
+        if vector is None:
+            self.stats["fallbacks"] += 1
+            return None
+        results = snapshot.collections[collection].search(vector, limit, where)
+        self.stats["searches"] += 1
+        self.stats["search_seconds"] += time.perf_counter() - started
+        return results
+
+    def get_stats(self):
+        searches = self.stats["searches"] or 1
+        return {
+            "ready": self.ready,
+            "version": self.snapshot.version if self.snapshot else None,
+            "model": self.embedder.model_name,
+            "collections": {name: {"rows": c.rows, "ivf": c.lists is not None}
+                            for name, c in self.snapshot.collections.items()} if self.snapshot else {},
+            **self.stats,
+            "avg_search_ms": self.stats["search_seconds"] / searches * 1000,
+        }
@@ -0,0 +1,210 @@
+import os
+import re
+import math
+import time
+import asyncio
+from collections import deque
+from src.services.router import ORDER_ID_RE
+from src.services.speculation import ORDER_RE, predict_tool
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Chat requests processed at once; the rest wait in per-class queues
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "24"))
+ADMISSION_QUEUE_LIMIT = int(os.getenv("ADMISSION_QUEUE_LIMIT", "64"))
+# In-flight plus queued chat requests per client (0 disables the cap). Behind a
+# proxy every request shares its address, so list it in ADMISSION_TRUSTED_PROXIES
+ADMISSION_USER_LIMIT = int(os.getenv("ADMISSION_USER_LIMIT", "0"))
+# Peers whose X-Forwarded-For names the real client
+ADMISSION_TRUSTED_PROXIES = frozenset(
+    address.strip() for address in os.getenv("ADMISSION_TRUSTED_PROXIES", "").split(",") if address.strip())
+# Longest acceptable queue wait (seconds) per class, "class:seconds,..."
+ADMISSION_BUDGETS = dict(
+    (name.strip(), float(seconds)) for name, seconds in
+    (item.split(":") for item in os.getenv(
+        "ADMISSION_BUDGETS", "orders:20,parts:8,troubleshoot:8,general:8,blogs:5").split(",") if item.strip()))
+
+# Request classes by tool route, highest priority first; "general" is anything
+# the keyword rules can't place
+CLASSES = ("orders", "parts", "troubleshoot", "general", "blogs")
+TOOL_CLASSES = {
+    "place_order": "orders", "cancel_order": "orders", "check_order_status": "orders", "list_orders": "orders",
+    "search_parts": "parts", "check_compatibility": "parts", "get_installation_steps": "parts",
+    "troubleshoot_issue": "troubleshoot", "search_repairs": "troubleshoot",
+    "search_blogs": "blogs",
+}
+BLOG_RE = re.compile(r"\b(blogs?|articles?|tips|maintenance)\b", re.IGNORECASE)
+
+
+def request_class(message: str) -> str:
+    """Likely tool route of a chat message, decided before the LLM sees it"""
+    if ORDER_RE.search(message) or ORDER_ID_RE.search(message):
+        return "orders"
+    prediction = predict_tool(message)
+    if prediction:
+        return TOOL_CLASSES[prediction[0]]
+    return "blogs" if BLOG_RE.search(message) else "general"
+
+
+def client_key(peer: str, forwarded_for: str = None, trusted_proxies=ADMISSION_TRUSTED_PROXIES) -> str:
+    """Client identity for the per-client cap.
+
+    X-Forwarded-For is only believed when the direct peer is a trusted
+    proxy; the client is then the right-most address no trusted proxy added.
+    """
+    if peer not in trusted_proxies or not forwarded_for:
+        return peer
+    hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if hop not in trusted_proxies:
+            return hop
+    return hops[0] if hops else peer
+
+
+class AdmissionRejected(Exception):
+    """Request shed; answer 429 with Retry-After"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class AdmissionController:
+    """Priority admission in front of the chat pipeline.
+
+    At most max_concurrency requests run; the rest wait in bounded per-class
+    queues and a freed slot always goes to the highest-priority class
+    waiting (orders first). A request is rejected up front when its queue
+    is full, its client already has user_limit requests open (if set), or the
+    estimated wait exceeds the class budget, and rejected later if it is
+    still queued when the budget runs out. Runs on the event loop only.
+    """
+
+    def __init__(self, enabled=ADMISSION_ENABLED, max_concurrency=ADMISSION_MAX_CONCURRENCY,
+                 queue_limit=ADMISSION_QUEUE_LIMIT, user_limit=ADMISSION_USER_LIMIT, budgets=None):
+        self.enabled = enabled
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_limit = queue_limit
+        self.user_limit = user_limit
+        self.budgets = {name: (budgets or ADMISSION_BUDGETS).get(name, 10.0) for name in CLASSES}
+        self.queues = {name: deque() for name in CLASSES}
+        self.in_flight = 0
+        self.users = {}
+        # Moving average of request duration, for wait estimates
+        self.service_time = 1.0
+        self.stats = {name: {"admitted": 0, "queued": 0, "queue_full": 0, "over_budget": 0,
+                             "user_limit": 0, "expired": 0, "wait_total_s": 0.0}
+                      for name in CLASSES}
+
+    def estimated_wait(self, request_class: str) -> float:
+        """Seconds until a new request of this class would get a slot"""
+        if self.in_flight < self.max_concurrency and not any(self.queues.values()):
+            return 0.0
+        rank = CLASSES.index(request_class)
+        ahead = sum(len(self.queues[name]) for name in CLASSES[:rank + 1])
+        return (ahead + 1) * self.service_time / self.max_concurrency
+
+    async def acquire(self, request_class: str, user: str):
+        """Wait for a slot; returns a ticket for release() or raises AdmissionRejected"""
+        if not self.enabled:
+            return None
+        stats = self.stats[request_class]
+        if self.user_limit and self.users.get(user, 0) >= self.user_limit:
+            stats["user_limit"] += 1
+            raise AdmissionRejected("too many concurrent requests from this client", self.service_time)
+
+        budget = self.budgets[request_class]
+        queued = time.monotonic()
+        wait = self.estimated_wait(request_class)
+        if wait > 0:
+            if len(self.queues[request_class]) >= self.queue_limit:
+                stats["queue_full"] += 1
+                raise AdmissionRejected(f"{request_class} queue is full", wait)
+            if wait > budget:
+                stats["over_budget"] += 1
+                raise AdmissionRejected(f"{request_class} queue exceeds its {budget:g}s budget", wait)
+
+        self.users[user] = self.users.get(user, 0) + 1
+        try:
+            if wait > 0:
+                stats["queued"] += 1
+                await self._wait_turn(request_class, budget)
+            else:
+                self.in_flight += 1
+        except BaseException:
+            self._leave(user)
+            raise
+
+        # wait_for (3.11) returns the handed-over slot even when this task was
+        # cancelled at the same moment, and the caller never gets the ticket:
+        # give the slot back instead of leaking it
+        task = asyncio.current_task()
+        if task is not None and task.cancelling():
+            self._leave(user)
+            self._release_slot()
+            raise asyncio.CancelledError()
+
+        stats["admitted"] += 1
+        stats["wait_total_s"] += time.monotonic() - queued
+        return {"class": request_class, "user": user, "started": time.monotonic()}
+
+    async def _wait_turn(self, request_class: str, budget: float):
+        turn = asyncio.get_running_loop().create_future()
+        self.queues[request_class].append(turn)
+        try:
+            await asyncio.wait_for(asyncio.shield(turn), budget)
+        except asyncio.TimeoutError:
+            if not turn.done():
+                self.queues[request_class].remove(turn)
+                turn.cancel()
+                self.stats[request_class]["expired"] += 1
+                raise AdmissionRejected(f"{request_class} queue wait exceeded {budget:g}s", budget)
+        except asyncio.CancelledError:
+            # Client went away: give the slot on if it was already handed over
+            if turn.done() and not turn.cancelled():
+                self._release_slot()
+            else:
+                self.queues[request_class].remove(turn)
+                turn.cancel()
+            raise
+
+    def release(self, ticket):
+        """Give back a ticket's slot; releasing the same ticket again is a no-op"""
+        if not ticket or ticket.get("released"):
+            return
+        ticket["released"] = True
+        duration = time.monotonic() - ticket["started"]
+        self.service_time = 0.9 * self.service_time + 0.1 * duration
+        self._leave(ticket["user"])
+        self._release_slot()
+
+    def _leave(self, user: str):
+        remaining = self.users.get(user, 1) - 1
+        if remaining > 0:
+            self.users[user] = remaining
+        else:
+            self.users.pop(user, None)
+
+    def _release_slot(self):
+        """Hand the freed slot straight to the highest-priority waiter"""
+        for name in CLASSES:
+            queue = self.queues[name]
+            while queue:
+                turn = queue.popleft()
+                if not turn.done():
+                    turn.set_result(None)
+                    return
+        self.in_flight -= 1
+
+    def get_stats(self):
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "service_time_s": round(self.service_time, 3),
+            "users": len(self.users),
+            "classes": {name: {**self.stats[name], "queued_now": len(self.queues[name]),
+                               "budget_s": self.budgets[name],
+                               "estimated_wait_s": round(self.estimated_wait(name), 3)}
+                        for name in CLASSES},
+        }
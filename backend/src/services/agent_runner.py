@@ -1,12 +1,18 @@
-from src.db.db_init import orderdb, vectordb
+import os
+import asyncio
+from src.db.db_init import orderdb, async_vectordb
 from src.agents.orderAgent import OrderAgent
 from src.agents.partAgent import PartAgent
 from src.agents.troubleAgent import TroubleAgent
+from src.services.metrics import STAGE_SECONDS, timed
+
+# Per-tool deadline (seconds) when several tool calls run concurrently
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "15"))
 
 # Initialize agents once at module level (singleton pattern)
-part_agent = PartAgent(vectordb)
+part_agent = PartAgent(async_vectordb)
 order_agent = OrderAgent(orderdb)
-trouble_agent = TroubleAgent(vectordb)
+trouble_agent = TroubleAgent(async_vectordb)
 
 TOOL_ROUTES = {
     "search_parts": part_agent,
@@ -18,8 +24,19 @@ TOOL_ROUTES = {
     "place_order": order_agent,
     "check_order_status": order_agent,
     "cancel_order": order_agent,
+    "list_orders": order_agent,
 }
 
+# Tools over the requesting user's own data: user_id comes from the request, never the LLM
+USER_SCOPED_TOOLS = {"list_orders"}
+
+
+def scope_to_user(calls: list, user_id: str):
+    """Set the request's user_id on every user-scoped (function_name, arguments) call"""
+    for function_name, arguments in calls:
+        if function_name in USER_SCOPED_TOOLS:
+            arguments["user_id"] = user_id
+
 
 async def handle_tool_call(function_name: str, arguments: dict):
     agent = TOOL_ROUTES.get(function_name)
@@ -30,7 +47,8 @@ async def handle_tool_call(function_name: str, arguments: dict):
         return {"error": "Missing arguments"}
 
     try:
-        result = await agent.run(function_name, arguments)
+        with timed(STAGE_SECONDS, stage="tool_dispatch", tool=function_name):
+            result = await agent.run(function_name, arguments)
 
         if not result:
             return {"message": "No results found"}
@@ -39,3 +57,25 @@ async def handle_tool_call(function_name: str, arguments: dict):
     except Exception as e:
         print(f"Tool execution error: {e}")
         return {"error": "Tool execution failed"}
+
+
+async def run_tool_call(function_name: str, arguments: dict, timeout: float = TOOL_CALL_TIMEOUT):
+    """handle_tool_call with its own deadline"""
+    try:
+        return await asyncio.wait_for(handle_tool_call(function_name, arguments), timeout)
+    except asyncio.TimeoutError:
+        print(f"Tool {function_name} timed out after {timeout}s")
+        return {"error": "Tool timed out", "message": f"{function_name} took too long. Please try again."}
+
+
+async def handle_tool_calls(calls: list, timeout: float = TOOL_CALL_TIMEOUT, speculation=None) -> list:
+    """Run every (function_name, arguments) pair concurrently; results keep call order.
+
+    A speculative call matching one of the pairs stands in for it.
+    """
+    claimed = speculation.claim(calls) if speculation else None
+    results = await asyncio.gather(*[
+        speculation.result() if index == claimed else run_tool_call(function_name, arguments, timeout)
+        for index, (function_name, arguments) in enumerate(calls)
+    ])
+    return list(zip([function_name for function_name, _ in calls], results))
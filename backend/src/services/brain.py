@@ -49,7 +49,10 @@ troubleshoot_issue_tool = create_tool(
 check_compatibility_tool = create_tool(
     "check_compatibility",
     "Check if a specific part ID is compatible with a specific model number. Use when customer asks 'Will part X work with model Y?' or 'Is part X compatible with model Y?'",
-    {"modelList": {"type": "string", "description": "Query containing both part ID and model number, e.g. 'Will PS11745480 work with model 66513402K900?'"}},
+    {
+        "modelList": {"type": "string", "description": "Query containing both part ID and model number, e.g. 'Will PS11745480 work with model 66513402K900?'"},
+        "cursor": {"type": "string", "description": "Cursor from a previous list of compatible parts to fetch the next page (optional)"}
+    },
     ["modelList"]
 )
 
@@ -86,6 +89,16 @@ cancel_order_tool = create_tool(
     ["order_id"]
 )
 
+list_orders_tool = create_tool(
+    "list_orders",
+    "List the current customer's order history, newest first",
+    {
+        "status": {"type": "string", "description": "Only orders with this status, e.g. 'confirmed' or 'cancelled' (optional)"},
+        "cursor": {"type": "string", "description": "Cursor from a previous page to fetch older orders (optional)"}
+    },
+    []
+)
+
 # All available tools
 ALL_TOOLS = [
     search_parts_tool,
@@ -97,4 +110,5 @@ ALL_TOOLS = [
     place_order_tool,
     check_order_status_tool,
     cancel_order_tool,
+    list_orders_tool,
 ]
@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "15"))
+# Calls slower than this count as failures even when they succeed
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "8"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+
+class CircuitBreaker:
+    """Per-dependency circuit breaker.
+
+    After failure_threshold consecutive failures (errors or slow calls) the
+    breaker opens and calls fail immediately with CircuitOpenError. After
+    reset_timeout one probe call is let through (half-open): success closes
+    the breaker, failure opens it again. Thread-safe; usable from the event
+    loop and from executor threads.
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=BREAKER_RESET_TIMEOUT, slow_call_seconds=BREAKER_SLOW_CALL_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "failures": 0, "slow_calls": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def closed(self) -> bool:
+        return self.state == CLOSED
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now (claims the probe slot when half-open)"""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def check(self):
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+
+    def record(self, ok: bool, seconds: float = 0.0):
+        slow = seconds > self.slow_call_seconds
+        with self._lock:
+            self.stats["calls"] += 1
+            self.stats["slow_calls"] += 1 if slow else 0
+            if ok and not slow:
+                self.failures = 0
+                self.state = CLOSED
+                self._probing = False
+                return
+
+            self.stats["failures"] += 1
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                    print(f"Circuit {self.name} opened after {self.failures} failures")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+    def release(self):
+        """Give back a probe slot whose call ended without an outcome (cancelled)"""
+        with self._lock:
+            self._probing = False
+
+    def call(self, fn):
+        """Run fn() through the breaker (sync)"""
+        self.check()
+        started = time.monotonic()
+        try:
+            result = fn()
+        except Exception:
+            self.record(False, time.monotonic() - started)
+            raise
+        self.record(True, time.monotonic() - started)
+        return result
+
+    def get_stats(self):
+        return {"state": self.state, "consecutive_failures": self.failures, **self.stats}
+
+
+_breakers = {}
+
+
+def get_breaker(name: str, **settings) -> CircuitBreaker:
+    """Process-wide breaker for a dependency (settings apply on first use)"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = _breakers.setdefault(name, CircuitBreaker(name, **settings))
+    return breaker
+
+
+def breaker_stats():
+    return {name: breaker.get_stats() for name, breaker in _breakers.items()}
@@ -1,37 +1,411 @@
+import os
+import json
 import time
+import uuid
+import zlib
+import asyncio
 import hashlib
+import sqlite3
+import threading
+import dataclasses
+from datetime import date, datetime
+from collections import OrderedDict
+
+# Process-wide budget shared by every cache namespace
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "64"))
+CACHE_SWEEP_INTERVAL = float(os.getenv("CACHE_SWEEP_INTERVAL", "60"))
+# Second-level cache shared by all workers on the node ("" disables);
+# CACHE_L2_REDIS_URL takes precedence over the SQLite file when set
+CACHE_L2_PATH = os.getenv("CACHE_L2_PATH", "./src/db/cache.db")
+CACHE_L2_REDIS_URL = os.getenv("CACHE_L2_REDIS_URL")
+# How long an expired in-memory entry is kept for stale-while-revalidate
+# serving when its backing dependency is down (0 disables)
+CACHE_STALE_TTL = float(os.getenv("CACHE_STALE_TTL", "3600"))
+
+
+def approx_size(value, _depth=0) -> int:
+    """Cheap byte estimate of a cached value (computed once, on set)"""
+    if isinstance(value, (str, bytes)):
+        return len(value) + 49
+    if value is None or isinstance(value, (bool, int, float)):
+        return 28
+    if _depth > 6:
+        return 64
+    if isinstance(value, dict):
+        return 232 + sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1)
+                         for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return 56 + sum(approx_size(v, _depth + 1) for v in value)
+    return approx_size(str(value), _depth + 1)
+
+
+def _json_default(value):
+    """Weaviate property types JSON has no encoding for; they come back as strings/dicts"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)  # e.g. GeoCoordinate
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+# JSON, not pickle: the L2 tier is shared, and unpickling a planted blob runs code
+def dumps(value) -> bytes:
+    return zlib.compress(json.dumps(value, default=_json_default, separators=(",", ":")).encode(), 1)
+
+
+def loads(blob: bytes):
+    return json.loads(zlib.decompress(blob))
+
+
+class SQLiteCacheTier:
+    """On-disk L2 cache in a WAL-mode SQLite file, shared across processes.
+
+    Expiry uses wall-clock time so every worker agrees on it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)")
+
+    def _conn(self):
+        # sqlite3 connections are per-thread (event loop + executor threads)
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """(blob, seconds left) or None"""
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        remaining = row[1] - time.time()
+        return (row[0], remaining) if remaining > 0 else None
+
+    def set(self, key, blob, ttl):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, blob, time.time() + ttl))
+
+    def delete_prefix(self, prefix):
+        self._conn().execute(
+            "DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, prefix + "\uffff"))
+
+    def purge_expired(self):
+        return self._conn().execute(
+            "DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+
+
+class RedisCacheTier:
+    """L2 cache on any Redis-protocol server (redis, KeyDB, a local stand-in)"""
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed for this tier
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5)
+
+    def get(self, key):
+        pipe = self.client.pipeline()
+        pipe.get(key)
+        pipe.pttl(key)
+        blob, pttl = pipe.execute()
+        if blob is None:
+            return None
+        return blob, (pttl / 1000 if pttl and pttl > 0 else 1)
+
+    def set(self, key, blob, ttl):
+        self.client.set(key, blob, px=max(int(ttl * 1000), 1))
+
+    def delete_prefix(self, prefix):
+        for key in self.client.scan_iter(match=f"{prefix}*"):
+            self.client.delete(key)
+
+    def purge_expired(self):
+        # Redis expires keys itself
+        return 0
+
+
+def create_l2_tier():
+    """L2 tier from the environment, or None when disabled/unavailable"""
+    try:
+        if CACHE_L2_REDIS_URL:
+            return RedisCacheTier(CACHE_L2_REDIS_URL)
+        if CACHE_L2_PATH:
+            return SQLiteCacheTier(CACHE_L2_PATH)
+    except Exception as e:
+        print(f"L2 cache disabled: {e}")
+    return None
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "size", "namespace")
+
+    def __init__(self, value, expires_at, stale_until, size, namespace):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.namespace = namespace
+
+
+class CacheStore:
+    """Bounded LRU + TTL store shared by all cache namespaces.
+
+    All operations are O(1) (sweeps aside) and guarded by a lock, so the
+    store is safe to use from the event loop and from executor threads.
+    get/set do L2 I/O inline; callers on the event loop use get_async/set_async.
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, max_bytes=int(CACHE_MAX_MB * 1024 * 1024), l2=None,
+                 stale_ttl=CACHE_STALE_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stale_ttl = stale_ttl
+        self.l2 = l2
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._stats = {}
+        self._sweeper = None
+
+    def _ns_stats(self, namespace):
+        stats = self._stats.get(namespace)
+        if stats is None:
+            stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0,
+                     "expirations": 0, "entries": 0, "bytes": 0,
+                     "l2_hits": 0, "l2_errors": 0, "stale_hits": 0}
+            self._stats[namespace] = stats
+        return stats
+
+    def _remove(self, key, reason=None):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        stats = self._ns_stats(entry.namespace)
+        stats["entries"] -= 1
+        stats["bytes"] -= entry.size
+        if reason:
+            stats[reason] += 1
+
+    def _get_memory(self, namespace, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                # Lazy expiry; within the stale window the entry stays for get_stale
+                if entry.stale_until <= time.monotonic():
+                    self._remove(key, "expirations")
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self._ns_stats(namespace)["hits"] += 1
+            return entry.value
+
+    def _count_miss(self, namespace):
+        with self._lock:
+            self._ns_stats(namespace)["misses"] += 1
+
+    def get(self, namespace, key, persistent=False):
+        value = self._get_memory(namespace, key)
+        if value is None and persistent and self.l2:
+            value = self._get_l2(namespace, key)
+        if value is None:
+            self._count_miss(namespace)
+        return value
+
+    async def get_async(self, namespace, key, persistent=False):
+        """get() with the L2 lookup in a worker thread, off the event loop"""
+        value = self._get_memory(namespace, key)
+        if value is None and persistent and self.l2:
+            value = await asyncio.to_thread(self._get_l2, namespace, key)
+        if value is None:
+            self._count_miss(namespace)
+        return value
+
+    def get_stale(self, namespace, key):
+        """Value of an entry even if expired (within its stale window), else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.stale_until <= time.monotonic():
+                return None
+            self._ns_stats(namespace)["stale_hits"] += 1
+            return entry.value
+
+    def _get_l2(self, namespace, key):
+        """Look up the shared tier and promote a hit into memory"""
+        try:
+            found = self.l2.get(key)
+            if found is None:
+                return None
+            blob, remaining = found
+            value = loads(blob)
+        except Exception as e:
+            print(f"L2 cache read error: {e}")
+            with self._lock:
+                self._ns_stats(namespace)["l2_errors"] += 1
+            return None
+
+        self.set(namespace, key, value, remaining)
+        with self._lock:
+            self._ns_stats(namespace)["l2_hits"] += 1
+        return value
+
+    def _set_l2(self, namespace, key, value, ttl):
+        try:
+            self.l2.set(key, dumps(value), ttl)
+        except Exception as e:
+            print(f"L2 cache write error: {e}")
+            with self._lock:
+                self._ns_stats(namespace)["l2_errors"] += 1
+
+    def set(self, namespace, key, value, ttl, persistent=False):
+        if persistent and self.l2:
+            self._set_l2(namespace, key, value, ttl)
+        self._set_memory(namespace, key, value, ttl)
+
+    async def set_async(self, namespace, key, value, ttl, persistent=False):
+        """set() with the L2 write in a worker thread, off the event loop"""
+        self._set_memory(namespace, key, value, ttl)
+        if persistent and self.l2:
+            await asyncio.to_thread(self._set_l2, namespace, key, value, ttl)
+
+    def _set_memory(self, namespace, key, value, ttl):
+        size = approx_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            now = time.monotonic()
+            self._entries[key] = _Entry(
+                value, now + ttl, now + ttl + self.stale_ttl, size, namespace)
+            self._bytes += size
+            stats = self._ns_stats(namespace)
+            stats["sets"] += 1
+            stats["entries"] += 1
+            stats["bytes"] += size
+
+            # LRU eviction until we are back under both budgets
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest, "evictions")
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.namespace == namespace]:
+                self._remove(key, "evictions")
+        if self.l2:
+            try:
+                self.l2.delete_prefix(f"{namespace}:")
+            except Exception as e:
+                print(f"L2 cache clear error: {e}")
+
+    def purge_expired(self) -> int:
+        """Drop every entry past its stale window; returns the number removed"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, e in self._entries.items()
+                       if e.stale_until <= now]
+            for key in expired:
+                self._remove(key, "expirations")
+        return len(expired)
+
+    async def _sweep_forever(self, interval):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                self.purge_expired()
+                if self.l2:
+                    await asyncio.to_thread(self.l2.purge_expired)
+            except Exception as e:
+                print(f"Cache sweep error: {e}")
+
+    def start_sweeper(self, interval=CACHE_SWEEP_INTERVAL):
+        """Start periodic TTL expiry on the running event loop"""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.get_running_loop().create_task(
+                self._sweep_forever(interval))
+        return self._sweeper
+
+    def stop_sweeper(self):
+        if self._sweeper:
+            self._sweeper.cancel()
+            self._sweeper = None
+
+    def get_stats(self, namespace=None):
+        """Cache statistics, overall or for one namespace"""
+        with self._lock:
+            if namespace is not None:
+                return dict(self._ns_stats(namespace))
+            return {
+                "total_entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "cache_size_mb": self._bytes / (1024 * 1024),
+                "max_size_mb": self.max_bytes / (1024 * 1024),
+                "l2": type(self.l2).__name__ if self.l2 else None,
+                "namespaces": {name: dict(stats) for name, stats in self._stats.items()},
+            }
+
+
+# Single store for the whole process, backed by the node-wide L2 tier
+cache_store = CacheStore(l2=create_l2_tier())
 
 
 class SimpleCache:
-    def __init__(self, ttl=1800):
-        self._cache = {}
-        self._cache_timestamps = {}
+    """Namespaced view onto the shared CacheStore.
+
+    Keeps the original get/set/_generate_key API so callers only choose a
+    namespace and a TTL; capacity is governed by the shared store. With
+    persistent=True entries are also written to the L2 tier so they survive
+    restarts and are shared by every worker.
+    """
+
+    def __init__(self, ttl=1800, namespace="default", store=None, persistent=False):
         self.ttl = ttl
+        self.namespace = namespace
+        self.store = store or cache_store
+        self.persistent = persistent
 
     def _generate_key(self, *args, **kwargs):
         key_data = str(args) + str(kwargs)
         return hashlib.md5(key_data.encode()).hexdigest()
 
+    def _full_key(self, key):
+        return f"{self.namespace}:{key}"
+
     def get(self, key):
-        if key in self._cache and (time.time() - self._cache_timestamps[key] < self.ttl):
-            return self._cache[key]
-        return None
+        return self.store.get(self.namespace, self._full_key(key), self.persistent)
+
+    async def get_async(self, key):
+        """get() for callers on the event loop"""
+        return await self.store.get_async(self.namespace, self._full_key(key), self.persistent)
+
+    def get_stale(self, key):
+        """Expired-but-present value for stale-while-revalidate, or None"""
+        return self.store.get_stale(self.namespace, self._full_key(key))
+
+    def set(self, key, value, ttl=None):
+        self.store.set(self.namespace, self._full_key(key),
+                       value, ttl or self.ttl, self.persistent)
 
-    def set(self, key, value):
-        self._cache[key] = value
-        self._cache_timestamps[key] = time.time()
+    async def set_async(self, key, value, ttl=None):
+        """set() for callers on the event loop"""
+        await self.store.set_async(self.namespace, self._full_key(key),
+                                   value, ttl or self.ttl, self.persistent)
 
     def clear(self):
-        self._cache.clear()
-        self._cache_timestamps.clear()
+        self.store.delete_namespace(self.namespace)
 
     def get_stats(self):
         """Get cache statistics"""
-        current_time = time.time()
-        valid_entries = sum(1 for ts in self._cache_timestamps.values()
-                            if current_time - ts < self.ttl)
-        return {
-            "total_entries": len(self._cache),
-            "valid_entries": valid_entries,
-            "cache_size_mb": sum(len(str(v)) for v in self._cache.values()) / (1024 * 1024)
-        }
+        return self.store.get_stats(self.namespace)
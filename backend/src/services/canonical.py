@@ -0,0 +1,95 @@
+import os
+import re
+import unicodedata
+
+# Map troubleshooting queries onto a symptom cluster ("dishwasher won't drain"
+# and "standing water in my dishwasher" share one cache entry)
+CACHE_SYMPTOM_CLUSTERS = os.getenv("CACHE_SYMPTOM_CLUSTERS", "0") == "1"
+
+# "ps 11752778", "PS-11752778" -> PS11752778
+PART_ID_PATTERN = re.compile(r"\b(ps|wp|ap|wpw|w)[\s\-]*(\d{5,})\b")
+# Letter+digit tokens, optionally with separators: "wdt-780saem1", "kuds30ixss"
+MODEL_PATTERN = re.compile(r"\b[a-z0-9]+(?:[\-/.][a-z0-9]+)*\b")
+APOSTROPHES = re.compile(r"['‘’ʼ`]")
+NON_WORD = re.compile(r"[^\w]+")
+
+APPLIANCES = {
+    "dishwasher": ("dishwasher", "dish washer"),
+    "refrigerator": ("refrigerator", "fridge", "freezer", "ice maker", "icemaker"),
+}
+
+# Phrases are matched against the canonical query (lowercase, no punctuation)
+SYMPTOM_CLUSTERS = {
+    "not_draining": ("not draining", "wont drain", "doesnt drain", "does not drain", "standing water",
+                     "water in the bottom", "not drain"),
+    "not_cleaning": ("not cleaning", "dirty dishes", "doesnt clean", "wont clean", "does not clean",
+                     "dishes still dirty", "not washing"),
+    "noisy": ("noise", "noisy", "grinding", "loud", "squealing", "buzzing", "rattling"),
+    "not_filling": ("not filling", "wont fill", "doesnt fill", "does not fill", "no water coming"),
+    "leaking": ("leak", "leaking", "leaks", "water on the floor"),
+    "not_cooling": ("not cooling", "not cold", "wont cool", "too warm", "warm inside"),
+    "no_ice": ("no ice", "not making ice", "ice maker not working", "icemaker not working"),
+    "not_starting": ("wont start", "not starting", "doesnt start", "does not start", "not turning on",
+                     "wont turn on", "no power"),
+    "not_drying": ("not drying", "wont dry", "doesnt dry", "dishes wet"),
+}
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFKC and collapsed whitespace only; for keys over content, not queries"""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def _model_token(match) -> str:
+    token = match.group(0)
+    compact = re.sub(r"[\-/.]", "", token)
+    has_letters = any(char.isalpha() for char in compact)
+    has_digits = any(char.isdigit() for char in compact)
+    if has_letters and has_digits and len(compact) >= 5:
+        return compact.upper()
+    return token
+
+
+def canonical_query(text: str) -> str:
+    """Canonical form of a user query for cache keys.
+
+    NFKC + casefold, part IDs and model numbers upper-cased without
+    separators, punctuation dropped and whitespace collapsed, so
+    "  Dishwasher not draining!" and "dishwasher not draining" match.
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = APOSTROPHES.sub("", text)
+    text = PART_ID_PATTERN.sub(lambda m: f"{m.group(1)}{m.group(2)}".upper(), text)
+    text = MODEL_PATTERN.sub(_model_token, text)
+    return " ".join(NON_WORD.sub(" ", text).split())
+
+
+def symptom_cluster(text: str):
+    """'appliance|cluster' for a query naming one appliance and one known symptom, else None.
+
+    Queries that mention a part or model number are never clustered, their
+    answer depends on the identifier.
+    """
+    query = canonical_query(text)
+    if any(any(char.isdigit() for char in token) and any(char.isupper() for char in token)
+           for token in query.split()):
+        return None
+    padded = f" {query} "
+    clusters = {name for name, phrases in SYMPTOM_CLUSTERS.items()
+                if any(f" {phrase} " in padded for phrase in phrases)}
+    if len(clusters) != 1:
+        return None
+    appliances = [name for name, words in APPLIANCES.items()
+                  if any(f" {word} " in padded for word in words)]
+    if len(appliances) != 1:
+        return None
+    return f"{appliances[0]}|{clusters.pop()}"
+
+
+def symptom_key(text: str) -> str:
+    """Cluster id when clustering is enabled and the query maps to one, else the canonical query"""
+    if CACHE_SYMPTOM_CLUSTERS:
+        cluster = symptom_cluster(text)
+        if cluster:
+            return f"cluster:{cluster}"
+    return canonical_query(text)
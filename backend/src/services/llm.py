@@ -1,10 +1,140 @@
 import os
+import json
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import httpx
 from dotenv import load_dotenv
 from openai import AsyncOpenAI
-from src.services.mcp import ALL_TOOLS
+from src.services.brain import ALL_TOOLS
+from src.services.breaker import get_breaker
+from src.services.prompt_budget import PromptBudget, count_tokens, message_tokens
 load_dotenv()
 
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.deepseek.com/v1")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "1"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1") == "1"
+# Concurrency cap and token-bucket rate limit (requests/s, 0 disables) toward the provider
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_RATE_PER_SEC = float(os.getenv("LLM_RATE_PER_SEC", "10"))
+LLM_BURST = int(os.getenv("LLM_BURST", "20"))
+# Streams legitimately run for a while, so the LLM breaker tolerates slower calls
+LLM_BREAKER_SLOW_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "20"))
+
+DOMAIN_GUARDRAIL = {
+    "role": "system",
+    "content": (
+        "You help with refrigerator & dishwasher parts, repairs, and orders only.\n"
+        "AVAILABLE TOOLS: search_parts, search_repairs, search_blogs, troubleshoot_issue, "
+        "check_compatibility, get_installation_steps, place_order, check_order_status, cancel_order, list_orders\n\n"
+        "TOOL SELECTION RULES:\n"
+        "For troubleshooting/diagnosing problems (words like 'troubleshoot', 'not working', 'broken', 'problem with', 'issue with') → troubleshoot_issue\n"
+        "For finding specific parts by name/ID → search_parts\n"
+        "For repair guides → search_repairs\n"
+        "For compatibility questions → check_compatibility\n"
+        "For order management → place_order, check_order_status, cancel_order, list_orders (order history)\n\n"
+        "IMPORTANT: If user asks to troubleshoot, diagnose, or fix a problem, ALWAYS use troubleshoot_issue tool, not search_parts.\n"
+        "Reject unrelated requests: 'I only help with refrigerator and dishwasher parts, repairs, and orders.'"
+    )
+}
+
+ERROR_MESSAGE = "I'm currently experiencing technical difficulties. Please try again later."
+
+# Guardrail + tool schemas open every request unchanged (prefix-cache friendly)
+STATIC_PREFIX_TOKENS = message_tokens(DOMAIN_GUARDRAIL) + count_tokens(json.dumps(ALL_TOOLS))
+
+# Stream chunks buffered between the provider and a slow client; more than a
+# whole max_tokens=500 completion, so reading upstream never waits on the client
+STREAM_BUFFER_CHUNKS = 1024
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, up to `burst` saved up"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens +
+                                  (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LLMMetrics:
+    """Aggregate and recent per-call LLM metrics"""
+
+    def __init__(self, recent=100):
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.tokens_saved = 0
+        self.recent = deque(maxlen=recent)
+
+    def record(self, call: dict):
+        self.calls += 1
+        self.errors += 1 if call.get("error") else 0
+        self.queue_wait_total += call["queue_wait"]
+        self.queue_wait_max = max(self.queue_wait_max, call["queue_wait"])
+        self.latency_total += call["latency"]
+        self.latency_max = max(self.latency_max, call["latency"])
+        self.prompt_tokens += call.get("prompt_tokens", 0)
+        self.completion_tokens += call.get("completion_tokens", 0)
+        self.cached_prompt_tokens += call.get("cached_prompt_tokens", 0)
+        self.tokens_saved += call.get("tokens_saved", 0)
+        self.recent.append(call)
+
+    def get_stats(self):
+        calls = self.calls or 1
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_queue_wait_s": self.queue_wait_total / calls,
+            "max_queue_wait_s": self.queue_wait_max,
+            "avg_latency_s": self.latency_total / calls,
+            "max_latency_s": self.latency_max,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_prompt_tokens": self.cached_prompt_tokens,
+            "tokens_saved": self.tokens_saved,
+            "static_prefix_tokens": STATIC_PREFIX_TOKENS,
+            "recent": list(self.recent)[-10:],
+        }
+
+
+def _http2_available() -> bool:
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401 - httpx needs it for HTTP/2
+        return True
+    except ImportError:
+        print("h2 not installed, LLM client falling back to HTTP/1.1 keep-alive")
+        return False
 
 
 class LLM:
@@ -12,57 +142,198 @@ class LLM:
         if not DEEPSEEK_API_KEY:
             raise ValueError("Missing API key")
 
+        # One keep-alive (HTTP/2 when available) connection pool per process
+        http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                keepalive_expiry=60.0
+            ),
+            timeout=LLM_TIMEOUT
+        )
         self.client = AsyncOpenAI(
             api_key=DEEPSEEK_API_KEY,
-            base_url="https://api.deepseek.com/v1",
-            timeout=30.0,
-            max_retries=2
+            base_url=LLM_BASE_URL,
+            timeout=LLM_TIMEOUT,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=http_client
         )
+        self.semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        self.rate_limiter = TokenBucket(LLM_RATE_PER_SEC, LLM_BURST)
+        self.metrics = LLMMetrics()
+        self.budget = PromptBudget()
+        self.breaker = get_breaker("llm", slow_call_seconds=LLM_BREAKER_SLOW_SECONDS)
 
-    async def ask_llm(self, messages: list[dict], model: str = "deepseek-chat") -> str:
+    @asynccontextmanager
+    async def _slot(self, kind: str):
+        """Admit one call (breaker, rate limit, concurrency cap) and record its metrics"""
+        # Raises CircuitOpenError at once while DeepSeek is failing
+        self.breaker.check()
+        queued = time.monotonic()
         try:
-            domain_guardrail = {
-                "role": "system",
-                "content": (
-                    "You help with refrigerator & dishwasher parts, repairs, and orders only.\n"
-                    "AVAILABLE TOOLS: search_parts, search_repairs, search_blogs, troubleshoot_issue, "
-                    "check_compatibility, get_installation_steps, place_order, check_order_status, cancel_order\n\n"
-                    "TOOL SELECTION RULES:\n"
-                    "For troubleshooting/diagnosing problems (words like 'troubleshoot', 'not working', 'broken', 'problem with', 'issue with') → troubleshoot_issue\n"
-                    "For finding specific parts by name/ID → search_parts\n"
-                    "For repair guides → search_repairs\n"
-                    "For compatibility questions → check_compatibility\n"
-                    "For order management → place_order, check_order_status, cancel_order\n\n"
-                    "IMPORTANT: If user asks to troubleshoot, diagnose, or fix a problem, ALWAYS use troubleshoot_issue tool, not search_parts.\n"
-                    "Reject unrelated requests: 'I only help with refrigerator and dishwasher parts, repairs, and orders.'"
-                )
-            }
+            await self.rate_limiter.acquire()
+            await self.semaphore.acquire()
+        except BaseException:
+            self.breaker.release()
+            raise
+
+        call = {"kind": kind, "queue_wait": time.monotonic() - queued}
+        started = time.monotonic()
+        self.metrics.in_flight += 1
+        try:
+            yield call
+        except Exception:
+            call["error"] = True
+            self.breaker.record(False, time.monotonic() - started)
+            raise
+        except BaseException:
+            # Cancelled / client went away: no verdict on the provider
+            self.breaker.release()
+            raise
+        else:
+            self.breaker.record(True, time.monotonic() - started)
+        finally:
+            self.semaphore.release()
+            self.metrics.in_flight -= 1
+            call["latency"] = time.monotonic() - started
+            self.metrics.record(call)
 
-            all_messages = [domain_guardrail] + messages
+    @staticmethod
+    def _record_usage(call: dict, usage):
+        if usage:
+            call["prompt_tokens"] = usage.prompt_tokens or 0
+            call["completion_tokens"] = usage.completion_tokens or 0
+            # DeepSeek reports prefix-cache hits directly; OpenAI-style servers in details
+            details = getattr(usage, "prompt_tokens_details", None)
+            call["cached_prompt_tokens"] = (getattr(usage, "prompt_cache_hit_tokens", None)
+                                            or getattr(details, "cached_tokens", None) or 0)
 
-            response = await self.client.chat.completions.create(
-                model=model,
-                messages=all_messages,
-                tools=ALL_TOOLS,
-                tool_choice="auto",
-                max_tokens=500,
-                temperature=0.0,
-                stream=False,
-                top_p=0.9
-            )
+    def _prepare(self, messages: list, call: dict) -> list:
+        """Static guardrail prefix + history fitted to the token budget"""
+        fitted, report = self.budget.fit(messages)
+        call["tokens_saved"] = report["tokens_saved"]
+        call["summarized_messages"] = report["summarized_messages"]
+        return [DOMAIN_GUARDRAIL] + fitted
+
+    async def ask_llm(self, messages: list[dict], model: str = "deepseek-chat") -> str:
+        try:
+            async with self._slot("ask") as call:
+                all_messages = self._prepare(messages, call)
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=all_messages,
+                    tools=ALL_TOOLS,
+                    tool_choice="auto",
+                    max_tokens=500,
+                    temperature=0.0,
+                    stream=False,
+                    top_p=0.9
+                )
+                self._record_usage(call, getattr(response, "usage", None))
 
             return response
 
         except Exception as e:
             print(f"LLM Error: {e}")
-            error_message = "I'm currently experiencing technical difficulties. Please try again later."
             return type('Response', (), {
                 'choices': [
                     type('Choice', (), {
                         'message': type('Message', (), {
-                            'content': error_message,
+                            'content': ERROR_MESSAGE,
                             'tool_calls': None
                         })
                     })
                 ]
             })
+
+    async def stream_llm(self, messages: list[dict], model: str = "deepseek-chat"):
+        """Stream a completion as events.
+
+        Yields {"type": "token", "content": str} for every content delta and,
+        once the stream ends, a single {"type": "tool_calls", "tool_calls": [...]}
+        event with the fully assembled tool calls (name + parsed arguments).
+        """
+        events = asyncio.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        reader = asyncio.ensure_future(self._read_stream(messages, model, events))
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Consumer went away early: stop reading (the slot is released as cancelled)
+            if not reader.done():
+                reader.cancel()
+
+        tool_calls = reader.result()
+        if tool_calls is None:
+            return
+        parsed_calls = []
+        for index in sorted(tool_calls):
+            entry = tool_calls[index]
+            parsed_calls.append({
+                "name": entry["name"],
+                "arguments": json.loads(entry["arguments"] or "{}")
+            })
+        yield {"type": "tool_calls", "tool_calls": parsed_calls}
+
+    async def _read_stream(self, messages: list[dict], model: str, events: asyncio.Queue):
+        """Read the provider stream into events, holding the LLM slot only for that.
+
+        Returns the tool call fragments by index, or None after an error
+        (reported as an ERROR_MESSAGE token). Ends the events with None.
+        """
+        tool_calls = {}
+        try:
+            async with self._slot("stream") as call:
+                all_messages = self._prepare(messages, call)
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=all_messages,
+                    tools=ALL_TOOLS,
+                    tool_choice="auto",
+                    max_tokens=500,
+                    temperature=0.0,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    top_p=0.9
+                )
+
+                async for chunk in stream:
+                    self._record_usage(call, getattr(chunk, "usage", None))
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+
+                    if delta.content:
+                        await events.put({"type": "token", "content": delta.content})
+
+                    # Tool call names/arguments arrive in fragments keyed by index
+                    for tool_call in delta.tool_calls or []:
+                        entry = tool_calls.setdefault(
+                            tool_call.index, {"name": "", "arguments": ""})
+                        if tool_call.function and tool_call.function.name:
+                            entry["name"] += tool_call.function.name
+                        if tool_call.function and tool_call.function.arguments:
+                            entry["arguments"] += tool_call.function.arguments
+
+        except Exception as e:
+            print(f"LLM Stream Error: {e}")
+            await events.put({"type": "token", "content": ERROR_MESSAGE})
+            tool_calls = None
+
+        await events.put(None)
+        return tool_calls
+
+
+_shared_llm = None
+
+
+def get_llm() -> LLM:
+    """Process-wide LLM client shared by main and all agents"""
+    global _shared_llm
+    if _shared_llm is None:
+        _shared_llm = LLM()
+    return _shared_llm
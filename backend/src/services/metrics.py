@@ -0,0 +1,173 @@
+import time
+import bisect
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Seconds; covers sub-millisecond local lookups up to LLM/Weaviate timeouts
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                   0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Spans of the current request, when tracing was requested
+_trace = contextvars.ContextVar("trace", default=None)
+
+
+def _label_text(labelnames, values):
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{str(value).replace(chr(34), "")}"'
+                     for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = _label_text(self.labelnames + ("le",), key + (le,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_text(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Metrics plus collectors that produce exposition lines at scrape time"""
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for collector in self.collectors:
+            try:
+                lines += collector()
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        return "\n".join(lines) + "\n"
+
+
+def sample_lines(name, help_text, samples, kind="gauge"):
+    """Exposition lines for values read from an existing stats dict.
+
+    samples is a list of (labels dict, value) pairs.
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_label_text(tuple(labels), tuple(labels.values()))} {value}")
+    return lines
+
+
+registry = Registry()
+
+
+def register_collectors(*collectors):
+    """Add scrape-time collectors to the registry (main registers them all in one call)"""
+    for collector in collectors:
+        registry.add_collector(collector)
+
+STAGE_SECONDS = registry.histogram(
+    "chat_stage_seconds", "Time spent in each chat pipeline stage", ("stage", "tool"))
+VECTORDB_SECONDS = registry.histogram(
+    "vectordb_call_seconds", "VectorDB method latency", ("method", "outcome"))
+ORDERDB_SECONDS = registry.histogram(
+    "orderdb_call_seconds", "OrderDB method latency", ("method", "outcome"))
+SPECULATION_SAVED_SECONDS = registry.histogram(
+    "speculation_saved_seconds", "Retrieval time overlapped with LLM tool selection", ("tool",))
+
+
+def start_trace() -> list:
+    """Collect spans for the current request (and tasks it spawns)"""
+    spans = []
+    _trace.set(spans)
+    return spans
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the block's duration in histogram and, when tracing, record a span.
+
+    Yields a dict whose "outcome" the block may overwrite (e.g. "empty");
+    it becomes "error" if the block raises.
+    """
+    started = time.perf_counter()
+    result = {"outcome": "ok"}
+    try:
+        yield result
+    except BaseException:
+        result["outcome"] = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        outcome = {"outcome": result["outcome"]} if "outcome" in histogram.labelnames else {}
+        histogram.observe(elapsed, **labels, **outcome)
+        spans = _trace.get()
+        if spans is not None:
+            spans.append({"metric": histogram.name, **labels, **outcome,
+                          "duration_ms": round(elapsed * 1000, 3)})
+
+
+def instrument(histogram, **labels):
+    """Decorator form of timed() for sync and async functions/methods.
+
+    A None return value is recorded with outcome "empty" (the DB layers
+    return None when they swallow an error).
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with timed(histogram, **labels) as span:
+                    value = await fn(*args, **kwargs)
+                    if value is None:
+                        span["outcome"] = "empty"
+                    return value
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(histogram, **labels) as span:
+                value = fn(*args, **kwargs)
+                if value is None:
+                    span["outcome"] = "empty"
+                return value
+        return wrapper
+    return decorator
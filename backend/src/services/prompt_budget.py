@@ -0,0 +1,151 @@
+import os
+import re
+import json
+from src.services.router import PART_RE, MODEL_RE, ORDER_ID_RE
+
+# Tokens allowed for conversation history (the static prefix and the current turn are extra)
+LLM_HISTORY_BUDGET = int(os.getenv("LLM_HISTORY_BUDGET", "1200"))
+# Tokens allowed for the summary of turns that no longer fit
+LLM_SUMMARY_BUDGET = int(os.getenv("LLM_SUMMARY_BUDGET", "200"))
+
+# Per-message framing the chat template adds around each message
+MESSAGE_OVERHEAD = 4
+_WORD_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def _load_encoder():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+_encoder = _load_encoder()
+
+
+def count_tokens(text: str) -> int:
+    """Local token count: tiktoken when installed, otherwise a word-piece estimate.
+
+    Neither is DeepSeek's exact tokenizer; both are close enough for budgeting.
+    """
+    if not text:
+        return 0
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    # BPE vocabularies keep most short words whole and split long ones ~4 chars a piece
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _WORD_RE.findall(text))
+
+
+def message_tokens(message: dict) -> int:
+    tokens = MESSAGE_OVERHEAD + count_tokens(message.get("content") or "")
+    if message.get("tool_calls"):
+        tokens += count_tokens(json.dumps(message["tool_calls"], default=str))
+    return tokens
+
+
+def _entities(text: str) -> list:
+    """Part, model and order ids worth carrying into a summary"""
+    found = []
+    for regex in (PART_RE, ORDER_ID_RE, MODEL_RE):
+        for match in regex.finditer(text or ""):
+            value = match.group(0).upper()
+            if value not in found:
+                found.append(value)
+    return found
+
+
+def _clip(text: str, words: int) -> str:
+    parts = (text or "").split()
+    return " ".join(parts[:words]) + (" ..." if len(parts) > words else "")
+
+
+class PromptBudget:
+    """Fits chat history into a token budget ahead of every LLM call.
+
+    The caller's leading system messages and the final (current) message
+    are always sent unchanged. Older history is kept newest-first while it
+    fits history_budget; whatever is left over is compacted into a short
+    extractive summary (no extra LLM call) placed after the system messages.
+    Nothing that precedes the history changes between requests, so the
+    provider's prefix cache keeps hitting on the guardrail and tool schemas.
+    """
+
+    def __init__(self, history_budget=LLM_HISTORY_BUDGET, summary_budget=LLM_SUMMARY_BUDGET):
+        self.history_budget = history_budget
+        self.summary_budget = summary_budget
+        self.stats = {"requests": 0, "compacted": 0, "turns_summarized": 0,
+                      "tokens_full": 0, "tokens_sent": 0}
+
+    def fit(self, messages: list):
+        """Returns (messages to send, report for this request)"""
+        lead = 0
+        while lead < len(messages) - 1 and messages[lead].get("role") == "system":
+            lead += 1
+        system, history, current = messages[:lead], messages[lead:-1], messages[-1:]
+
+        kept, used = [], 0
+        for message in reversed(history):
+            tokens = message_tokens(message)
+            if used + tokens > self.history_budget:
+                break
+            kept.insert(0, message)
+            used += tokens
+        # A tool result is meaningless without the assistant turn that called it
+        while kept and kept[0].get("role") == "tool":
+            kept.pop(0)
+        dropped = history[:len(history) - len(kept)]
+
+        summary = self.summarize(dropped) if dropped else None
+        fitted = system + ([summary] if summary else []) + kept + current
+
+        full = sum(message_tokens(m) for m in messages)
+        sent = sum(message_tokens(m) for m in fitted)
+        report = {
+            "history_messages": len(history),
+            "kept_messages": len(kept),
+            "summarized_messages": len(dropped),
+            "tokens_full": full,
+            "tokens_sent": sent,
+            "tokens_saved": max(0, full - sent),
+        }
+
+        self.stats["requests"] += 1
+        self.stats["compacted"] += 1 if dropped else 0
+        self.stats["turns_summarized"] += len(dropped)
+        self.stats["tokens_full"] += full
+        self.stats["tokens_sent"] += sent
+        return fitted, report
+
+    def summarize(self, messages: list):
+        """One system message recapping older turns: user asks plus ids mentioned"""
+        lines = []
+        for message in messages:
+            content = message.get("content") or ""
+            ids = _entities(content)[:8]
+            if message.get("role") == "user":
+                line = f"- User asked: {_clip(content, 25)}"
+                missing = [value for value in ids if value not in line.upper()]
+                lines.append(line + (f" (also mentioned: {', '.join(missing)})" if missing else ""))
+            elif ids:
+                lines.append(f"- Assistant mentioned: {', '.join(ids)}")
+
+        # Keep the most recent lines that fit the summary budget
+        header = "Summary of earlier conversation:"
+        budget = self.summary_budget - count_tokens(header) - MESSAGE_OVERHEAD
+        kept = []
+        for line in reversed(lines):
+            tokens = count_tokens(line)
+            if tokens > budget:
+                break
+            kept.insert(0, line)
+            budget -= tokens
+        if not kept:
+            return None
+        return {"role": "system", "content": "\n".join([header] + kept)}
+
+    def get_stats(self):
+        return {**self.stats,
+                "tokens_saved": self.stats["tokens_full"] - self.stats["tokens_sent"],
+                "history_budget": self.history_budget,
+                "tokenizer": "tiktoken" if _encoder is not None else "estimate"}
@@ -0,0 +1,185 @@
+CLOSING = "Need help with compatibility or ordering? Just ask!"
+
+
+def _price(value) -> str:
+    try:
+        return f"${float(value):.2f}"
+    except (TypeError, ValueError):
+        return str(value) if value else "N/A"
+
+
+def _links(*pairs) -> str:
+    return " | ".join(f"[{label}]({url})" for label, url in pairs if url)
+
+
+def render_part(part: dict) -> str:
+    """One part in the critic's field-by-field layout"""
+    lines = [
+        f"**{part.get('partName', 'Unknown Part')} ({part.get('partId', 'N/A')})**",
+        f"**Brand:** {part.get('brand') or 'N/A'} | **Price:** {_price(part.get('price'))} | "
+        f"**Status:** {part.get('availability') or 'Unknown'}"
+    ]
+    if part.get("productDescription"):
+        lines.append(f"**About:** {part['productDescription']}")
+    links = _links(("Installation Video", part.get("youtubeVideoUrl")),
+                   ("Product Page", part.get("productUrl")))
+    if links:
+        lines.append(f"**Links:** {links}")
+    return "\n".join(lines)
+
+
+def render_repair(repair: dict) -> str:
+    parts_needed = repair.get("parts") or []
+    if isinstance(parts_needed, list):
+        parts_needed = ", ".join(parts_needed)
+    lines = [
+        f"**{repair.get('symptom', 'Repair guide')}**",
+        f"**Description:** {repair.get('description', '')}",
+        f"**Difficulty:** {repair.get('difficulty') or 'Unknown'} | **Parts Needed:** {parts_needed or 'N/A'}"
+    ]
+    links = _links(("Repair Video", repair.get("repairVideoUrl")),
+                   ("Detailed Guide", repair.get("symptomDetailUrl")))
+    if links:
+        lines.append(links)
+    return "\n".join(lines)
+
+
+def render_blog(blog: dict) -> str:
+    title = blog.get("title", "Article")
+    return f"- [{title}]({blog['url']})" if blog.get("url") else f"- {title}"
+
+
+def render_collection(result: dict):
+    """Weaviate-style {"data": {"Get": {...}}} results (parts, repairs, blogs)"""
+    collections = result.get("data", {}).get("Get", {})
+    sections = []
+    if collections.get("Part"):
+        parts = collections["Part"]
+        intro = "Here's the part I found:" if len(parts) == 1 else f"Here are {len(parts)} parts that match:"
+        sections.append(intro + "\n\n" + "\n\n".join(render_part(p) for p in parts))
+    if collections.get("Repair"):
+        sections.append("Here are some repair guides that can help:\n\n" +
+                        "\n\n".join(render_repair(r) for r in collections["Repair"]))
+    if collections.get("Blog"):
+        sections.append("These articles may help:\n\n" +
+                        "\n".join(render_blog(b) for b in collections["Blog"]))
+    return "\n\n".join(sections) or None
+
+
+def render_compatibility(result: dict) -> str:
+    lines = [result.get("reason", "")]
+    if result.get("part"):
+        lines += ["", render_part(result["part"])]
+    if result.get("compatible") is not True:
+        lines += ["", "Please double-check the model number on your appliance's rating plate, "
+                      "or contact our support team and we'll help you find the right part."]
+    return "\n".join(lines)
+
+
+def render_order(result: dict) -> str:
+    lines = [f"**Order {result['order_id']}**",
+             f"**Status:** {result.get('status', 'unknown')} | **Total:** {_price(result.get('total'))}"]
+    if result.get("created"):
+        lines.append(f"**Placed:** {result['created']}")
+    for item in result.get("items") or []:
+        if isinstance(item, (list, tuple)) and len(item) == 2:
+            lines.append(f"- {item[0]} x {item[1]}")
+        else:
+            lines.append(f"- {item}")
+    return "\n".join(lines)
+
+
+def render_tool_result(tool_name: str, result: dict):
+    """Deterministic markdown for one tool result, or None if there is no template"""
+    if not isinstance(result, dict):
+        return None
+    if "troubleshooting_data" in result:
+        return render_troubleshooting_text(result["message"])
+    if "compatible" in result and "reason" in result:
+        return render_compatibility(result)
+    if "orders" in result:
+        orders = "\n\n".join(render_order(order) for order in result["orders"])
+        # The cursor stays in the conversation so the next turn can page on
+        more = f"\n\nAsk for more to see older orders (page `{result['next_cursor']}`)." \
+            if result.get("next_cursor") else ""
+        return f"Here are your orders:\n\n{orders}{more}"
+    if "order_id" in result and "status" in result:
+        prefix = f"{result['message']}\n\n" if result.get("message") else ""
+        return prefix + render_order(result)
+    if "data" in result:
+        rendered = render_collection(result)
+        if rendered and result.get("next_cursor"):
+            # The cursor stays in the conversation so the next turn can page on
+            rendered += f"\n\nAsk for more to see further compatible parts (page `{result['next_cursor']}`)."
+        return rendered
+    if set(result) == {"message"}:
+        return result["message"]
+    return None
+
+
+def render_tool_results(results: list):
+    """Render (tool_name, result) pairs; None if any result needs the LLM critic"""
+    sections = []
+    for tool_name, result in results:
+        if not result or result.get("error"):
+            sections.append((result or {}).get("message", f"{tool_name} is not available right now."))
+            continue
+        rendered = render_tool_result(tool_name, result)
+        if rendered is None:
+            return None
+        sections.append(rendered)
+
+    text = "\n\n---\n\n".join(sections)
+    # Troubleshooting output already ends with its own offer to help
+    if not all("troubleshooting_data" in (result or {}) for _, result in results):
+        text += f"\n\n{CLOSING}"
+    return text
+
+
+def render_troubleshooting_text(response_text: str) -> str:
+    """TroubleAgent's structured message (TROUBLESHOOTING_ISSUE: ...) as markdown"""
+    lines = response_text.split('\n')
+    formatted_lines = []
+
+    current_section = ""
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith("TROUBLESHOOTING_ISSUE:"):
+            issue = line.replace("TROUBLESHOOTING_ISSUE:", "").strip()
+            formatted_lines.append(
+                f"I can help you troubleshoot: **{issue}**\n")
+
+        elif line.startswith("POTENTIAL_STEPS:"):
+            formatted_lines.append(
+                "## 🔧 Let's try these troubleshooting steps:")
+            current_section = "steps"
+
+        elif line.startswith("REPAIR_GUIDES:"):
+            formatted_lines.append("\n## 📋 Repair Guides:")
+            current_section = "guides"
+
+        elif line.startswith("RECOMMENDED_PARTS:"):
+            formatted_lines.append("\n## 🔧 Parts You Might Need:")
+            current_section = "parts"
+
+        elif line.startswith("HELPFUL_RESOURCES:"):
+            formatted_lines.append("\n## 📚 Helpful Resources:")
+            current_section = "resources"
+
+        else:
+            # Format content based on current section
+            if current_section == "steps" and line.startswith(("1.", "2.", "3.", "4.", "5.")):
+                formatted_lines.append(f"**{line}**")
+            elif line.startswith("-"):
+                formatted_lines.append(line)
+            else:
+                formatted_lines.append(line)
+
+    formatted_lines.append(
+        "\n💡 **Need more help?** Feel free to ask about specific parts or if you need clarification on any of these steps!")
+
+    return "\n".join(formatted_lines)
@@ -0,0 +1,102 @@
+import os
+import re
+
+FAST_ROUTER_ENABLED = os.getenv("FAST_ROUTER_ENABLED", "1") == "1"
+
+# Same part ID families PartAgent/VectorDB recognise (PS, WP, W10 + 3 or more chars)
+PART_ID = r"(?:PS|WP|W10)[A-Z0-9]{3,}"
+BARE_PART_RE = re.compile(
+    rf"^\s*(?:part\s*(?:#|number|no\.?|id)?\s*:?\s*)?({PART_ID})\s*[.?!]*\s*$", re.IGNORECASE)
+PART_RE = re.compile(rf"\b({PART_ID})\b", re.IGNORECASE)
+# Model numbers: 6+ alphanumerics mixing letters and digits
+MODEL_RE = re.compile(r"\b(?=[A-Z0-9-]*\d)(?=[A-Z0-9-]*[A-Z])[A-Z0-9-]{6,}\b", re.IGNORECASE)
+COMPAT_RE = re.compile(r"\b(compatib\w*|work(?:s)? with|fit(?:s)?)\b", re.IGNORECASE)
+ORDER_ID_RE = re.compile(
+    r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b", re.IGNORECASE)
+# Order ids also appear in cancel requests; those always go through the LLM
+CANCEL_RE = re.compile(r"\bcancel", re.IGNORECASE)
+# Words asking for something besides a compatibility check ("...and how do I install it?")
+OTHER_INTENT_RE = re.compile(
+    r"\b(also|as well|install\w*|instructions?|replace|order\w*|buy|purchase|cancel\w*|price|cost|"
+    r"stock|troubleshoot\w*|fix|repair\w*|broken|not working|leak\w*|nois\w*|guides?|blogs?)\b",
+    re.IGNORECASE)
+
+
+def bare_part_rule(message: str):
+    """A message that is just a part number -> search_parts"""
+    match = BARE_PART_RE.match(message)
+    if match:
+        return [("search_parts", {"query": match.group(1).upper()})]
+    return None
+
+
+def compatibility_rule(message: str):
+    """One part number + one model number + 'compatible/fit/work with' -> check_compatibility.
+
+    Only for single-intent messages; anything that also asks for something
+    else goes to the LLM, which can select several tools.
+    """
+    parts = {part.upper() for part in PART_RE.findall(message)}
+    if len(parts) != 1 or not COMPAT_RE.search(message):
+        return None
+    if OTHER_INTENT_RE.search(message) or ORDER_ID_RE.search(message):
+        return None
+    models = {m.upper() for m in MODEL_RE.findall(message)} - parts
+    if len(models) == 1:
+        return [("check_compatibility", {"modelList": message.strip()})]
+    return None
+
+
+def order_status_rule(message: str):
+    """An order UUID (and no cancel intent) -> check_order_status"""
+    match = ORDER_ID_RE.search(message)
+    if match and not CANCEL_RE.search(message):
+        return [("check_order_status", {"order_id": match.group(0).lower()})]
+    return None
+
+
+class FastPathRouter:
+    """Deterministic pre-router in front of the LLM.
+
+    Rules are tried in order; the first one that returns a list of
+    (tool_name, arguments) calls wins and the LLM tool-selection round trip
+    is skipped. Rules can be added with register().
+    """
+
+    def __init__(self, enabled=FAST_ROUTER_ENABLED):
+        self.enabled = enabled
+        self.rules = []
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "rules": {}}
+
+    def register(self, name: str, rule):
+        self.rules.append((name, rule))
+        self.stats["rules"][name] = 0
+
+    def route(self, message: str):
+        """Tool calls for an obvious intent, or None to fall back to the LLM"""
+        if not self.enabled:
+            return None
+
+        self.stats["requests"] += 1
+        for name, rule in self.rules:
+            calls = rule(message)
+            if calls:
+                self.stats["hits"] += 1
+                self.stats["rules"][name] += 1
+                return calls
+
+        self.stats["misses"] += 1
+        return None
+
+    def get_stats(self):
+        requests = self.stats["requests"] or 1
+        return {**self.stats, "rules": dict(self.stats["rules"]),
+                "hit_rate": self.stats["hits"] / requests}
+
+
+def default_router() -> FastPathRouter:
+    router = FastPathRouter()
+    router.register("bare_part_number", bare_part_rule)
+    router.register("compatibility", compatibility_rule)
+    router.register("order_status", order_status_rule)
+    return router
@@ -0,0 +1,155 @@
+import os
+import re
+import time
+import asyncio
+from src.services.canonical import canonical_query, symptom_cluster
+from src.services.metrics import SPECULATION_SAVED_SECONDS
+from src.services.router import PART_RE
+
+# Start the likely retrieval while the LLM is still choosing a tool
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "0") == "1"
+
+# Mirrors the tool selection rules in the LLM guardrail prompt
+TROUBLESHOOT_RE = re.compile(
+    r"\b(troubleshoot\w*|diagnos\w*|not working|broken|problem with|issue with|"
+    r"won'?t|doesn'?t|isn'?t|stopped|leak\w*|nois\w*)\b", re.IGNORECASE)
+REPAIR_RE = re.compile(r"\b(repair guides?|how (?:do i|to) (?:fix|repair)|fix (?:my|a|the))\b", re.IGNORECASE)
+PART_WORDS_RE = re.compile(
+    r"\b(parts?|need an?|looking for|buy|replacement|gasket|filter|pump|valve|motor|seal|"
+    r"rack|shelf|hose|switch|thermostat|dispenser)\b", re.IGNORECASE)
+# Never speculate on anything with side effects or order lookups
+ORDER_RE = re.compile(r"\b(order|cancel|purchase|checkout)\b", re.IGNORECASE)
+
+# Read-only tools eligible for speculation -> the argument holding the query
+SPECULATIVE_TOOLS = {"troubleshoot_issue": "troubleshootText", "search_repairs": "query", "search_parts": "query"}
+
+
+def predict_tool(message: str):
+    """(tool_name, arguments) the LLM will most likely pick, or None"""
+    if ORDER_RE.search(message):
+        return None
+    text = message.strip()
+    if symptom_cluster(text) or TROUBLESHOOT_RE.search(text):
+        return "troubleshoot_issue", {"troubleshootText": text}
+    if REPAIR_RE.search(text):
+        return "search_repairs", {"query": text}
+    if PART_RE.search(text) or PART_WORDS_RE.search(text):
+        return "search_parts", {"query": text}
+    return None
+
+
+def same_arguments(tool: str, predicted: dict, actual: dict) -> bool:
+    """Whether the LLM's arguments ask for what was speculatively fetched"""
+    if set(actual) - {SPECULATIVE_TOOLS[tool]}:
+        return False  # e.g. a product filter on search_repairs
+    predicted_text = predicted[SPECULATIVE_TOOLS[tool]]
+    actual_text = str(actual.get(SPECULATIVE_TOOLS[tool]) or "")
+    if canonical_query(predicted_text) == canonical_query(actual_text):
+        return True
+    # Troubleshooting answers are shared per symptom cluster anyway
+    cluster = symptom_cluster(predicted_text)
+    return tool == "troubleshoot_issue" and cluster is not None and cluster == symptom_cluster(actual_text)
+
+
+class Speculation:
+    """One speculative tool call running alongside LLM tool selection"""
+
+    def __init__(self, speculator, tool: str, arguments: dict, task):
+        self.speculator = speculator
+        self.tool = tool
+        self.arguments = arguments
+        self.task = task
+        self.started = time.monotonic()
+        self.finished = None
+        self.resolved = False
+        task.add_done_callback(self._done)
+
+    def _done(self, task):
+        self.finished = time.monotonic()
+
+    def claim(self, calls: list):
+        """Index of the selected (tool_name, arguments) call this speculation answers.
+
+        Returns None and cancels the speculative call when the LLM picked
+        something else. Resolves once; later claims return None.
+        """
+        if self.resolved:
+            return None
+        self.resolved = True
+        index = next((i for i, (name, arguments) in enumerate(calls)
+                      if name == self.tool and same_arguments(self.tool, self.arguments, arguments or {})), None)
+        if index is None:
+            self.task.cancel()
+            if not calls:
+                outcome = "no_tool"
+            elif any(name == self.tool for name, _ in calls):
+                outcome = "args_mismatch"
+            else:
+                outcome = "tool_mismatch"
+            self.speculator.record(self.tool, outcome)
+            return None
+
+        # Work already done when the LLM answered is latency the request no longer waits for
+        saved = (self.finished or time.monotonic()) - self.started
+        self.speculator.record(self.tool, "used", saved)
+        return index
+
+    async def result(self):
+        return await self.task
+
+    def discard(self):
+        """Cancel a speculation that was never claimed (request failed early)"""
+        if not self.resolved:
+            self.resolved = True
+            self.task.cancel()
+            self.speculator.record(self.tool, "abandoned")
+
+
+class Speculator:
+    """Starts the predicted retrieval concurrently with LLM tool selection.
+
+    run_call(tool_name, arguments) is the normal tool runner; its result is
+    reused when the LLM confirms the same tool and arguments.
+    """
+
+    OUTCOMES = ("used", "args_mismatch", "tool_mismatch", "no_tool", "abandoned")
+
+    def __init__(self, run_call, enabled=SPECULATIVE_RETRIEVAL):
+        self.run_call = run_call
+        self.enabled = enabled
+        self.stats = {"started": 0, "saved_seconds": 0.0, "tools": {}}
+
+    def start(self, message: str):
+        """A running Speculation for the message, or None"""
+        if not self.enabled:
+            return None
+        prediction = predict_tool(message)
+        if not prediction:
+            return None
+        tool, arguments = prediction
+        self.stats["started"] += 1
+        return Speculation(self, tool, arguments,
+                           asyncio.ensure_future(self.run_call(tool, arguments)))
+
+    def record(self, tool: str, outcome: str, saved: float = 0.0):
+        counts = self.stats["tools"].setdefault(tool, dict.fromkeys(self.OUTCOMES, 0))
+        counts[outcome] += 1
+        if outcome == "used":
+            self.stats["saved_seconds"] += saved
+            SPECULATION_SAVED_SECONDS.observe(saved, tool=tool)
+
+    def get_stats(self):
+        totals = {outcome: sum(counts[outcome] for counts in self.stats["tools"].values())
+                  for outcome in self.OUTCOMES}
+        decided = sum(totals.values()) - totals["abandoned"] or 1
+        return {
+            "enabled": self.enabled,
+            "started": self.stats["started"],
+            **totals,
+            # Right tool predicted / right tool and arguments (result reused)
+            "tool_accuracy": (totals["used"] + totals["args_mismatch"]) / decided,
+            "hit_rate": totals["used"] / decided,
+            "saved_seconds": self.stats["saved_seconds"],
+            "avg_saved_s": self.stats["saved_seconds"] / (totals["used"] or 1),
+            "tools": {tool: dict(counts) for tool, counts in self.stats["tools"].items()},
+        }
@@ -0,0 +1,85 @@
+import os
+import time
+import asyncio
+import inspect
+
+# Components that must be up before /ready reports ready
+READY_REQUIRES = [name.strip() for name in
+                  os.getenv("READY_REQUIRES", "llm,orderdb,weaviate").split(",") if name.strip()]
+# Seconds between attempts for a component that failed to start
+STARTUP_RETRY_INTERVAL = float(os.getenv("STARTUP_RETRY_INTERVAL", "10"))
+
+
+class Startup:
+    """Background initialisation of the app's dependencies.
+
+    Each component starts in its own task, so a slow or unreachable one
+    (e.g. a Weaviate blip) delays only itself and is retried; the worker
+    accepts traffic immediately and /ready reports per-component status and
+    timing.
+    """
+
+    def __init__(self, requires=READY_REQUIRES, retry_interval=STARTUP_RETRY_INTERVAL):
+        self.requires = list(requires)
+        self.retry_interval = retry_interval
+        self.components = {}
+        self.tasks = []
+        self.started = time.monotonic()
+
+    def start(self, name: str, fn, retry: bool = True, then=None):
+        """Run fn (sync functions go to a thread) in the background.
+
+        fn may return False to signal "not connected yet" (retried like an
+        exception). `then` runs once after success, e.g. to launch refresh loops.
+        """
+        self.components[name] = {"status": "starting", "attempts": 0, "seconds": None, "error": None}
+        self.tasks.append(asyncio.get_running_loop().create_task(self._run(name, fn, retry, then)))
+
+    async def _run(self, name, fn, retry, then):
+        component = self.components[name]
+        while True:
+            component["attempts"] += 1
+            started = time.monotonic()
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    result = await fn()
+                else:
+                    result = await asyncio.to_thread(fn)
+                if result is False:
+                    raise RuntimeError("not available")
+                component.update(status="ready", error=None,
+                                 seconds=round(time.monotonic() - started, 3),
+                                 ready_after=round(time.monotonic() - self.started, 3))
+                print(f"Startup: {name} ready in {component['seconds']}s")
+                if then:
+                    then()
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                component.update(status="failed", error=str(e),
+                                 seconds=round(time.monotonic() - started, 3))
+                print(f"Startup: {name} failed ({e})" + (", retrying" if retry else ""))
+                if not retry:
+                    return
+                await asyncio.sleep(self.retry_interval)
+
+    def track(self, task):
+        """Keep a long-running background task so shutdown can cancel it"""
+        self.tasks.append(task)
+        return task
+
+    @property
+    def ready(self) -> bool:
+        return all(self.components.get(name, {}).get("status") == "ready" for name in self.requires)
+
+    def get_stats(self):
+        return {"ready": self.ready, "requires": self.requires,
+                "uptime_s": round(time.monotonic() - self.started, 3),
+                "components": {name: dict(c) for name, c in self.components.items()}}
+
+    async def shutdown(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
@@ -0,0 +1,46 @@
+import asyncio
+
+from src.services.admission import AdmissionController, client_key, request_class
+
+
+def test_cancel_during_slot_handoff_releases_slot():
+    async def scenario():
+        admission = AdmissionController(enabled=True, max_concurrency=1, user_limit=2)
+        first = await admission.acquire("parts", "a")
+        waiter = asyncio.ensure_future(admission.acquire("parts", "b"))
+        await asyncio.sleep(0)  # b is queued
+
+        # The slot is handed to b and b is cancelled in the same loop iteration;
+        # a cancelled acquire must not hand out a ticket nobody will release
+        admission.release(first)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            return admission, True
+        return admission, False
+
+    admission, cancelled = asyncio.run(scenario())
+    assert cancelled
+    assert admission.in_flight == 0
+    assert admission.users == {}
+
+
+def test_user_limit_disabled_by_default():
+    async def scenario():
+        admission = AdmissionController(enabled=True, user_limit=0)
+        return [await admission.acquire("general", "proxy") for _ in range(10)]
+
+    assert len(asyncio.run(scenario())) == 10
+
+
+def test_client_key_trusts_forwarded_for_only_from_proxies():
+    proxies = {"10.0.0.1"}
+    assert client_key("10.0.0.1", "203.0.113.7, 10.0.0.1", proxies) == "203.0.113.7"
+    assert client_key("198.51.100.2", "203.0.113.7", proxies) == "198.51.100.2"
+    assert client_key("10.0.0.1", None, proxies) == "10.0.0.1"
+
+
+def test_unclassified_messages_get_the_general_class():
+    assert request_class("hello there") == "general"
+    assert request_class("any maintenance tips?") == "blogs"